@@ -1,51 +1,354 @@
-import shlex
+import dataclasses
+import json
+import os
+import re
+import signal
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from functools import partial
 from logging import getLogger
+from typing import Iterable, Iterator, TextIO
 
-from entity.errors import DomainError, ValidationError
+from adapter.globbing import expand_pipeline
+from adapter.parser import Pipeline, Profile, Redirect, parse_line, tokenize
+from entity.cancel import CancelToken, cancel_scope
+from entity.errors import (
+    CommandCancelledError,
+    DomainError,
+    ExitRequestError,
+    ValidationError,
+)
+from entity.iostat import IOCounters, io_scope, read_proc_io
+from entity.record import Error, Record
+from repository.command.path_utils import normalize
+from usecase.jobs import JobManager
 from usecase.shell import Shell
 
 logger = getLogger(__name__)
 
+# размер буфера записи при перенаправлении вывода в файл
+WRITE_BUFFER = 1 << 16
+# статус команды, прерванной Ctrl-C, как в bash
+INTERRUPTED = 130
+# !n в начале строки повторяет команду n из истории, остаток строки дописывается
+HISTORY_REF = re.compile(r'^\s*!(\d+)(.*)$', re.DOTALL)
+
+
+@contextmanager
+def _sigint_cancels(token: CancelToken) -> Iterator[None]:
+    """Ctrl-C отменяет текущую команду, а не завершает shell.
+    Повторный Ctrl-C прерывает команду сразу, не дожидаясь безопасной точки"""
+    # обработчик сигнала ставится только из главного потока
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def handler(signum, frame) -> None:
+        if token.cancelled:
+            raise KeyboardInterrupt
+        token.cancel()
+
+    previous = signal.signal(signal.SIGINT, handler)
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
 
 class CLIAdapter:
-    def __init__(self, shell: Shell):
+    def __init__(
+        self,
+        shell: Shell,
+        jobs: JobManager | None = None,
+        out: TextIO | None = None,
+        json_output: bool = False,
+    ):
         self.shell = shell
+        self.jobs = jobs if jobs is not None else JobManager()
+        # None - sys.stdout на момент печати, демон передаёт поток клиента
+        self.out = out
+        # --json: вывод и ошибки команд - JSON по объекту на строку
+        self.json_output = json_output
 
     def run(self):
+        # readline нужен только интерактивному режиму, -c и скрипты его не грузят
+        from adapter import completion, reverse_search
+
+        completion.install(self.shell)
+        reverse_search.install()
         print('Simple Unix Shell. Для выхода нажми Ctrl-D')
         while True:
             try:
-                line = input(f'{self.shell.user}@{self.shell.pwd}$ ').strip()
+                self._report_finished_jobs()
+                line = input(self._prompt()).strip()
+                if line.startswith(reverse_search.MARKER):
+                    line = self._reverse_search(line[1:])
                 if not line:
                     continue
-                parts = shlex.split(line)
-                name = parts[0]
-                args = []
-                flags = []
-                for arg in parts[1:]:
-                    if arg.startswith('-'):
-                        flags.append(arg)
-                    else:
-                        args.append(arg)
-                logger.info(line)
-                res = self.shell.run(name, args, flags)
-                if res != '':
-                    print(res)
-            except EOFError:
+                self.execute(line)
+            except (EOFError, ExitRequestError):
                 print('\nЗавершение shell')
                 break
-            except PermissionError as e:
-                logger.error(e)
-                print('Недостаточно прав')
-            except ValidationError as e:
-                logger.warning(e)
-                print(e)
-            except DomainError as e:
-                logger.error(e)
-                print(e)
             except KeyboardInterrupt:
                 print('\nShell завершён по Ctrl-C. Лучше через Ctrl-D')
                 break
             except Exception as e:
                 logger.critical(e, exc_info=e)
                 break
+
+    def _prompt(self) -> str:
+        return f'{self.shell.user}@{self.shell.pwd}$ '
+
+    def _reverse_search(self, query: str) -> str:
+        """Ctrl-R: найденная команда для выполнения или ''"""
+        from adapter import reverse_search as search
+
+        result = search.run(
+            lambda text, limit: self.shell.search_history(text, limit=limit), query
+        )
+        if result is None:
+            search.replace_marker_line('')
+            return ''
+        action, line = result
+        if action == search.EDIT:
+            # в историю readline попадёт строка после правки
+            search.replace_marker_line('')
+            search.prefill(line)
+            return ''
+        search.replace_marker_line(line)
+        print(f'{self._prompt()}{line}')
+        return line
+
+    def run_script(self, lines: Iterable[str]) -> int:
+        """Выполняет строки скрипта в одном процессе, возвращает статус последней команды"""
+        status = 0
+        try:
+            for raw in lines:
+                line = raw.strip()
+                if line:
+                    status = self.execute(line)
+        except ExitRequestError:
+            pass
+        except (BrokenPipeError, ConnectionResetError):
+            # читатель вывода ушёл: писать ошибку некуда, решает вызывающий
+            raise
+        except Exception as e:
+            logger.critical(e, exc_info=e)
+            print(e, file=self.out)
+            return 1
+        return status
+
+    def execute(self, line: str) -> int:
+        """Выполняет строку 'a; b && c || d', возвращает статус последнего шага"""
+        try:
+            line = self._expand_history(line)
+            logger.info(line)
+            steps = parse_line(tokenize(line))
+        except ValidationError as e:
+            logger.warning(e)
+            self._error(e)
+            return 1
+
+        status = 0
+        token = CancelToken()
+        try:
+            with (
+                self.shell.line_history(),
+                cancel_scope(token),
+                _sigint_cancels(token),
+            ):
+                for step in steps:
+                    # после Ctrl-C остальные шаги строки не выполняются
+                    if token.cancelled:
+                        break
+                    if step.condition == '&&' and status != 0:
+                        continue
+                    if step.condition == '||' and status == 0:
+                        continue
+                    # шаблоны раскрываются перед шагом: cd в строке уже выполнен
+                    pipeline = expand_pipeline(step.pipeline, self.shell.context)
+                    if step.background:
+                        status = self._start_background(pipeline)
+                    elif pipeline.timed:
+                        status = self._execute_timed(pipeline)
+                    else:
+                        status = self._execute_untimed(pipeline)
+        except KeyboardInterrupt:
+            logger.warning('Команда прервана: %s', line)
+            self._error('Команда прервана')
+            return INTERRUPTED
+        finally:
+            # строка как набрана: !n повторит кавычки, конвейер и шаблоны
+            if steps:
+                self.shell.add_history_line(line, steps[0].pipeline.stages[0].name)
+        return status
+
+    def _expand_history(self, line: str) -> str:
+        match = HISTORY_REF.match(line)
+        if match is None:
+            return line
+        cmd = self.shell.history_command(int(match[1]))
+        if cmd is None:
+            raise ValidationError(f'!{match[1]}: нет такой команды в истории')
+        line = cmd + match[2]
+        # как bash, показывает выполняемую команду
+        if not self.json_output:
+            print(line, file=self.out)
+        return line
+
+    def _start_background(self, pipeline: Pipeline) -> int:
+        # снимок контекста на момент запуска: cd после & не меняет пути задания,
+        # cd в задании не меняет pwd shell; терминал остаётся приглашению
+        context = dataclasses.replace(self.shell.context, interactive=False)
+        worker = CLIAdapter(
+            self.shell.session(context), self.jobs, self.out, self.json_output
+        )
+        job = self.jobs.submit(str(pipeline), partial(worker._capture, pipeline))
+        print(f'[{job.id}] {job.line}', file=self.out)
+        return 0
+
+    def _capture(self, pipeline: Pipeline) -> str:
+        """Выполняет конвейер фонового задания, вывод отдаётся через wait/fg.
+        Строку с заданием уже записал в историю execute"""
+        with self.shell.line_history():
+            if pipeline.redirect is not None:
+                self._write_redirected(pipeline, pipeline.redirect)
+                return ''
+            return '\n'.join(self.shell.pipeline(pipeline.stages))
+
+    def _report_finished_jobs(self) -> None:
+        """Перед приглашением, как bash: статус завершённых заданий.
+        Задание после отчёта убрано, поэтому его вывод или ошибка печатаются здесь"""
+        for job in self.jobs.take_finished():
+            error = job.future.exception()
+            if error is None:
+                print(f'[{job.id}] готово: {job.line}', file=self.out)
+                out = job.future.result()
+            else:
+                status = INTERRUPTED if isinstance(error, CommandCancelledError) else 1
+                print(f'[{job.id}] Exit {status}: {job.line}', file=self.out)
+                out = str(error)
+            if out:
+                print(out, file=self.out)
+
+    def _execute_timed(self, pipeline: Pipeline) -> int:
+        """time <cmd>: реальное время и процессорное время shell (user, sys).
+        time -v <cmd>: ещё и ввод-вывод всех стадий конвейера"""
+        io = IOCounters()
+        proc = read_proc_io()
+        before, started = os.times(), time.perf_counter()
+        with io_scope(io):
+            status = self._execute_untimed(pipeline)
+        real, after = time.perf_counter() - started, os.times()
+        io.add_proc(proc)
+        print(
+            f'real {real:.3f}s\n'
+            f'user {after.user - before.user:.3f}s\n'
+            f'sys  {after.system - before.system:.3f}s',
+            file=self.out,
+        )
+        if pipeline.verbose:
+            print(
+                f'read  {io.read_bytes} B, {io.read_calls} calls\n'
+                f'write {io.write_bytes} B, {io.write_calls} calls\n'
+                f'open  {io.files_opened}\n'
+                f'dirs  {io.dirs_walked}\n'
+                f'stat  {io.stat_calls}',
+                file=self.out,
+            )
+        return status
+
+    def _execute_untimed(self, pipeline: Pipeline) -> int:
+        if pipeline.profile is not None:
+            return self._execute_profiled(pipeline, pipeline.profile)
+        return self._execute_pipeline(pipeline)
+
+    def _execute_profiled(self, pipeline: Pipeline, opts: Profile) -> int:
+        # cProfile и tracemalloc нужны только здесь, загружаются при первом profile
+        from adapter import profiling
+
+        dump = None
+        if opts.dump is not None:
+            dump = str(normalize(opts.dump, self.shell.context))
+        try:
+            with profiling.profiled(self.out, opts.top, opts.mem, dump):
+                return self._execute_pipeline(pipeline)
+        except (DomainError, OSError) as e:
+            logger.error(e)
+            self._error(e)
+            return 1
+
+    def _execute_pipeline(self, pipeline: Pipeline) -> int:
+        try:
+            if pipeline.redirect is not None:
+                self._write_redirected(pipeline, pipeline.redirect)
+            elif self.json_output:
+                self._write_json(self.shell.records(pipeline.stages), self._stdout())
+            else:
+                for chunk in self.shell.pipeline(pipeline.stages):
+                    print(chunk, file=self.out)
+        except CommandCancelledError as e:
+            logger.warning(e)
+            self._error(e)
+            return INTERRUPTED
+        except PermissionError as e:
+            logger.error(e)
+            self._error('Недостаточно прав')
+        except ValidationError as e:
+            logger.warning(e)
+            self._error(e)
+        except DomainError as e:
+            logger.error(e)
+            self._error(e)
+        else:
+            return 0
+        return 1
+
+    def _stdout(self) -> TextIO:
+        return self.out if self.out is not None else sys.stdout
+
+    def _error(self, e: Exception | str) -> None:
+        if self.json_output:
+            self._write_json([Error(str(e))], self._stdout())
+        else:
+            print(e, file=self.out)
+
+    def _write_json(self, records: Iterable[Record], out: TextIO) -> None:
+        # json.dump пишет в поток по частям, строка записи целиком не собирается
+        for rec in records:
+            json.dump(rec.to_dict(), out, ensure_ascii=False)
+            out.write('\n')
+
+    def _open_target(self, redirect: Redirect) -> int:
+        target = normalize(redirect.path, self.shell.context)
+        # без O_APPEND: copy_file_range и sendfile не пишут в такие файлы
+        mode = os.O_WRONLY | os.O_CREAT | (0 if redirect.append else os.O_TRUNC)
+        try:
+            fd = os.open(target, mode, 0o644)
+        except (IsADirectoryError, NotADirectoryError, FileNotFoundError) as e:
+            raise DomainError(f'Нельзя записать в {target}: {e.strerror}')
+        if redirect.append:
+            os.lseek(fd, 0, os.SEEK_END)
+        return fd
+
+    def _write_redirected(self, pipeline: Pipeline, redirect: Redirect) -> None:
+        fd = self._open_target(redirect)
+        try:
+            # одиночная команда может скопировать байты в файл без участия python
+            if len(pipeline.stages) == 1 and not self.json_output:
+                s = pipeline.stages[0]
+                if self.shell.write_to(s.name, s.args, s.flags, fd):
+                    return
+            with open(
+                fd, 'w', encoding='utf-8', buffering=WRITE_BUFFER, closefd=False
+            ) as out:
+                if self.json_output:
+                    self._write_json(self.shell.records(pipeline.stages), out)
+                    return
+                for chunk in self.shell.pipeline(pipeline.stages):
+                    out.write(chunk)
+                    out.write('\n')
+        finally:
+            os.close(fd)
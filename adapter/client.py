@@ -0,0 +1,78 @@
+"""Тонкий клиент демона shell.
+
+Импортирует только стандартную библиотеку: shell, команды и репозитории
+уже загружены в демоне, клиенту остаётся переслать строку и вывести ответ.
+
+    python -m adapter.client [-s socket] -c 'cp -r src dst && ls dst'
+    python -m adapter.client [-s socket] ls -l src
+    python -m adapter.client --json grep -r TODO src
+"""
+
+import getpass
+import json
+import os
+import shlex
+import socket
+import sys
+from typing import TextIO
+
+# код возврата, если демон недоступен или оборвал соединение
+EXIT_UNAVAILABLE = 2
+
+
+def default_socket_path() -> str:
+    base = os.environ.get('XDG_RUNTIME_DIR') or '/tmp'
+    return os.environ.get(
+        'SHELL_SOCKET', os.path.join(base, f'unix-shell-{os.getuid()}.sock')
+    )
+
+
+def request(
+    socket_path: str,
+    line: str,
+    out: TextIO,
+    cwd: str | None = None,
+    json_output: bool = False,
+) -> int:
+    """Отправляет строку демону, печатает вывод по мере получения,
+    возвращает статус команды. json_output - вывод построчным JSON"""
+    msg = {
+        'line': line,
+        'cwd': cwd if cwd is not None else os.getcwd(),
+        'user': getpass.getuser(),
+        'json': json_output,
+    }
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(socket_path)
+        sock.sendall(json.dumps(msg, ensure_ascii=False).encode() + b'\n')
+        with sock.makefile('rb') as frames:
+            for raw in frames:
+                frame = json.loads(raw)
+                if 'status' in frame:
+                    return int(frame['status'])
+                out.write(frame['out'])
+    raise ConnectionError('Демон закрыл соединение без статуса')
+
+
+def parse_argv(argv: list[str]) -> tuple[str, str]:
+    socket_path = default_socket_path()
+    if argv[:1] == ['-s'] and len(argv) > 1:
+        socket_path, argv = argv[1], argv[2:]
+    if argv[:1] == ['-c'] and len(argv) == 2:
+        return socket_path, argv[1]
+    return socket_path, shlex.join(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    json_output = argv[:1] == ['--json']
+    socket_path, line = parse_argv(argv[1:] if json_output else argv)
+    try:
+        return request(socket_path, line, sys.stdout, json_output=json_output)
+    except OSError as e:
+        print(f'Демон shell недоступен ({socket_path}): {e}', file=sys.stderr)
+        return EXIT_UNAVAILABLE
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,146 @@
+"""Автодополнение по Tab для интерактивного режима.
+
+Листинг директории читается один раз через os.scandir, хранится
+отсортированным и отвечает на префикс двоичным поиском. Повторное
+чтение - только когда меняется mtime директории.
+"""
+
+import os
+from bisect import bisect_left
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from repository.command.path_utils import normalize
+from usecase.shell import Shell
+
+try:
+    import readline
+except ImportError:  # нет на Windows
+    readline = None  # type: ignore[assignment]
+
+# сколько директорий держать в кэше
+DEFAULT_MAX_DIRS = 64
+# разделители слов: '/', '~', '.' и '-' остаются внутри пути
+COMPLETER_DELIMS = ' \t\n;|&<>'
+# после этих слов снова ожидается имя команды
+COMMAND_WORDS = ('time', 'profile')
+
+
+@dataclass(frozen=True)
+class _Listing:
+    mtime_ns: int
+    names: list[str]
+    dirs: frozenset[str]
+
+
+class DirectoryIndex:
+    """Кэш отсортированных листингов директорий, сбрасывается по mtime"""
+
+    def __init__(self, max_dirs: int = DEFAULT_MAX_DIRS) -> None:
+        self._max_dirs = max_dirs
+        self._cache: OrderedDict[str, _Listing] = OrderedDict()
+
+    def complete(self, directory: str, prefix: str) -> list[tuple[str, bool]]:
+        """Имена с префиксом и признак директории, в порядке сортировки"""
+        listing = self._listing(directory)
+        if listing is None:
+            return []
+        names = listing.names
+        lo = bisect_left(names, prefix)
+        hi = lo
+        while hi < len(names) and names[hi].startswith(prefix):
+            hi += 1
+        return [(name, name in listing.dirs) for name in names[lo:hi]]
+
+    def _listing(self, directory: str) -> _Listing | None:
+        # mtime берётся до чтения: изменение во время scandir даст новый mtime
+        try:
+            mtime_ns = os.stat(directory).st_mtime_ns
+        except OSError:
+            return None
+        cached = self._cache.get(directory)
+        if cached is not None and cached.mtime_ns == mtime_ns:
+            self._cache.move_to_end(directory)
+            return cached
+        try:
+            listing = self._scan(directory, mtime_ns)
+        except OSError:
+            return None
+        self._cache[directory] = listing
+        self._cache.move_to_end(directory)
+        while len(self._cache) > self._max_dirs:
+            self._cache.popitem(last=False)
+        return listing
+
+    @staticmethod
+    def _scan(directory: str, mtime_ns: int) -> _Listing:
+        names: list[str] = []
+        dirs: set[str] = set()
+        with os.scandir(directory) as it:
+            for entry in it:
+                names.append(entry.name)
+                try:
+                    if entry.is_dir():
+                        dirs.add(entry.name)
+                except OSError:
+                    continue
+        names.sort()
+        return _Listing(mtime_ns, names, frozenset(dirs))
+
+
+def _expects_command(before: str) -> bool:
+    words = before.split()
+    if not words or words[-1] in COMMAND_WORDS or words[-2:] == ['time', '-v']:
+        return True
+    # после |, ;, &&, || и & начинается новая команда
+    return words[-1][-1] in '|;&'
+
+
+class Completer:
+    """Дополняет имена команд в начале команды и пути в остальных словах"""
+
+    def __init__(self, shell: Shell, index: DirectoryIndex | None = None) -> None:
+        self._shell = shell
+        self._index = index if index is not None else DirectoryIndex()
+        self._commands = sorted({*shell.command_names, *COMMAND_WORDS})
+        self._matches: list[str] = []
+
+    def candidates(self, before: str, text: str) -> list[str]:
+        """before - строка до дополняемого слова, text - само слово"""
+        if _expects_command(before):
+            lo = bisect_left(self._commands, text)
+            return [n for n in self._commands[lo:] if n.startswith(text)]
+        return self._paths(text)
+
+    def _paths(self, text: str) -> list[str]:
+        head, _, prefix = text.rpartition('/')
+        if head or text.startswith('/'):
+            head += '/'
+        directory = str(normalize(head or '.', self._shell.context))
+        show_hidden = prefix.startswith('.')
+        return [
+            f'{head}{name}/' if is_dir else f'{head}{name}'
+            for name, is_dir in self._index.complete(directory, prefix)
+            if show_hidden or not name.startswith('.')
+        ]
+
+    def complete(self, text: str, state: int) -> str | None:
+        """Функция для readline.set_completer: state 0 - новый поиск"""
+        if state == 0:
+            line = readline.get_line_buffer()
+            self._matches = self.candidates(line[: readline.get_begidx()], text)
+        return self._matches[state] if state < len(self._matches) else None
+
+
+def install(shell: Shell) -> bool:
+    """Включает дополнение по Tab, False - readline недоступен"""
+    if readline is None:
+        return False
+    readline.set_completer(Completer(shell).complete)
+    readline.set_completer_delims(COMPLETER_DELIMS)
+    # macOS: python собран с libedit вместо GNU readline
+    if 'libedit' in (readline.__doc__ or ''):
+        readline.parse_and_bind('bind ^I rl_complete')
+    else:
+        readline.parse_and_bind('tab: complete')
+    return True
@@ -0,0 +1,190 @@
+import io
+import json
+import os
+import socket
+import socketserver
+import threading
+import time
+from logging import getLogger
+from typing import TextIO, cast
+
+from adapter.cli import CLIAdapter
+from entity.context import CommandContext
+from usecase.jobs import JobManager, jobs_scope
+from usecase.shell import Shell
+
+logger = getLogger(__name__)
+
+# кадр не больше этого размера: большой вывод уходит частями
+FRAME_SIZE = 1 << 16
+# законченная строка уходит клиенту сразу, если кадров не было столько секунд,
+# иначе не позже: быстрый вывод склеивается в кадры, медленный не ждёт конца команды
+FRAME_DELAY = 0.05
+
+
+class _FrameWriter:
+    """Текстовый поток, отправляющий вывод клиенту кадрами {"out": ...}.
+    Не наследует IOBase: тот при сборке мусора зовёт flush, а wfile
+    соединения к тому времени уже закрыт"""
+
+    def __init__(self, wfile: io.BufferedIOBase) -> None:
+        self._wfile = wfile
+        self._buf: list[str] = []
+        self._size = 0
+        # кадры отправляет и поток команды, и таймер отложенной отправки
+        self._lock = threading.Lock()
+        self._timer: threading.Timer | None = None
+        self._sent = 0.0
+
+    def write(self, s: str) -> int:
+        with self._lock:
+            self._buf.append(s)
+            self._size += len(s)
+            if self._size >= FRAME_SIZE:
+                self._send_out()
+            elif '\n' in s and self._timer is None:
+                delay = self._sent + FRAME_DELAY - time.monotonic()
+                if delay <= 0:
+                    self._send_out()
+                else:
+                    self._timer = threading.Timer(delay, self._send_later)
+                    self._timer.daemon = True
+                    self._timer.start()
+        return len(s)
+
+    def flush(self) -> None:
+        with self._lock:
+            self._send_out()
+
+    def finish(self, status: int) -> None:
+        with self._lock:
+            self._cancel_timer()
+            self._send_out()
+            self._send({'status': status})
+            self._wfile.flush()
+
+    def close(self) -> None:
+        """Соединение закрыто: отложенная отправка отменяется"""
+        with self._lock:
+            self._cancel_timer()
+            self._buf.clear()
+
+    def _send_later(self) -> None:
+        with self._lock:
+            self._timer = None
+            try:
+                self._send_out()
+            except (OSError, ValueError):
+                # клиент ушёл: ошибку увидит поток команды при следующей записи
+                self._buf.clear()
+
+    def _cancel_timer(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+    def _send_out(self) -> None:
+        if self._buf:
+            self._send({'out': ''.join(self._buf)})
+            self._buf.clear()
+            self._size = 0
+            self._wfile.flush()
+            self._sent = time.monotonic()
+
+    def _send(self, frame: dict) -> None:
+        self._wfile.write(json.dumps(frame, ensure_ascii=False).encode() + b'\n')
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: 'ShellServer'
+
+    def handle(self) -> None:
+        # фоновые задания свои у каждого клиента и доживают до конца соединения
+        jobs = JobManager()
+        try:
+            with jobs_scope(jobs):
+                self._serve(jobs)
+        finally:
+            jobs.shutdown()
+
+    def _serve(self, jobs: JobManager) -> None:
+        # контекст живёт всё соединение: cd влияет на следующие запросы клиента
+        ctx: CommandContext | None = None
+        for raw in self.rfile:
+            out = _FrameWriter(self.wfile)
+            try:
+                msg = json.loads(raw)
+                line = msg['line']
+            except (ValueError, KeyError, TypeError) as e:
+                logger.warning('Некорректный запрос демону: %s', e)
+                out.write(f'Некорректный запрос: {e}\n')
+                out.finish(2)
+                continue
+            if ctx is None:
+                ctx = self.server.context_for(msg)
+            cli = CLIAdapter(
+                self.server.shell.session(ctx),
+                jobs,
+                cast(TextIO, out),
+                json_output=msg.get('json') is True,
+            )
+            try:
+                status = cli.run_script(line.splitlines())
+                out.finish(status)
+            except (BrokenPipeError, ConnectionResetError):
+                # клиент отключился посреди вывода: соединение закрыто
+                logger.info('Клиент демона отключился')
+                out.close()
+                return
+
+
+class ShellServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Демон с одним прогретым Shell: команды, кэши и репозитории
+    загружаются один раз, каждое соединение получает свой CommandContext
+    и свои фоновые задания"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, shell: Shell) -> None:
+        self.shell = shell
+        _remove_stale_socket(socket_path)
+        super().__init__(socket_path, _Handler)
+
+    def server_bind(self) -> None:
+        # сокет доступен только владельцу: через него выполняются любые команды
+        old = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(old)
+
+    def server_close(self) -> None:
+        super().server_close()
+        try:
+            os.unlink(self.server_address)  # type: ignore[arg-type]
+        except FileNotFoundError:
+            pass
+
+    def context_for(self, msg: dict) -> CommandContext:
+        base = self.shell.context
+        cwd = msg.get('cwd')
+        return CommandContext(
+            pwd=cwd if isinstance(cwd, str) and os.path.isdir(cwd) else base.pwd,
+            home=base.home,
+            user=msg.get('user') or base.user,
+            # терминал демона не принадлежит клиенту: подтверждать некому
+            interactive=False,
+        )
+
+
+def _remove_stale_socket(socket_path: str) -> None:
+    """Удаляет сокет упавшего демона, живой демон не трогает"""
+    if not os.path.exists(socket_path):
+        return
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(socket_path)
+        except ConnectionRefusedError:
+            os.unlink(socket_path)
+            return
+    raise OSError(f'Демон уже запущен: {socket_path}')
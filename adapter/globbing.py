@@ -0,0 +1,171 @@
+"""Раскрытие шаблонов * ? [...] и ** в аргументах перед выполнением команды.
+
+Каждый сегмент шаблона компилируется один раз. Директории читаются
+через os.scandir, тип берётся из dirent без stat, в директорию
+спускаемся только если её имя подходит под сегмент. Совпадения
+отдаются генератором по мере обхода.
+"""
+
+import fnmatch
+import os
+import re
+from functools import lru_cache
+from typing import Iterator
+
+from adapter.parser import GLOB_CHARS, GlobWord, Pipeline
+from entity.command import Invocation
+from entity.context import CommandContext
+from repository.command.path_utils import expand_user_with_ctx
+
+
+def has_magic(segment: str) -> bool:
+    return any(ch in segment for ch in GLOB_CHARS)
+
+
+@lru_cache(maxsize=256)
+def _compile(segment: str) -> re.Pattern:
+    return re.compile(fnmatch.translate(segment))
+
+
+def _sorted_entries(directory: str) -> list[os.DirEntry]:
+    # одна директория в памяти, порядок как у ls в bash
+    try:
+        with os.scandir(directory) as it:
+            return sorted(it, key=lambda e: e.name)
+    except OSError:
+        return []
+
+
+def _is_dir(entry: os.DirEntry, follow: bool = True) -> bool:
+    try:
+        return entry.is_dir(follow_symlinks=follow)
+    except OSError:
+        return False
+
+
+def _join(shown: str, name: str) -> str:
+    return (
+        name
+        if not shown
+        else f'{shown}{name}'
+        if shown.endswith('/')
+        else f'{shown}/{name}'
+    )
+
+
+class _Matcher:
+    """Шаблон, разобранный на сегменты. Сегменты без символов шаблона
+    не читают директорию, '**' - ноль или больше вложенных директорий"""
+
+    def __init__(self, pattern: str) -> None:
+        self.dir_only = pattern.endswith('/')
+        parts = [p for p in pattern.split('/') if p]
+        # a/**/**/b - то же, что a/**/b
+        self.segments = [
+            p
+            for i, p in enumerate(parts)
+            if not (p == '**' and parts[i - 1 : i] == ['**'])
+        ]
+
+    def _name_matches(self, segment: str, name: str) -> bool:
+        # * и ? не совпадают с именами на точку, если сегмент сам не с точки
+        if name.startswith('.') and not segment.startswith('.'):
+            return False
+        return _compile(segment).match(name) is not None
+
+    def match(self, fs_dir: str, shown: str, i: int) -> Iterator[str]:
+        segments = self.segments
+        if i == len(segments):
+            if not self.dir_only or os.path.isdir(fs_dir):
+                yield _join(shown, '') if self.dir_only else shown
+            return
+        segment = segments[i]
+        last = i == len(segments) - 1
+
+        if segment == '**':
+            yield from self._globstar(fs_dir, shown, i)
+            return
+
+        if not has_magic(segment):
+            path = os.path.join(fs_dir, segment)
+            if not last:
+                yield from self.match(path, _join(shown, segment), i + 1)
+            elif os.path.lexists(path):
+                yield from self.match(path, _join(shown, segment), i + 1)
+            return
+
+        for entry in _sorted_entries(fs_dir):
+            if not self._name_matches(segment, entry.name):
+                continue
+            # в непоследний сегмент спускаемся только через директории
+            if (not last or self.dir_only) and not _is_dir(entry):
+                continue
+            yield from self.match(entry.path, _join(shown, entry.name), i + 1)
+
+    def _globstar(self, fs_dir: str, shown: str, i: int) -> Iterator[str]:
+        """'**' на сегменте i: один scandir на директорию и для следующего
+        сегмента, и для спуска. Скрытые директории и ссылки не обходятся"""
+        segments = self.segments
+        if i == len(segments) - 1:
+            # '**' в конце - всё дерево
+            for entry in _sorted_entries(fs_dir):
+                if entry.name.startswith('.'):
+                    continue
+                is_dir = _is_dir(entry, follow=False)
+                if not self.dir_only or is_dir:
+                    yield _join(shown, entry.name) + ('/' if self.dir_only else '')
+                if is_dir:
+                    yield from self._globstar(entry.path, _join(shown, entry.name), i)
+            return
+
+        nxt = segments[i + 1]
+        nxt_last = i + 1 == len(segments) - 1
+        for entry in _sorted_entries(fs_dir):
+            name = entry.name
+            is_dir = _is_dir(entry, follow=False)
+            if has_magic(nxt) and self._name_matches(nxt, name) or name == nxt:
+                if (nxt_last and not self.dir_only) or _is_dir(entry):
+                    yield from self.match(entry.path, _join(shown, name), i + 2)
+            if is_dir and not name.startswith('.'):
+                yield from self._globstar(entry.path, _join(shown, name), i)
+
+
+def iglob(pattern: str, ctx: CommandContext) -> Iterator[str]:
+    """Пути, подходящие под шаблон, в том виде, как их написал пользователь:
+    относительный шаблон даёт относительные пути от ctx.pwd"""
+    pattern = expand_user_with_ctx(pattern, ctx)
+    matcher = _Matcher(pattern)
+    if pattern.startswith('/'):
+        return matcher.match('/', '/', 0)
+    return matcher.match(ctx.pwd, '', 0)
+
+
+def expand_args(args: list[str], ctx: CommandContext) -> list[str]:
+    """Раскрывает шаблоны; шаблон без совпадений остаётся как написан, как в bash"""
+    out: list[str] = []
+    for arg in args:
+        if not isinstance(arg, GlobWord):
+            out.append(arg)
+            continue
+        before = len(out)
+        out.extend(iglob(arg.pattern, ctx))
+        if len(out) == before:
+            out.append(str(arg))
+    return out
+
+
+def expand_pipeline(pipeline: Pipeline, ctx: CommandContext) -> Pipeline:
+    """Pipeline с раскрытыми аргументами. Раскрывается перед запуском
+    каждого шага: 'cd logs; rm *.tmp' ищет файлы уже в logs"""
+    if not any(isinstance(a, GlobWord) for s in pipeline.stages for a in s.args):
+        return pipeline
+    stages = [
+        Invocation(s.name, expand_args(s.args, ctx), s.flags) for s in pipeline.stages
+    ]
+    return Pipeline(
+        stages,
+        pipeline.redirect,
+        pipeline.timed,
+        profile=pipeline.profile,
+        verbose=pipeline.verbose,
+    )
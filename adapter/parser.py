@@ -0,0 +1,272 @@
+from dataclasses import dataclass
+
+from entity.command import Invocation
+from entity.errors import ValidationError
+
+# длинные операторы идут первыми, чтобы '||' не разбирался как два '|'
+OPERATORS = ('&&', '||', '>>', '|', '>', ';', '&')
+# разделители команд в строке, '&' запускает предыдущую команду в фоне
+SEPARATORS = ('&&', '||', ';', '&')
+
+
+# символы шаблона, которые раскрывает globbing
+GLOB_CHARS = '*?['
+
+
+@dataclass(frozen=True)
+class Token:
+    text: str
+    operator: bool = False
+    # шаблон для раскрытия, если в слове есть * ? [ вне кавычек
+    pattern: str | None = None
+
+
+class GlobWord(str):
+    """Аргумент с шаблоном: текст как написан, pattern - для раскрытия,
+    символы шаблона из кавычек в нём экранированы как [*]"""
+
+    pattern: str
+
+    def __new__(cls, text: str, pattern: str) -> 'GlobWord':
+        word = super().__new__(cls, text)
+        word.pattern = pattern
+        return word
+
+
+def _escape_glob(text: str) -> str:
+    return ''.join(f'[{ch}]' if ch in GLOB_CHARS else ch for ch in text)
+
+
+def _read_quoted(line: str, i: int, buf: list[str]) -> int:
+    """Читает строку в кавычках с позиции i, возвращает позицию после закрывающей"""
+    quote = line[i]
+    i += 1
+    while i < len(line):
+        ch = line[i]
+        if ch == quote:
+            return i + 1
+        if ch == '\\' and quote == '"' and line[i + 1 : i + 2] in ('"', '\\'):
+            i += 1
+            ch = line[i]
+        buf.append(ch)
+        i += 1
+    raise ValidationError('Незакрытая кавычка')
+
+
+def tokenize(line: str) -> list[Token]:
+    """Разбивает строку на слова и операторы с учётом кавычек и экранирования"""
+    tokens: list[Token] = []
+    buf: list[str] = []
+    # то же слово, но с экранированными символами шаблона из кавычек
+    pattern: list[str] = []
+    magic = False
+    in_word = False
+    i = 0
+
+    def flush() -> None:
+        nonlocal in_word, magic
+        if in_word:
+            glob = ''.join(pattern) if magic else None
+            tokens.append(Token(''.join(buf), pattern=glob))
+            buf.clear()
+            pattern.clear()
+            in_word = magic = False
+
+    while i < len(line):
+        ch = line[i]
+        if ch in ('"', "'"):
+            start = len(buf)
+            i = _read_quoted(line, i, buf)
+            pattern.append(_escape_glob(''.join(buf[start:])))
+            in_word = True
+            continue
+
+        if ch == '\\' and i + 1 < len(line):
+            buf.append(line[i + 1])
+            pattern.append(_escape_glob(line[i + 1]))
+            in_word = True
+            i += 2
+            continue
+
+        if ch.isspace():
+            flush()
+            i += 1
+            continue
+
+        # комментарий до конца строки
+        if ch == '#' and not in_word:
+            break
+
+        op = next((o for o in OPERATORS if line.startswith(o, i)), None)
+        if op is not None:
+            flush()
+            tokens.append(Token(op, operator=True))
+            i += len(op)
+            continue
+
+        buf.append(ch)
+        pattern.append(ch)
+        magic = magic or ch in GLOB_CHARS
+        in_word = True
+        i += 1
+
+    flush()
+    return tokens
+
+
+def to_invocation(words: list[str]) -> Invocation:
+    """Отделяет имя команды, аргументы и флаги"""
+    name, *rest = words
+    args: list[str] = []
+    flags: list[str] = []
+    for arg in rest:
+        if arg.startswith('-'):
+            flags.append(arg)
+        else:
+            args.append(arg)
+    return Invocation(name, args, flags)
+
+
+@dataclass
+class Redirect:
+    path: str
+    append: bool = False
+
+
+# сколько строк профиля печатает profile без -n
+DEFAULT_PROFILE_TOP = 20
+
+
+@dataclass
+class Profile:
+    """Опции 'profile [--mem] [-n top] [-o file.pstats] <command>'"""
+
+    mem: bool = False
+    top: int = DEFAULT_PROFILE_TOP
+    dump: str | None = None
+
+    def __str__(self) -> str:
+        text = 'profile'
+        if self.mem:
+            text += ' --mem'
+        if self.top != DEFAULT_PROFILE_TOP:
+            text += f' -n {self.top}'
+        if self.dump is not None:
+            text += f' -o {self.dump}'
+        return text
+
+
+@dataclass
+class Pipeline:
+    stages: list[Invocation]
+    redirect: Redirect | None = None
+    # 'time a | b': замерить время всего конвейера
+    timed: bool = False
+    # 'time -v a': ещё и ввод-вывод (байты, open, обход директорий, stat)
+    verbose: bool = False
+    # 'profile a': выполнить под cProfile
+    profile: Profile | None = None
+
+    def __str__(self) -> str:
+        text = ' | '.join(' '.join([s.name, *s.flags, *s.args]) for s in self.stages)
+        if self.profile is not None:
+            text = f'{self.profile} {text}'
+        if self.timed:
+            text = f'time -v {text}' if self.verbose else f'time {text}'
+        if self.redirect is not None:
+            op = '>>' if self.redirect.append else '>'
+            text += f' {op} {self.redirect.path}'
+        return text
+
+
+@dataclass
+class Step:
+    pipeline: Pipeline
+    # условие запуска по статусу предыдущего шага: ';', '&&' или '||'
+    condition: str = ';'
+    background: bool = False
+
+
+def _parse_redirect(tokens: list[Token]) -> Redirect:
+    op, *rest = tokens
+    if len(rest) != 1 or rest[0].operator:
+        raise ValidationError(f'После {op.text} ожидается один путь в конце команды')
+    return Redirect(rest[0].text, append=op.text == '>>')
+
+
+def _parse_profile(tokens: list[Token]) -> tuple[Profile, list[Token]]:
+    """Опции profile идут до первого слова, не начинающегося с '-'"""
+    opts = Profile()
+    i = 0
+    while i < len(tokens) and not tokens[i].operator and tokens[i].text[:1] == '-':
+        flag = tokens[i].text
+        if flag == '--mem':
+            opts.mem = True
+            i += 1
+            continue
+        if flag not in ('-n', '-o'):
+            raise ValidationError(f'Неизвестный флаг profile: {flag}')
+        if i + 1 >= len(tokens) or tokens[i + 1].operator:
+            raise ValidationError(f'После {flag} ожидается значение')
+        value = tokens[i + 1].text
+        if flag == '-o':
+            opts.dump = value
+        elif value.isdigit():
+            opts.top = int(value)
+        else:
+            raise ValidationError('profile -n ожидает число')
+        i += 2
+    return opts, tokens[i:]
+
+
+def parse_pipeline(tokens: list[Token]) -> Pipeline:
+    """Разбирает 'a | b | c > file' на стадии конвейера и перенаправление вывода"""
+    timed = bool(tokens) and tokens[0] == Token('time')
+    if timed:
+        tokens = tokens[1:]
+    verbose = timed and bool(tokens) and tokens[0] == Token('-v')
+    if verbose:
+        tokens = tokens[1:]
+    profile = None
+    if tokens and tokens[0] == Token('profile'):
+        profile, tokens = _parse_profile(tokens[1:])
+    redirect = None
+    for i, tok in enumerate(tokens):
+        if tok.operator and tok.text in ('>', '>>'):
+            redirect = _parse_redirect(tokens[i:])
+            tokens = tokens[:i]
+            break
+
+    stages: list[Invocation] = []
+    words: list[str] = []
+    for tok in [*tokens, Token('|', operator=True)]:
+        if not tok.operator:
+            words.append(
+                GlobWord(tok.text, tok.pattern) if tok.pattern is not None else tok.text
+            )
+            continue
+        if tok.text != '|':
+            raise ValidationError(f'Неподдерживаемый оператор: {tok.text}')
+        if not words:
+            raise ValidationError('Пустая команда в конвейере')
+        stages.append(to_invocation(words))
+        words = []
+    return Pipeline(stages, redirect, timed, profile=profile, verbose=verbose)
+
+
+def parse_line(tokens: list[Token]) -> list[Step]:
+    """Разбирает 'a; b && c || d &' на шаги с условиями запуска"""
+    steps: list[Step] = []
+    condition = ';'
+    start = 0
+    for i, tok in enumerate([*tokens, Token(';', operator=True)]):
+        if not (tok.operator and tok.text in SEPARATORS):
+            continue
+        part = tokens[start:i]
+        start = i + 1
+        if part:
+            steps.append(Step(parse_pipeline(part), condition, tok.text == '&'))
+        elif condition != ';' or tok.text != ';':
+            raise ValidationError(f'Пропущена команда рядом с {tok.text}')
+        condition = ';' if tok.text == '&' else tok.text
+    return steps
@@ -0,0 +1,54 @@
+import cProfile
+import pstats
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from typing import Iterator, TextIO
+
+from entity.errors import DomainError
+
+
+@contextmanager
+def profiled(
+    out: TextIO | None, top: int, mem: bool, dump: str | None
+) -> Iterator[None]:
+    """Профилирует блок cProfile (и tracemalloc при mem), печатает топ функций
+    по cumulative и топ мест выделения памяти. Замеряется только текущий поток:
+    стадии конвейера, кроме последней, в профиль не попадают"""
+    stream = out if out is not None else sys.stdout
+    profiler = cProfile.Profile()
+    own_tracing = mem and not tracemalloc.is_tracing()
+    try:
+        profiler.enable()
+    except ValueError as e:
+        raise DomainError(f'Профилировщик уже запущен: {e}')
+    if own_tracing:
+        tracemalloc.start()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        snapshot = tracemalloc.take_snapshot() if mem else None
+        _, peak = tracemalloc.get_traced_memory() if mem else (0, 0)
+        if own_tracing:
+            tracemalloc.stop()
+        stats = pstats.Stats(profiler, stream=stream)
+        stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(top)
+        if snapshot is not None:
+            _print_allocations(stream, snapshot, top, peak)
+        if dump is not None:
+            profiler.dump_stats(dump)
+            print(f'Профиль сохранён в {dump}', file=stream)
+
+
+def _print_allocations(
+    stream: TextIO, snapshot: tracemalloc.Snapshot, top: int, peak: int
+) -> None:
+    print(f'Память: пик {peak / 1024:.1f} KiB, топ мест выделения:', file=stream)
+    for stat in snapshot.statistics('lineno')[:top]:
+        frame = stat.traceback[0]
+        print(
+            f'{stat.size / 1024:10.1f} KiB {stat.count:8} блоков '
+            f'{frame.filename}:{frame.lineno}',
+            file=stream,
+        )
@@ -0,0 +1,146 @@
+"""Ctrl-R: поиск по истории по мере ввода, как reverse-i-search в bash.
+
+readline не даёт повесить на клавишу функцию на Python, поэтому Ctrl-R
+привязан к макросу: он ставит в начало строки маркер и отправляет её.
+CLIAdapter видит маркер и запускает поиск, уже набранный текст
+становится началом запроса. Каждый символ - один запрос к индексу
+истории (Shell.search_history).
+"""
+
+import os
+import sys
+from typing import Callable, TextIO
+
+try:
+    import readline
+    import termios
+    import tty
+except ImportError:  # нет на Windows
+    readline = None  # type: ignore[assignment]
+
+# символ Ctrl-R: с него начинается строка, отправленная макросом
+MARKER = '\x12'
+# \C-v вставляет следующий символ как есть, а не как привязанную клавишу
+MACRO = r'"\C-r": "\C-a\C-v\C-r\C-m"'
+
+ACCEPT = 'accept'
+EDIT = 'edit'
+
+Search = Callable[[str, int], list[tuple[int, str]]]
+
+
+class ReverseSearch:
+    """Запрос и текущее совпадение; older() - следующее более старое"""
+
+    def __init__(self, search: Search, query: str = '') -> None:
+        self._search = search
+        self.query = query
+        self._skip = 0
+        self.match: str | None = None
+        self._refresh()
+
+    def type(self, text: str) -> None:
+        self.query += text
+        self._skip = 0
+        self._refresh()
+
+    def backspace(self) -> None:
+        self.query = self.query[:-1]
+        self._skip = 0
+        self._refresh()
+
+    def older(self) -> None:
+        # старше ничего нет - остаётся текущее совпадение, как в bash
+        self._skip += 1
+        if not self._refresh():
+            self._skip -= 1
+            self._refresh()
+
+    def _refresh(self) -> bool:
+        if not self.query:
+            self.match = None
+            return False
+        found = self._search(self.query, self._skip + 1)
+        if len(found) <= self._skip:
+            self.match = None
+            return False
+        self.match = found[self._skip][1]
+        return True
+
+    def prompt(self) -> str:
+        failed = '' if self.match is not None or not self.query else 'failed '
+        return f"({failed}reverse-i-search)'{self.query}': {self.match or ''}"
+
+
+def run(
+    search: Search, query: str, out: TextIO | None = None
+) -> tuple[str, str] | None:
+    """Интерактивный поиск в терминале. Enter - (ACCEPT, команда), Esc и Tab -
+    (EDIT, команда) для правки в приглашении, Ctrl-G - None"""
+    out = out if out is not None else sys.stdout
+    state = ReverseSearch(search, query)
+    fd = sys.stdin.fileno()
+    saved = termios.tcgetattr(fd)
+    # readline уже вывел строку с ^R и перевёл курсор: поиск рисуется на её месте
+    out.write('\x1b[1A')
+    try:
+        tty.setcbreak(fd)
+        while True:
+            out.write(f'\r\x1b[K{state.prompt()}')
+            out.flush()
+            key = os.read(fd, 4).decode('utf-8', errors='ignore')
+            if key in ('\r', '\n'):
+                result: tuple[str, str] | None = (ACCEPT, state.match or '')
+                break
+            if key.startswith('\x1b') or key == '\t':
+                result = (EDIT, state.match or state.query)
+                break
+            if key == '\x07':
+                result = None
+                break
+            if key == MARKER:
+                state.older()
+            elif key in ('\x7f', '\x08'):
+                state.backspace()
+            elif key.isprintable():
+                state.type(key)
+    finally:
+        termios.tcsetattr(fd, termios.TCSADRAIN, saved)
+        out.write('\r\x1b[K')
+        out.flush()
+    return result
+
+
+def prefill(text: str) -> None:
+    """Подставляет text в следующее приглашение для правки"""
+
+    def hook() -> None:
+        readline.insert_text(text)
+        readline.redisplay()
+        readline.set_pre_input_hook(None)
+
+    readline.set_pre_input_hook(hook)
+
+
+def replace_marker_line(line: str) -> None:
+    """input() уже записал строку с маркером в историю readline: без замены
+    стрелка вверх вернёт её и снова запустит поиск. Вместо неё в истории
+    остаётся выполненная команда, как в bash"""
+    if readline is None:
+        return
+    last = readline.get_current_history_length()
+    if last and (readline.get_history_item(last) or '').startswith(MARKER):
+        readline.remove_history_item(last - 1)
+    if line:
+        readline.add_history(line)
+
+
+def install() -> bool:
+    """Привязывает Ctrl-R, False - нет GNU readline или терминала"""
+    if readline is None or not sys.stdin.isatty():
+        return False
+    # у libedit (macOS) другой синтаксис макросов
+    if 'libedit' in (readline.__doc__ or ''):
+        return False
+    readline.parse_and_bind(MACRO)
+    return True
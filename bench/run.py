@@ -0,0 +1,310 @@
+"""Бенчмарки shell на реальной файловой системе.
+
+Тесты в test/ идут на pyfakefs и о стоимости настоящего ввода-вывода
+ничего не говорят. Здесь команды выполняются через CLIAdapter над
+сгенерированными деревьями, результат пишется в JSON и сравнивается
+с baseline, снятым на этой же машине. Без baseline сравнение - ошибка,
+только замеры - явный --no-baseline.
+
+    python -m bench.run --scale small
+    python -m bench.run --scale full --tmp /mnt/bench --save-baseline
+    python -m bench.run --no-baseline
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from adapter.cli import CLIAdapter
+from bench.trees import SCALES, Scale, make_trees
+from entity.context import CommandContext
+from entity.undo import UndoRecord
+from main import build_shell
+from repository.history_file_repository import HistoryFileRepository
+from repository.undo_file_repository import UndoJournalRepository
+from usecase.jobs import JobManager
+
+BENCH_DIR = Path(__file__).resolve().parent
+DEFAULT_BASELINE = BENCH_DIR / 'baseline.json'
+DEFAULT_OUT = BENCH_DIR / 'results.json'
+# замедление больше чем на 20% от baseline считается регрессией
+DEFAULT_THRESHOLD = 0.2
+# код возврата, когда baseline нет или он другого масштаба
+NO_BASELINE = 2
+# сколько add замеряется в каждой контрольной точке роста репозитория
+GROWTH_PROBE = 100
+# бюджет на заполнение одного репозитория, секунды
+GROWTH_BUDGET = 120.0
+
+
+@dataclass(frozen=True)
+class Case:
+    """Замер одной командной строки. setup выполняется до замера и не
+    считается, пути деревьев подставляются как {tiny}, {large}, ..."""
+
+    name: str
+    line: str
+    setup: tuple[str, ...] = ()
+
+
+CASES = (
+    Case('cp_r_tiny', 'cp -r {tiny} copy'),
+    Case('cp_r_large', 'cp -r {large} copy'),
+    Case('cp_r_deep', 'cp -r {deep} copy'),
+    Case('mv_r_tiny', 'mv -r src moved', setup=('cp -r {tiny} src',)),
+    Case('rm_r_tiny', 'rm -r -y src', setup=('cp -r {tiny} src',)),
+    Case('grep_r_tiny', 'grep -r ERROR {tiny}'),
+    Case('grep_r_deep', 'grep -r ERROR {deep}'),
+    Case('ls_l_wide', 'ls -l {wide}'),
+    Case('zip_tiny', 'zip -r {tiny} out.zip'),
+    Case('unzip_tiny', 'unzip out.zip dest', setup=('zip -r {tiny} out.zip',)),
+    Case('tar_tiny', 'tar -r {tiny} out.tar.gz'),
+    Case('untar_tiny', 'untar out.tar.gz dest', setup=('tar -r {tiny} out.tar.gz',)),
+    Case('undo_cp_tiny', 'undo', setup=('cp -r {tiny} copy',)),
+    Case('undo_rm_tiny', 'undo', setup=('cp -r {tiny} src', 'rm -r -y src')),
+)
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Бенчмарки shell на реальной ФС')
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--repeat', type=int, default=3, help='повторов на замер')
+    parser.add_argument(
+        '--only', nargs='+', metavar='NAME', help='только эти замеры (префиксы имён)'
+    )
+    parser.add_argument(
+        '--tmp',
+        help='где создавать деревья; сгенерированные деревья переиспользуются',
+    )
+    parser.add_argument('--out', default=str(DEFAULT_OUT))
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE))
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument(
+        '--save-baseline', action='store_true', help='записать результаты как baseline'
+    )
+    parser.add_argument(
+        '--no-baseline',
+        action='store_true',
+        help='только замеры, без сравнения; без флага отсутствие baseline - ошибка',
+    )
+    parser.add_argument('--budget', type=float, default=GROWTH_BUDGET)
+    return parser.parse_args(argv)
+
+
+def _reset(path: Path) -> None:
+    shutil.rmtree(path, ignore_errors=True)
+    path.mkdir(parents=True)
+
+
+class Runner:
+    """Свежий shell на каждый повтор: undo, история и .trash не копятся
+    между замерами и не влияют на их время"""
+
+    def __init__(self, base: Path, trees: dict[str, Path]) -> None:
+        self._state = base / 'state'
+        self._work = base / 'work'
+        self._trees = {name: str(path) for name, path in trees.items()}
+        self._devnull = open(os.devnull, 'w', encoding='utf-8')
+
+    def close(self) -> None:
+        self._devnull.close()
+        shutil.rmtree(self._state, ignore_errors=True)
+        shutil.rmtree(self._work, ignore_errors=True)
+
+    def measure(self, case: Case, repeat: int) -> list[float]:
+        runs = []
+        for _ in range(repeat):
+            _reset(self._state)
+            _reset(self._work)
+            cli = self._cli()
+            for line in case.setup:
+                self._execute(cli, line)
+            started = time.perf_counter()
+            self._execute(cli, case.line)
+            runs.append(time.perf_counter() - started)
+        return runs
+
+    def _cli(self) -> CLIAdapter:
+        jobs = JobManager()
+        shell = build_shell(str(self._state), jobs)
+        ctx = shell.context
+        session = shell.session(
+            CommandContext(pwd=str(self._work), home=ctx.home, user=ctx.user)
+        )
+        return CLIAdapter(session, jobs, self._devnull)
+
+    def _execute(self, cli: CLIAdapter, line: str) -> None:
+        line = line.format(**self._trees)
+        if cli.execute(line) != 0:
+            raise RuntimeError(f'Команда завершилась с ошибкой: {line}')
+
+
+def _grow(
+    add: Callable[[int], None], sizes: tuple[int, ...], budget: float
+) -> dict[int, list[float] | None]:
+    """Время одного add при заполнении репозитория до каждого размера.
+    Заполнение идёт через тот же add, что и в shell; когда бюджет
+    исчерпан, оставшиеся точки - None"""
+    out: dict[int, list[float] | None] = dict.fromkeys(sizes)
+    deadline = time.monotonic() + budget
+    n = 0
+    for size in sizes:
+        while n < size - GROWTH_PROBE and time.monotonic() < deadline:
+            add(n)
+            n += 1
+        if time.monotonic() >= deadline:
+            break
+        runs = []
+        for _ in range(GROWTH_PROBE):
+            started = time.perf_counter()
+            add(n)
+            runs.append(time.perf_counter() - started)
+            n += 1
+        out[size] = runs
+    return out
+
+
+def measure_growth(base: Path, scale: Scale, budget: float) -> dict[str, dict]:
+    state = base / 'growth'
+    _reset(state)
+    history = HistoryFileRepository(state / '.history')
+    undo = UndoJournalRepository(state / '.undo.jsonl')
+
+    def add_history(i: int) -> None:
+        history.add('cp', [f'src{i}', f'dst{i}'], ['-r'])
+
+    def add_undo(i: int) -> None:
+        undo.add([UndoRecord('cp', f'/tmp/src{i}', f'/tmp/dst{i}')])
+
+    results: dict[str, dict] = {}
+    try:
+        for name, add in (('history_add', add_history), ('undo_add', add_undo)):
+            for size, runs in _grow(add, scale.history_sizes, budget).items():
+                key = f'{name}_{size}'
+                results[key] = _summary(runs) if runs else {'skipped': 'budget'}
+    finally:
+        history.close()
+        shutil.rmtree(state, ignore_errors=True)
+    return results
+
+
+def _summary(runs: list[float]) -> dict:
+    return {'median': statistics.median(runs), 'min': min(runs), 'runs': len(runs)}
+
+
+def _selected(name: str, only: list[str] | None) -> bool:
+    return only is None or any(name.startswith(p) for p in only)
+
+
+def run(opts: argparse.Namespace) -> dict:
+    scale = SCALES[opts.scale]
+    tmp = None if opts.tmp else tempfile.TemporaryDirectory(prefix='shell-bench-')
+    base = Path(opts.tmp if opts.tmp else tmp.name)  # type: ignore[union-attr]
+    results: dict[str, dict] = {}
+    try:
+        print(f'Генерация деревьев в {base}...', file=sys.stderr)
+        trees = make_trees(base / 'trees' / opts.scale, scale)
+        runner = Runner(base, trees)
+        try:
+            for case in CASES:
+                if _selected(case.name, opts.only):
+                    results[case.name] = _summary(runner.measure(case, opts.repeat))
+                    _progress(case.name, results[case.name])
+        finally:
+            runner.close()
+        if _selected('history_add', opts.only) or _selected('undo_add', opts.only):
+            for name, res in measure_growth(base, scale, opts.budget).items():
+                if _selected(name, opts.only):
+                    results[name] = res
+                    _progress(name, res)
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+    return {
+        'meta': {
+            'scale': opts.scale,
+            'repeat': opts.repeat,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'timestamp': time.time(),
+        },
+        'results': results,
+    }
+
+
+def _progress(name: str, res: dict) -> None:
+    value = f'{res["median"]:.6f} s' if 'median' in res else res['skipped']
+    print(f'{name:<24} {value}', file=sys.stderr)
+
+
+def compare(current: dict, baseline: dict, threshold: float) -> list[str]:
+    """Строки отчёта о регрессиях: медиана выросла больше чем на threshold
+    или точка, пройденная в baseline, не уложилась в бюджет"""
+    regressions = []
+    for name, base in baseline.get('results', {}).items():
+        cur = current['results'].get(name)
+        if cur is None or 'median' not in base:
+            continue
+        if 'median' not in cur:
+            regressions.append(
+                f'{name}: {cur["skipped"]}, в baseline {base["median"]:.6f} s'
+            )
+            continue
+        ratio = cur['median'] / base['median'] if base['median'] else 1.0
+        if ratio > 1 + threshold:
+            regressions.append(
+                f'{name}: {base["median"]:.6f} s -> {cur["median"]:.6f} s (x{ratio:.2f})'
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> int:
+    opts = parse_args(argv)
+    current = run(opts)
+    Path(opts.out).write_text(json.dumps(current, indent=2), encoding='utf-8')
+    print(f'Результаты: {opts.out}')
+    baseline_path = Path(opts.baseline)
+    if opts.save_baseline:
+        baseline_path.write_text(json.dumps(current, indent=2), encoding='utf-8')
+        print(f'Baseline сохранён: {baseline_path}')
+        return 0
+    if opts.no_baseline:
+        print('Сравнение с baseline отключено: --no-baseline')
+        return 0
+    return check_baseline(current, baseline_path, opts.threshold)
+
+
+def check_baseline(current: dict, baseline_path: Path, threshold: float) -> int:
+    """0 - регрессий нет, 1 - есть регрессии, NO_BASELINE - сравнивать не с чем"""
+    if not baseline_path.exists():
+        print(
+            f'Нет baseline {baseline_path}: снимите его на этой машине '
+            '(--save-baseline) или запустите только замеры (--no-baseline)'
+        )
+        return NO_BASELINE
+    baseline = json.loads(baseline_path.read_text(encoding='utf-8'))
+    if baseline['meta']['scale'] != current['meta']['scale']:
+        print(
+            f'Baseline снят на scale={baseline["meta"]["scale"]}, '
+            f'а замеры на scale={current["meta"]["scale"]}: сравнивать не с чем'
+        )
+        return NO_BASELINE
+    regressions = compare(current, baseline, threshold)
+    for line in regressions:
+        print(f'РЕГРЕССИЯ {line}')
+    if not regressions:
+        print(f'Регрессий нет (порог {threshold:.0%})')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
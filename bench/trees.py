@@ -0,0 +1,132 @@
+"""Генераторы воспроизводимых деревьев для бенчмарков на реальной ФС.
+
+Содержимое зависит только от seed, поэтому прогоны на разных машинах
+сравнимы между собой и с сохранённым baseline."""
+
+import os
+import random
+from dataclasses import dataclass
+from pathlib import Path
+
+# блок для больших файлов: случайные байты, deflate их почти не сжимает
+BLOCK_SIZE = 1 << 20
+WORDS = ['alpha', 'beta', 'gamma', 'delta', 'ERROR', 'INFO', 'WARN', 'omega']
+
+
+@dataclass(frozen=True)
+class Scale:
+    tiny_files: int
+    tiny_per_dir: int
+    large_files: int
+    large_size: int
+    depth: int
+    wide: int
+    history_sizes: tuple[int, ...]
+
+
+SCALES = {
+    # для быстрой проверки и CI
+    'small': Scale(
+        tiny_files=2_000,
+        tiny_per_dir=100,
+        large_files=2,
+        large_size=64 << 20,
+        depth=50,
+        wide=5_000,
+        history_sizes=(100, 1_000, 10_000),
+    ),
+    # полный прогон: 100k файлов, файлы по 2 GiB
+    'full': Scale(
+        tiny_files=100_000,
+        tiny_per_dir=1_000,
+        large_files=2,
+        large_size=2 << 30,
+        depth=200,
+        wide=50_000,
+        history_sizes=(1_000, 10_000, 100_000),
+    ),
+}
+
+
+def _line(rng: random.Random) -> str:
+    return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(3, 12)))
+
+
+def make_tiny(root: Path, count: int, per_dir: int, seed: int = 1) -> Path:
+    """count мелких текстовых файлов по per_dir в директории"""
+    rng = random.Random(seed)
+    for i in range(count):
+        d = root / f'd{i // per_dir:04d}'
+        if i % per_dir == 0:
+            d.mkdir(parents=True)
+        lines = [_line(rng) for _ in range(rng.randint(1, 8))]
+        (d / f'f{i:06d}.txt').write_text('\n'.join(lines) + '\n')
+    return root
+
+
+def make_large(root: Path, count: int, size: int, seed: int = 2) -> Path:
+    """count файлов по size байт, пишутся блоками по BLOCK_SIZE"""
+    rng = random.Random(seed)
+    block = rng.randbytes(BLOCK_SIZE)
+    root.mkdir(parents=True)
+    for i in range(count):
+        with open(root / f'large{i}.bin', 'wb') as f:
+            left = size
+            while left > 0:
+                n = min(left, BLOCK_SIZE)
+                f.write(block[:n])
+                left -= n
+    return root
+
+
+def make_deep(root: Path, depth: int, seed: int = 3) -> Path:
+    """Цепочка вложенных директорий с файлом на каждом уровне"""
+    rng = random.Random(seed)
+    cur = root
+    for level in range(depth):
+        cur = cur / f'level{level}'
+        cur.mkdir(parents=True)
+        (cur / 'note.txt').write_text(_line(rng) + '\n')
+    return root
+
+
+def make_wide(root: Path, width: int, seed: int = 4) -> Path:
+    """Одна директория с width пустыми и мелкими файлами"""
+    rng = random.Random(seed)
+    root.mkdir(parents=True)
+    for i in range(width):
+        path = root / f'w{i:06d}.txt'
+        if i % 2:
+            path.write_text(_line(rng))
+        else:
+            path.touch()
+    return root
+
+
+def make_trees(base: Path, scale: Scale) -> dict[str, Path]:
+    """Создаёт все деревья под base, если их там ещё нет"""
+    makers = {
+        'tiny': lambda p: make_tiny(p, scale.tiny_files, scale.tiny_per_dir),
+        'large': lambda p: make_large(p, scale.large_files, scale.large_size),
+        'deep': lambda p: make_deep(p, scale.depth),
+        'wide': lambda p: make_wide(p, scale.wide),
+    }
+    trees = {}
+    for name, make in makers.items():
+        path = base / name
+        done = base / f'.{name}.done'
+        if not done.exists():
+            make(path)
+            done.touch()
+        trees[name] = path
+    return trees
+
+
+def tree_digest(root: Path) -> list[tuple[str, int]]:
+    """Относительные пути и размеры файлов, для проверки воспроизводимости"""
+    out = []
+    for cur, _, files in os.walk(root):
+        for name in files:
+            p = Path(cur) / name
+            out.append((str(p.relative_to(root)), p.stat().st_size))
+    return sorted(out)
@@ -0,0 +1,50 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from entity.errors import CommandCancelledError
+
+
+class CancelToken:
+    """Запрос отмены выполняющейся команды (Ctrl-C, отмена asyncio-задачи).
+    Токен с parent отменён и вместе с ним: стадию конвейера останавливает
+    и свой читатель, и Ctrl-C всей строки"""
+
+    def __init__(self, parent: 'CancelToken | None' = None) -> None:
+        self._event = threading.Event()
+        self._parent = parent
+
+    def cancel(self) -> None:
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        if self._event.is_set():
+            return True
+        return self._parent is not None and self._parent.cancelled
+
+
+_current: ContextVar[CancelToken | None] = ContextVar('cancel_token', default=None)
+
+
+def current_token() -> CancelToken | None:
+    return _current.get()
+
+
+@contextmanager
+def cancel_scope(token: CancelToken) -> Iterator[CancelToken]:
+    """Команды внутри блока прерываются в checkpoint после token.cancel()"""
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        _current.reset(reset)
+
+
+def checkpoint() -> None:
+    """Безопасная точка команды: между файлами, а не посреди записи.
+    Выбрасывает CommandCancelledError, если текущую команду отменили"""
+    token = _current.get()
+    if token is not None and token.cancelled:
+        raise CommandCancelledError('Команда прервана')
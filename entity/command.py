@@ -1,6 +1,8 @@
-from typing import Protocol
+from dataclasses import dataclass
+from typing import Iterator, Protocol, runtime_checkable
 
 from entity.context import CommandContext
+from entity.record import Record
 
 
 class Command(Protocol):
@@ -17,3 +19,54 @@ class Command(Protocol):
     def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
         """Выполнение команды, выбрасывает DomainError при ошибке"""
         raise NotImplementedError
+
+
+@runtime_checkable
+class StreamCommand(Protocol):
+    def stream(
+        self,
+        args: list[str],
+        flags: list[str],
+        ctx: CommandContext,
+        stdin: Iterator[str] | None = None,
+    ) -> Iterator[str]:
+        """Потоковое выполнение команды, отдаёт строки вывода по мере готовности.
+        stdin - строки от предыдущей стадии конвейера"""
+        ...
+
+
+@runtime_checkable
+class RecordCommand(Protocol):
+    def records(
+        self,
+        args: list[str],
+        flags: list[str],
+        ctx: CommandContext,
+        stdin: Iterator[str] | None = None,
+    ) -> Iterator[Record]:
+        """Структурированный вывод для --json: те же данные, что у stream,
+        но без текстового оформления"""
+        ...
+
+
+@runtime_checkable
+class RawOutputCommand(Protocol):
+    def write_to(
+        self, args: list[str], flags: list[str], ctx: CommandContext, fd: int
+    ) -> None:
+        """Пишет вывод байтами прямо в файловый дескриптор, без декодирования текста"""
+        ...
+
+
+@runtime_checkable
+class LazyCommand(Protocol):
+    def load(self) -> Command:
+        """Возвращает настоящую команду, импортируя её модуль при первом вызове"""
+        ...
+
+
+@dataclass
+class Invocation:
+    name: str
+    args: list[str]
+    flags: list[str]
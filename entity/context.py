@@ -6,3 +6,5 @@ class CommandContext:
     pwd: str
     home: str
     user: str
+    # подтверждения (rm без -y) читают терминал; у демона и фоновых заданий его нет
+    interactive: bool = True
@@ -5,3 +5,11 @@ class CommandNotFoundError(DomainError): ...
 
 
 class ValidationError(DomainError): ...
+
+
+class CommandCancelledError(DomainError): ...
+
+
+class ExitRequestError(Exception):
+    """exit: завершить shell или скрипт. Не EOFError - конец ввода
+    посреди команды (например, у подтверждения) не считается выходом"""
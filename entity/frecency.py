@@ -0,0 +1,30 @@
+from dataclasses import dataclass
+
+HOUR = 3600.0
+DAY = 24 * HOUR
+WEEK = 7 * DAY
+# сумма рангов, после которой индекс стареет: ранги умножаются на AGING,
+# директории с рангом меньше 1 забываются
+MAX_TOTAL_RANK = 9000.0
+AGING = 0.9
+
+
+@dataclass
+class DirVisit:
+    """Директория в индексе z: число посещений с учётом старения и время последнего"""
+
+    path: str
+    rank: float
+    last: float
+
+
+def frecency(visit: DirVisit, now: float) -> float:
+    """Ранг, поправленный на давность последнего посещения, как в z.sh"""
+    age = now - visit.last
+    if age < HOUR:
+        return visit.rank * 4
+    if age < DAY:
+        return visit.rank * 2
+    if age < WEEK:
+        return visit.rank / 2
+    return visit.rank / 4
@@ -0,0 +1,94 @@
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Iterator
+
+# /proc/self/io: байты через read/write (включая кэш страниц) и число вызовов
+_PROC_IO = '/proc/self/io'
+_PROC_FIELDS = {
+    'rchar': 'read_bytes',
+    'wchar': 'write_bytes',
+    'syscr': 'read_calls',
+    'syscw': 'write_calls',
+}
+
+
+@dataclass
+class IOCounters:
+    """Ввод-вывод одной команды. Байты и вызовы read/write - разница
+    /proc/self/io на входе и выходе (счётчики процесса: параллельные
+    команды попадают в них тоже), остальное считают сами команды"""
+
+    read_bytes: int = 0
+    write_bytes: int = 0
+    read_calls: int = 0
+    write_calls: int = 0
+    files_opened: int = 0
+    dirs_walked: int = 0
+    stat_calls: int = 0
+    _lock: threading.Lock = field(
+        default_factory=threading.Lock, init=False, repr=False, compare=False
+    )
+
+    def add(self, name: str, n: int) -> None:
+        # стадии конвейера пишут в общий счётчик строки из разных потоков
+        with self._lock:
+            setattr(self, name, getattr(self, name) + n)
+
+    def add_proc(self, before: dict[str, int] | None) -> None:
+        """Добавляет разницу /proc/self/io с момента снимка before"""
+        after = read_proc_io()
+        if before is None or after is None:
+            return
+        for name, value in after.items():
+            self.add(name, value - before[name])
+
+
+_active: ContextVar[tuple[IOCounters, ...]] = ContextVar('io_counters', default=())
+
+
+def read_proc_io() -> dict[str, int] | None:
+    """Счётчики /proc/self/io, None там, где его нет (не Linux)"""
+    try:
+        with open(_PROC_IO, encoding='ascii') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return None
+    out = {}
+    for line in lines:
+        key, _, value = line.partition(':')
+        if key in _PROC_FIELDS:
+            out[_PROC_FIELDS[key]] = int(value)
+    return out
+
+
+@contextmanager
+def io_scope(counters: IOCounters) -> Iterator[IOCounters]:
+    """Команды внутри блока считают stat, open и обход директорий в counters.
+    Блоки вкладываются: счёт идёт во все открытые (строка shell и её команды).
+    /proc/self/io блок не читает, его разницу добавляет add_proc"""
+    reset = _active.set((*_active.get(), counters))
+    try:
+        yield counters
+    finally:
+        _active.reset(reset)
+
+
+def _count(name: str, n: int) -> None:
+    for counters in _active.get():
+        counters.add(name, n)
+
+
+def count_stat(n: int = 1) -> None:
+    """Команда сделала n вызовов stat/lstat (exists, is_dir, resolve...)"""
+    _count('stat_calls', n)
+
+
+def count_open(n: int = 1) -> None:
+    _count('files_opened', n)
+
+
+def count_dir(n: int = 1) -> None:
+    """Прочитано n директорий (шаг os.walk, scandir)"""
+    _count('dirs_walked', n)
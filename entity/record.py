@@ -0,0 +1,61 @@
+from dataclasses import dataclass
+from typing import ClassVar, Protocol
+
+
+class Record(Protocol):
+    """Структурированный результат команды. Текстом его оформляет сама
+    команда (stream), а в режиме --json он уходит как есть через to_dict"""
+
+    def to_dict(self) -> dict[str, object]: ...
+
+
+class _Fields:
+    kind: ClassVar[str]
+
+    def to_dict(self) -> dict[str, object]:
+        return {'type': self.kind, **vars(self)}
+
+
+@dataclass(frozen=True)
+class LsEntry(_Fields):
+    kind = 'ls'
+    name: str
+    path: str
+    is_dir: bool
+    size: int
+    mode: int
+    mtime: float
+
+
+@dataclass(frozen=True)
+class GrepMatch(_Fields):
+    kind = 'grep'
+    # None для строк из конвейера
+    path: str | None
+    line: int | None
+    text: str
+
+
+@dataclass(frozen=True)
+class Summary(_Fields):
+    """Итог изменяющей команды (cp, mv, rm): сколько объектов затронуто"""
+
+    kind = 'summary'
+    command: str
+    count: int
+
+
+@dataclass(frozen=True)
+class Error(_Fields):
+    """Ошибка команды в режиме --json"""
+
+    kind = 'error'
+    message: str
+
+
+@dataclass(frozen=True)
+class Text(_Fields):
+    """Строка вывода команды, у которой нет своих записей"""
+
+    kind = 'text'
+    text: str
@@ -1,5 +1,7 @@
 from dataclasses import dataclass
-from typing import Literal, Protocol, Sequence, runtime_checkable
+from typing import Literal, Protocol, runtime_checkable
+
+from entity.context import CommandContext
 
 
 @dataclass(frozen=True)
@@ -13,4 +15,14 @@ class UndoRecord:
 
 @runtime_checkable
 class UndoCommand(Protocol):
-    def undo(self) -> Sequence[UndoRecord]: ...
+    def execute_with_undo(
+        self,
+        args: list[str],
+        flags: list[str],
+        ctx: CommandContext,
+        undo: list[UndoRecord],
+    ) -> str:
+        """Выполнение с записью отмены в переданный список. Список свой у
+        каждого вызова, поэтому экземпляр команды можно звать из разных потоков.
+        При ошибке в списке остаются записи уже сделанных изменений"""
+        ...
@@ -1,79 +1,239 @@
+import argparse
 import getpass
-import logging
 import os
+import signal
+import sys
 from pathlib import Path
 
 from adapter.cli import CLIAdapter
-from entity.command import Command
+from adapter.client import default_socket_path
+from adapter.daemon import ShellServer
 from entity.context import CommandContext
-from repository.command.cat import Cat
-from repository.command.cd import Cd
-from repository.command.cp import Cp
-from repository.command.exit import Exit
-from repository.command.grep import Grep
-from repository.command.history import History
-from repository.command.ls import Ls
-from repository.command.mkdir import Mkdir
-from repository.command.mv import Mv
-from repository.command.pwd import Pwd
-from repository.command.rm import Rm
-from repository.command.tar import Tar
-from repository.command.undo import Undo
-from repository.command.untar import Untar
-from repository.command.unzip import Unzip
-from repository.command.whoami import WhoAmI
-from repository.command.zip import Zip
-from repository.history_file_repository import HistoryFileRepository
-from repository.undo_file_repository import UndoJsonRepository
+from repository.command.registry import build_commands
+from repository.dir_index_file_repository import DirIndexFileRepository
+from repository.history_file_repository import (
+    DEFAULT_SEGMENT_LINES,
+    HistoryFileRepository,
+)
+from repository.log_setup import (
+    DEFAULT_BACKUPS,
+    DEFAULT_MAX_BYTES,
+    setup_logging,
+    stop_logging,
+)
+from repository.metrics_exporter import MetricsExporter, register_trash_gauges
+from repository.undo_file_repository import UndoJournalRepository
+from usecase.jobs import JobManager
+from usecase.metrics import Metrics
 from usecase.shell import Shell
+from usecase.stats import LatencyStats
 
 ROOT_DIR = os.path.dirname(os.path.abspath(__file__))
+# период сброса метрик в файлы, секунды
+METRICS_INTERVAL = 15.0
 
 
-logging.basicConfig(
-    filename='shell.log',
-    level=logging.INFO,
-    format='[%(asctime)s] %(levelname)s: %(message)s',
-    datefmt='%Y-%m-%d %H:%M:%S',
-    encoding='utf-8',
-)
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Simple unix shell')
+    parser.add_argument(
+        '-c', dest='command', help='выполнить команды из строки и выйти'
+    )
+    parser.add_argument('script', nargs='?', help='файл со скриптом команд')
+    parser.add_argument(
+        '--json',
+        action='store_true',
+        help='вывод команд построчным JSON (ls, grep - записи с полями)',
+    )
+    parser.add_argument(
+        '--daemon',
+        nargs='?',
+        const=default_socket_path(),
+        metavar='SOCKET',
+        help='принимать команды через unix-сокет (клиент: python -m adapter.client)',
+    )
+    parser.add_argument(
+        '--metrics-dir',
+        default=ROOT_DIR,
+        help='куда писать unix_shell.prom (node exporter textfile) и metrics.json',
+    )
+    parser.add_argument(
+        '--history-flush',
+        type=int,
+        default=1,
+        metavar='N',
+        help='сбрасывать .history на диск каждые N команд, 0 - только при выходе',
+    )
+    parser.add_argument(
+        '--history-fsync',
+        action='store_true',
+        help='fsync .history после каждого сброса',
+    )
+    parser.add_argument(
+        '--history-segment-lines',
+        type=int,
+        default=DEFAULT_SEGMENT_LINES,
+        metavar='N',
+        help='сжимать .history в сегмент .gz каждые N записей, 0 - не сжимать',
+    )
+    parser.add_argument(
+        '--history-segment-bytes',
+        type=int,
+        default=0,
+        metavar='BYTES',
+        help='сжимать .history в сегмент по размеру, 0 - только по числу записей',
+    )
+    parser.add_argument(
+        '--history-keep',
+        type=int,
+        default=0,
+        metavar='N',
+        help='сколько сжатых сегментов истории хранить, 0 - все (по умолчанию)',
+    )
+    parser.add_argument(
+        '--history-keep-days',
+        type=float,
+        default=0,
+        metavar='DAYS',
+        help='удалять сегменты истории старше DAYS дней, 0 - не удалять',
+    )
+    parser.add_argument('--log-file', default='shell.log', help='файл лога операций')
+    parser.add_argument(
+        '--log-max-bytes',
+        type=int,
+        default=DEFAULT_MAX_BYTES,
+        help='размер, после которого лог сжимается в .gz и начинается заново',
+    )
+    parser.add_argument(
+        '--log-backups',
+        type=int,
+        default=DEFAULT_BACKUPS,
+        help='сколько сжатых логов хранить',
+    )
+    parser.add_argument(
+        '--log-rotate',
+        metavar='WHEN',
+        help='ротация по времени вместо размера: midnight, H, D, W0..W6',
+    )
+    return parser.parse_args(argv)
 
 
-def main() -> None:
-    undo_repo = UndoJsonRepository(os.path.join(ROOT_DIR, '.undo.json'))
-    history = HistoryFileRepository(os.path.join(ROOT_DIR, '.history'))
-    trash_dir = os.path.join(ROOT_DIR, '.trash')
-    list_cmds: list[Command] = [
-        Exit(),
-        Pwd(),
-        WhoAmI(),
-        Ls(),
-        Cd(),
-        Mv(),
-        Cp(),
-        Mkdir(),
-        Zip(),
-        Unzip(),
-        Tar(),
-        Untar(),
-        Rm(trash_dir),
-        Cat(),
-        Grep(),
-        Undo(undo_repo),
-        History(history),
-    ]
-    commands: dict[str, Command] = {cmd.name: cmd for cmd in list_cmds}
+def build_shell(
+    root_dir: str,
+    jobs: JobManager,
+    history: HistoryFileRepository | None = None,
+) -> Shell:
+    undo_repo = UndoJournalRepository(
+        os.path.join(root_dir, '.undo.jsonl'), os.path.join(root_dir, '.undo.json')
+    )
+    if history is None:
+        history = HistoryFileRepository(os.path.join(root_dir, '.history'))
+    dirs = DirIndexFileRepository(os.path.join(root_dir, '.z'))
+    trash_dir = os.path.join(root_dir, '.trash')
+    # модули команд импортируются при первом запуске, а не при старте
+    stats = LatencyStats()
+    metrics = Metrics()
+    register_trash_gauges(metrics, trash_dir)
+    commands = build_commands(
+        trash_dir,
+        undo_repo,
+        history,
+        dirs=dirs,
+        jobs=jobs,
+        stats=stats,
+        metrics=metrics,
+    )
     context = CommandContext(
         pwd=os.getcwd(),
         user=getpass.getuser(),
         home=str(Path.home()),
+        interactive=sys.stdin.isatty(),
     )
-    shell = Shell(
-        history=history, undo_repo=undo_repo, context=context, commands=commands
+    return Shell(
+        history=history,
+        undo_repo=undo_repo,
+        context=context,
+        commands=commands,
+        stats=stats,
+        metrics=metrics,
     )
-    cli = CLIAdapter(shell)
+
+
+def main(argv: list[str] | None = None) -> int:
+    opts = parse_args(argv)
+    # файл лога пишет фоновый поток, приглашение не ждёт диска
+    listener = setup_logging(
+        opts.log_file,
+        max_bytes=opts.log_max_bytes,
+        backups=opts.log_backups,
+        when=opts.log_rotate,
+    )
+    jobs = JobManager()
+    history = HistoryFileRepository(
+        os.path.join(ROOT_DIR, '.history'),
+        flush_every=opts.history_flush,
+        fsync=opts.history_fsync,
+        segment_lines=opts.history_segment_lines,
+        segment_bytes=opts.history_segment_bytes,
+        keep=opts.history_keep,
+        keep_days=opts.history_keep_days,
+    )
+    shell = build_shell(ROOT_DIR, jobs, history)
+    # метрики пишут только долгоживущие режимы: -c и скрипт со счётчиками
+    # с нуля затирали бы файлы REPL и демона
+    exporter = None
+    if opts.command is None and opts.script is None:
+        exporter = MetricsExporter(
+            shell.metrics,
+            shell.stats,
+            os.path.join(opts.metrics_dir, 'unix_shell.prom'),
+            os.path.join(opts.metrics_dir, 'metrics.json'),
+            METRICS_INTERVAL,
+        )
+        exporter.start()
+    try:
+        if opts.daemon is not None:
+            return serve(shell, opts.daemon)
+        return run(CLIAdapter(shell, jobs, json_output=opts.json), opts)
+    finally:
+        # фоновые задания дорабатывают до выхода из shell
+        jobs.shutdown()
+        shell.close()
+        if exporter is not None:
+            exporter.stop()
+        stop_logging(listener)
+
+
+def serve(shell: Shell, socket_path: str) -> int:
+    try:
+        server = ShellServer(socket_path, shell)
+    except OSError as e:
+        print(e)
+        return 2
+    # SIGTERM останавливает демон так же, как Ctrl-C: сокет удаляется
+    signal.signal(signal.SIGTERM, signal.default_int_handler)
+    print(f'Демон shell слушает {socket_path}. Остановка: Ctrl-C')
+    with server:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print('\nДемон остановлен')
+    return 0
+
+
+def run(cli: CLIAdapter, opts: argparse.Namespace) -> int:
+    # пакетный режим: все команды в одном процессе с общими репозиториями
+    if opts.command is not None:
+        return cli.run_script(opts.command.splitlines())
+    if opts.script is not None:
+        try:
+            with open(opts.script, encoding='utf-8') as f:
+                return cli.run_script(f)
+        except OSError as e:
+            print(f'Не удалось прочитать скрипт {opts.script}: {e.strerror}')
+            return 2
     cli.run()
+    return 0
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
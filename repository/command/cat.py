@@ -1,5 +1,10 @@
+import os
+from pathlib import Path
+from typing import Iterator
+
 from entity.context import CommandContext
 from entity.errors import DomainError, ValidationError
+from repository.command.io_utils import copy_fd
 from repository.command.path_utils import normalize
 
 
@@ -10,22 +15,45 @@ class Cat:
 
     @property
     def description(self) -> str:
-        return 'Выводит файлы: cat <path...>'
+        return 'Выводит файлы или вход конвейера: cat [path...]'
 
-    def _validate_args(self, args: list[str]) -> None:
-        if len(args) < 1:
+    def _validate_args(self, args: list[str], stdin: Iterator[str] | None) -> None:
+        if len(args) < 1 and stdin is None:
             raise ValidationError('cat требует как минимум один аргумента: cat -h')
 
-    def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
-        self._validate_args(args)
-
-        parts: list[str] = []
-        for x in args:
-            src = normalize(x, ctx)
+    def _iter_lines(self, paths: list[Path]) -> Iterator[str]:
+        for src in paths:
             if not src.is_file():
                 raise DomainError(f'{src} не файл')
             try:
-                parts.append(src.read_text(encoding='utf-8').strip())
+                with open(src, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        yield line.rstrip('\r\n')
             except UnicodeDecodeError:
                 raise DomainError(f'{src} файл не в кодировке utf-8')
-        return '\n'.join(parts)
+
+    def stream(
+        self,
+        args: list[str],
+        flags: list[str],
+        ctx: CommandContext,
+        stdin: Iterator[str] | None = None,
+    ) -> Iterator[str]:
+        self._validate_args(args, stdin)
+        if not args and stdin is not None:
+            return stdin
+        return self._iter_lines([normalize(x, ctx) for x in args])
+
+    def write_to(
+        self, args: list[str], flags: list[str], ctx: CommandContext, fd: int
+    ) -> None:
+        # байты файлов копируются как есть, без декодирования и разбиения на строки
+        self._validate_args(args, None)
+        for src in [normalize(x, ctx) for x in args]:
+            if not src.is_file():
+                raise DomainError(f'{src} не файл')
+            with open(src, 'rb') as f:
+                copy_fd(f.fileno(), fd, os.fstat(f.fileno()).st_size)
+
+    def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
+        return '\n'.join(self.stream(args, flags, ctx))
@@ -1,9 +1,13 @@
 from entity.context import CommandContext
 from entity.errors import ValidationError
 from repository.command.path_utils import normalize
+from usecase.interface import DirIndexRepository
 
 
 class Cd:
+    def __init__(self, dirs: DirIndexRepository | None = None) -> None:
+        self._dirs = dirs
+
     @property
     def name(self) -> str:
         return 'cd'
@@ -23,4 +27,7 @@ class Cd:
         if not path.is_dir():
             raise ValidationError(f'Это не директория {target}')
         ctx.pwd = str(path)
+        # домашняя директория доступна по cd без аргументов, в индекс z не идёт
+        if self._dirs is not None and ctx.pwd != ctx.home:
+            self._dirs.visit(ctx.pwd)
         return ''
@@ -3,15 +3,20 @@ import shutil
 import tempfile
 from pathlib import Path
 
+from entity.cancel import checkpoint
 from entity.context import CommandContext
 from entity.errors import ValidationError
+from entity.iostat import count_dir, count_open, count_stat
 from entity.undo import UndoRecord
-from repository.command.path_utils import normalize
+from repository.command.path_utils import exists, is_dir, is_file, normalize
+from usecase.metrics import BYTES_TOTAL, FILES_TOTAL, Metrics
 
 
 class Cp:
-    def __init__(self) -> None:
-        self._undo_records: list[UndoRecord] = []
+    def __init__(self, metrics: Metrics | None = None) -> None:
+        metrics = metrics if metrics is not None else Metrics()
+        self._files = metrics.counter(FILES_TOTAL, op='copy')
+        self._bytes = metrics.counter(BYTES_TOTAL, op='copy')
 
     @property
     def name(self) -> str:
@@ -21,9 +26,6 @@ class Cp:
     def description(self) -> str:
         return 'Копирует файлы и директории (директории только с -r): cp [-r] <source...> <dest>'
 
-    def undo(self) -> list[UndoRecord]:
-        return self._undo_records.copy()
-
     def _validate_args(self, args: list[str]) -> None:
         if len(args) < 2:
             raise ValidationError('cp требует как минимум два аргумента: cp -h')
@@ -36,8 +38,10 @@ class Cp:
         path.unlink()
         return str(backup_path)
 
-    def _record_undo(self, src: Path, dst: Path, backup: str | None) -> None:
-        self._undo_records.append(
+    def _record_undo(
+        self, undo: list[UndoRecord], src: Path, dst: Path, backup: str | None
+    ) -> None:
+        undo.append(
             UndoRecord(
                 action='cp',
                 src=str(src),
@@ -47,34 +51,44 @@ class Cp:
             )
         )
 
-    def _copy_file(self, src: Path, dst: Path) -> None:
+    def _copy(self, src: Path, dst: Path) -> None:
+        shutil.copy2(str(src), str(dst))
+        count_open(2)
+        count_stat()
+        self._files.inc()
+        self._bytes.inc(os.stat(dst).st_size)
+
+    def _copy_file(self, src: Path, dst: Path, undo: list[UndoRecord]) -> None:
         # проверка родительской директории
-        if not dst.parent.exists() or not dst.parent.is_dir():
+        if not exists(dst.parent) or not is_dir(dst.parent):
             raise ValidationError(
                 f'Родительская директория не существует: {dst.parent}'
             )
 
-        if dst.exists() and dst.is_dir():
+        if exists(dst) and is_dir(dst):
             raise ValidationError(f'Нельзя перезаписать директорию файлом: {dst}')
 
         # backup если цель существует
         backup = None
-        if dst.is_file():
+        if is_file(dst):
             backup = self._create_backup(dst)
 
-        shutil.copy2(str(src), str(dst))
-        self._record_undo(src, dst, backup)
+        self._copy(src, dst)
+        self._record_undo(undo, src, dst, backup)
 
     def _is_recursive(self, flags: list[str]) -> bool:
         return ('-r' in flags) or ('-R' in flags) or ('--recursive' in flags)
 
-    def _copy_dir(self, src: Path, dst: Path, merge_content: bool) -> None:
+    def _copy_dir(
+        self, src: Path, dst: Path, merge_content: bool, undo: list[UndoRecord]
+    ) -> None:
         # определение корневой директории назначения
         root_dst = dst if merge_content else (dst / src.name)
         root_dst.mkdir(parents=True, exist_ok=True)
 
         # обход всех файлов в src
         for cur_root, dirs, files in os.walk(src):
+            count_dir()
             cur_root_path = Path(cur_root)
             rel_path = cur_root_path.relative_to(src)
 
@@ -84,28 +98,39 @@ class Cp:
 
             # создание поддиректорий
             for dir_name in dirs:
+                checkpoint()
                 (target_dir / dir_name).mkdir(parents=True, exist_ok=True)
 
             # копирование файлов
             for file_name in files:
+                # отмена между файлами: скопированное остаётся в undo
+                checkpoint()
                 src_file = cur_root_path / file_name
                 dst_file = target_dir / file_name
 
-                if dst_file.exists() and dst_file.is_dir():
+                if exists(dst_file) and is_dir(dst_file):
                     raise ValidationError(
                         f'Конфликт типов: в цели директория а копируется файл: {dst_file}'
                     )
 
                 # backup если файл существует
                 backup = None
-                if dst_file.is_file():
+                if is_file(dst_file):
                     backup = self._create_backup(dst_file)
 
-                shutil.copy2(str(src_file), str(dst_file))
-                self._record_undo(src_file, dst_file, backup)
+                self._copy(src_file, dst_file)
+                self._record_undo(undo, src_file, dst_file, backup)
 
     def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
-        self._undo_records.clear()
+        return self.execute_with_undo(args, flags, ctx, [])
+
+    def execute_with_undo(
+        self,
+        args: list[str],
+        flags: list[str],
+        ctx: CommandContext,
+        undo: list[UndoRecord],
+    ) -> str:
         self._validate_args(args)
 
         *srcs, dst = args
@@ -113,28 +138,29 @@ class Cp:
         recursive = self._is_recursive(flags)
 
         # проверка множественного копирования
-        if len(srcs) > 1 and not dst_path.is_dir():
+        if len(srcs) > 1 and not is_dir(dst_path):
             raise ValidationError(
                 'Если копируется несколько объектов последний аргумент должен быть директорией'
             )
 
         for src_arg in srcs:
+            checkpoint()
             # обработка шаблона dir/*
             is_content_mode = Path(src_arg).name == '*'
             src_base = str(Path(src_arg).parent) if is_content_mode else src_arg
             src_path = normalize(src_base, ctx)
 
-            if not src_path.exists():
+            if not exists(src_path):
                 raise ValidationError(f'Источник не найден: {src_arg}')
 
             # копирование файла
-            if src_path.is_file():
+            if is_file(src_path):
                 target = (
                     (dst_path / src_path.name)
-                    if (len(srcs) > 1 or dst_path.is_dir())
+                    if (len(srcs) > 1 or is_dir(dst_path))
                     else dst_path
                 )
-                self._copy_file(src_path, target)
+                self._copy_file(src_path, target, undo)
                 continue
 
             # копирование директории требует флаг -r
@@ -142,18 +168,18 @@ class Cp:
                 raise ValidationError('Для копирования директории нужен флаг -r')
 
             # нельзя перезаписать файл директорией
-            if dst_path.is_file():
+            if is_file(dst_path):
                 raise ValidationError('Нельзя перезаписать файл директорией')
 
-            if dst_path.is_dir():
+            if is_dir(dst_path):
                 # копирование в существующую директорию
-                self._copy_dir(src_path, dst_path, is_content_mode)
+                self._copy_dir(src_path, dst_path, is_content_mode, undo)
             else:
                 # создание новой директории
                 if len(srcs) > 1:
                     raise ValidationError(
                         'Цель должна существовать при копировании нескольких источников'
                     )
-                self._copy_dir(src_path, dst_path, merge_content=True)
+                self._copy_dir(src_path, dst_path, True, undo)
 
-        return f'cp: скопировано {len(self._undo_records)} объектов'
+        return f'cp: скопировано {len(undo)} объектов'
@@ -1,4 +1,5 @@
 from entity.context import CommandContext
+from entity.errors import ExitRequestError
 
 
 class Exit:
@@ -11,4 +12,4 @@ class Exit:
         return 'Выйти из интерактивной оболочки'
 
     def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
-        raise EOFError
+        raise ExitRequestError
@@ -0,0 +1,28 @@
+from entity.context import CommandContext
+from entity.errors import ValidationError
+from repository.command.wait import parse_job_id
+from usecase.jobs import JobManager, current_jobs
+
+
+class Fg:
+    def __init__(self, jobs: JobManager) -> None:
+        self._jobs = jobs
+
+    @property
+    def name(self) -> str:
+        return 'fg'
+
+    @property
+    def description(self) -> str:
+        return 'Ждёт фоновое задание (по умолчанию последнее) и выводит его результат: fg [id]'
+
+    def _validate_args(self, args: list[str]) -> None:
+        if len(args) > 1:
+            raise ValidationError('fg принимает не больше одного аргумента: fg -h')
+
+    def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
+        self._validate_args(args)
+        jobs = current_jobs(self._jobs)
+        job = jobs.get(parse_job_id(args[0]) if args else None)
+        # ошибка задания выводится так же, как у обычной команды
+        return jobs.wait(job)
@@ -3,9 +3,12 @@ import re
 from pathlib import Path
 from typing import Iterator
 
+from entity.cancel import checkpoint
 from entity.context import CommandContext
 from entity.errors import ValidationError
-from repository.command.path_utils import normalize
+from entity.iostat import count_dir, count_open
+from entity.record import GrepMatch
+from repository.command.path_utils import is_dir, is_file, normalize
 
 
 class Grep:
@@ -15,10 +18,10 @@ class Grep:
 
     @property
     def description(self) -> str:
-        return 'Поиск строк по шаблону: grep [-r] [-i] <pattern> <path...>'
+        return 'Поиск строк по шаблону: grep [-r] [-i] <pattern> [path...]'
 
-    def _validate_args(self, args: list[str]) -> None:
-        if len(args) < 2:
+    def _validate_args(self, args: list[str], stdin: Iterator[str] | None) -> None:
+        if len(args) < (1 if stdin is not None else 2):
             raise ValidationError('grep требует минимум два аргумента: grep -h')
 
     def _is_recursive(self, flags: list[str]) -> bool:
@@ -29,21 +32,77 @@ class Grep:
 
     def _iter_files(self, paths: list[Path], recursive: bool) -> Iterator[Path]:
         for p in paths:
-            if p.is_file():
+            checkpoint()
+            if is_file(p):
                 yield p
                 continue
-            if p.is_dir():
+            if is_dir(p):
                 if not recursive:
                     raise ValidationError(f'Для обхода директории нужен флаг -r: {p}')
                 for root, _, names in os.walk(p):
+                    count_dir()
                     root_path = Path(root)
                     for n in names:
+                        checkpoint()
                         yield root_path / n
                 continue
             raise ValidationError(f'Путь не найден: {p}')
 
-    def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
-        self._validate_args(args)
+    def _iter_matches(
+        self, files: Iterator[Path], regex: re.Pattern
+    ) -> Iterator[tuple[Path | None, int, str]]:
+        for file_path in files:
+            try:
+                count_open()
+                with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
+                    for idx, line in enumerate(f, start=1):
+                        if regex.search(line):
+                            yield file_path, idx, line.rstrip()
+            except (OSError, UnicodeError):
+                continue
+
+    def _iter_stdin(
+        self, stdin: Iterator[str], regex: re.Pattern
+    ) -> Iterator[tuple[Path | None, int, str]]:
+        # у строк конвейера нет файла и номера, они выводятся как есть
+        for line in stdin:
+            if regex.search(line):
+                yield None, 0, line
+
+    def stream(
+        self,
+        args: list[str],
+        flags: list[str],
+        ctx: CommandContext,
+        stdin: Iterator[str] | None = None,
+    ) -> Iterator[str]:
+        return (
+            text if path is None else f'{path}:{idx}:{text}'
+            for path, idx, text in self._search(args, flags, ctx, stdin)
+        )
+
+    def records(
+        self,
+        args: list[str],
+        flags: list[str],
+        ctx: CommandContext,
+        stdin: Iterator[str] | None = None,
+    ) -> Iterator[GrepMatch]:
+        return (
+            GrepMatch(None, None, text)
+            if path is None
+            else GrepMatch(str(path), idx, text)
+            for path, idx, text in self._search(args, flags, ctx, stdin)
+        )
+
+    def _search(
+        self,
+        args: list[str],
+        flags: list[str],
+        ctx: CommandContext,
+        stdin: Iterator[str] | None,
+    ) -> Iterator[tuple[Path | None, int, str]]:
+        self._validate_args(args, stdin)
 
         recursive = self._is_recursive(flags)
         ignore_case = self._is_case_insensitive(flags)
@@ -54,16 +113,10 @@ class Grep:
         re_flags = re.IGNORECASE if ignore_case else 0
         regex = re.compile(pattern, re_flags)
 
-        files = self._iter_files(paths, recursive)
-        lines_out: list[str] = []
-
-        for file_path in files:
-            try:
-                with open(file_path, 'r', encoding='utf-8', errors='replace') as f:
-                    for idx, line in enumerate(f, start=1):
-                        if regex.search(line):
-                            lines_out.append(f'{file_path}:{idx}:{line.rstrip()}')
-            except (OSError, UnicodeError):
-                continue
+        # без путей читается вход конвейера
+        if not paths and stdin is not None:
+            return self._iter_stdin(stdin, regex)
+        return self._iter_matches(self._iter_files(paths, recursive), regex)
 
-        return '\n'.join(lines_out)
+    def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
+        return '\n'.join(self.stream(args, flags, ctx))
@@ -0,0 +1,54 @@
+from itertools import islice
+from pathlib import Path
+from typing import Iterator
+
+from entity.context import CommandContext
+from entity.errors import DomainError, ValidationError
+from repository.command.path_utils import normalize
+
+DEFAULT_LINES = 10
+
+
+class Head:
+    @property
+    def name(self) -> str:
+        return 'head'
+
+    @property
+    def description(self) -> str:
+        return 'Выводит первые n строк файлов или входа конвейера: head [n] [path...]'
+
+    def _parse_args(self, args: list[str]) -> tuple[int, list[str]]:
+        # первый числовой аргумент - количество строк
+        if args and args[0].isdigit():
+            return int(args[0]), args[1:]
+        return DEFAULT_LINES, args
+
+    def _iter_lines(self, paths: list[Path]) -> Iterator[str]:
+        for src in paths:
+            if not src.is_file():
+                raise DomainError(f'{src} не файл')
+            with open(src, 'r', encoding='utf-8', errors='replace') as f:
+                for line in f:
+                    yield line.rstrip('\r\n')
+
+    def stream(
+        self,
+        args: list[str],
+        flags: list[str],
+        ctx: CommandContext,
+        stdin: Iterator[str] | None = None,
+    ) -> Iterator[str]:
+        n, raw_paths = self._parse_args(args)
+        if raw_paths:
+            source = self._iter_lines([normalize(x, ctx) for x in raw_paths])
+        elif stdin is not None:
+            source = stdin
+        else:
+            raise ValidationError('head требует путь или вход конвейера: head -h')
+
+        # после n строк чтение прекращается, конвейер останавливает источник
+        return islice(source, n)
+
+    def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
+        return '\n'.join(self.stream(args, flags, ctx))
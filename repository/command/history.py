@@ -1,7 +1,13 @@
+import re
+from typing import Iterator
+
 from entity.context import CommandContext
 from entity.errors import ValidationError
 from usecase.interface import HistoryRepository
 
+# записей на странице history -p и в одном чтении полного списка
+PAGE_SIZE = 100
+
 
 class History:
     def __init__(self, history_repo: HistoryRepository) -> None:
@@ -13,17 +19,59 @@ class History:
 
     @property
     def description(self) -> str:
-        return 'Выводит последние n коммнад, history <n>'
+        return 'Выводит историю команд: history [n | from-to | -p page | -s text | -e regex]'
 
     def _validate_args(self, args: list[str]) -> None:
         if len(args) > 1:
             raise ValidationError('history принимает ровно один аргумент: history -h')
 
-    def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
+    def _number(self, raw: str) -> int:
+        if not raw.isdigit():
+            raise ValidationError('аргумент должен быть числом')
+        return int(raw)
+
+    def _bounds(self, args: list[str], flags: list[str]) -> tuple[int, int]:
+        """Номера первой и последней записи для вывода"""
+        count = self._history_repo.count()
+        if '-p' in flags:
+            # страница 1 - последние PAGE_SIZE команд, дальше всё старше
+            page = self._number(args[0]) if args else 1
+            end = count - (page - 1) * PAGE_SIZE
+            return end - PAGE_SIZE + 1, end
+        if not args:
+            return 1, count
+        first, sep, last = args[0].partition('-')
+        if sep:
+            return self._number(first), self._number(last)
+        return count - self._number(first) + 1, count
+
+    def stream(
+        self,
+        args: list[str],
+        flags: list[str],
+        ctx: CommandContext,
+        stdin: Iterator[str] | None = None,
+    ) -> Iterator[str]:
+        if '-s' in flags or '-e' in flags:
+            return iter(self._search(args, regex='-e' in flags))
+        # аргументы проверяются сразу, а не при первом чтении вывода
         self._validate_args(args)
-        if len(args) == 0:
-            return '\n'.join(self._history_repo.all())
+        return self._pages(*self._bounds(args, flags))
 
-        if not args[0].isdigit():
-            raise ValidationError('аргумент должен быть числом')
-        return '\n'.join(self._history_repo.last(int(args[0])))
+    def _search(self, args: list[str], regex: bool) -> list[str]:
+        """Найденные команды, новые первыми, не больше страницы"""
+        if not args:
+            raise ValidationError('history -s требует строку поиска: history -h')
+        try:
+            found = self._history_repo.search(' '.join(args), regex, PAGE_SIZE)
+        except re.error as e:
+            raise ValidationError(f'Некорректное регулярное выражение: {e}') from e
+        return [f'{n} {cmd}' for n, cmd in found]
+
+    def _pages(self, start: int, end: int) -> Iterator[str]:
+        # по странице за чтение: history | head не читает весь файл
+        for page in range(max(start, 1), end + 1, PAGE_SIZE):
+            yield from self._history_repo.entries(page, min(page + PAGE_SIZE - 1, end))
+
+    def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
+        return '\n'.join(self.stream(args, flags, ctx))
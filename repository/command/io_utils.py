@@ -0,0 +1,53 @@
+import errno
+import os
+from typing import Callable
+
+# сколько байт передаётся за один системный вызов
+CHUNK_SIZE = 1 << 24
+
+# ядро или файловая система не поддерживают вызов для этой пары файлов
+_UNSUPPORTED = {errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP, errno.EBADF}
+
+
+def _copy_file_range(src: int, dst: int, count: int) -> int:
+    return os.copy_file_range(src, dst, count)
+
+
+def _sendfile(src: int, dst: int, count: int) -> int:
+    return os.sendfile(dst, src, None, count)
+
+
+def _kernel_copies() -> list[Callable[[int, int, int], int]]:
+    copies: list[Callable[[int, int, int], int]] = []
+    if hasattr(os, 'copy_file_range'):
+        copies.append(_copy_file_range)
+    if hasattr(os, 'sendfile'):
+        copies.append(_sendfile)
+    return copies
+
+
+def copy_fd(src: int, dst: int, count: int) -> int:
+    """Копирует до count байт с текущих позиций src в dst.
+    Сначала внутри ядра (copy_file_range, sendfile), затем через буфер"""
+    remaining = count
+    for copy in _kernel_copies():
+        try:
+            while remaining > 0:
+                n = copy(src, dst, min(remaining, CHUNK_SIZE))
+                if n == 0:
+                    return count - remaining
+                remaining -= n
+            return count
+        except OSError as e:
+            if e.errno not in _UNSUPPORTED:
+                raise
+
+    while remaining > 0:
+        chunk = os.read(src, min(remaining, 1 << 20))
+        if not chunk:
+            break
+        view = memoryview(chunk)
+        while view:
+            view = view[os.write(dst, view) :]
+        remaining -= len(chunk)
+    return count - remaining
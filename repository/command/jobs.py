@@ -0,0 +1,28 @@
+from entity.context import CommandContext
+from usecase.jobs import Job, JobManager, current_jobs
+
+
+def format_job(job: Job) -> str:
+    if not job.done:
+        state = 'выполняется'
+    elif job.future.exception() is not None:
+        state = 'ошибка'
+    else:
+        state = 'завершено'
+    return f'[{job.id}] {state} {job.elapsed:.1f}s {job.line}'
+
+
+class Jobs:
+    def __init__(self, jobs: JobManager) -> None:
+        self._jobs = jobs
+
+    @property
+    def name(self) -> str:
+        return 'jobs'
+
+    @property
+    def description(self) -> str:
+        return 'Показывает фоновые задания и время их выполнения'
+
+    def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
+        return '\n'.join(format_job(job) for job in current_jobs(self._jobs).all())
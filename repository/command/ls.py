@@ -2,9 +2,12 @@ import os
 import stat
 from datetime import datetime
 from pathlib import Path
+from typing import Iterator
 
+from entity.cancel import checkpoint
 from entity.context import CommandContext
 from entity.errors import DomainError
+from entity.record import LsEntry
 from repository.command.path_utils import normalize
 
 
@@ -17,44 +20,80 @@ class Ls:
     def description(self) -> str:
         return 'Показывает объекты в директории, ls [-l] <path...>'
 
-    def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
-        if not args:
-            args = ['.']
-
-        long = '-l' in flags
-        lines: list[str] = []
-
-        for x in args:
-            path = normalize(x, ctx)
+    def _check(self, paths: list[Path]) -> None:
+        for path in paths:
             if not (path.is_dir() or path.is_file()):
                 raise DomainError(f'{path} не существует')
 
-            if path.is_dir():
-                for name in os.listdir(path):
-                    full = path / name
-                    lines.append(self._format_entry(full, long))
-                if len(args) > 1:
-                    lines.append('')
-                continue
+    def _entries(self, path: Path, detailed: bool) -> Iterator[LsEntry]:
+        """Содержимое директории или сам файл. Без detailed stat не делается,
+        тип берётся из scandir"""
+        if not path.is_dir():
+            yield self._entry(path.name, str(path), False, detailed)
+            return
+        with os.scandir(path) as it:
+            for e in it:
+                checkpoint()
+                yield self._entry(e.name, e.path, e.is_dir(), detailed, e)
+
+    def _entry(
+        self,
+        name: str,
+        path: str,
+        is_dir: bool,
+        detailed: bool,
+        entry: os.DirEntry | None = None,
+    ) -> LsEntry:
+        if not detailed:
+            return LsEntry(name, path, is_dir, 0, 0, 0.0)
+        st = entry.stat() if entry is not None else os.stat(path)
+        return LsEntry(name, path, is_dir, st.st_size, st.st_mode, st.st_mtime)
 
-            if path.is_file():
-                lines.append(self._format_entry(path, long))
-                continue
+    def _iter_entries(self, paths: list[Path], long: bool) -> Iterator[str]:
+        # пустая строка разделяет группы и выводится только перед следующей
+        pending_sep = False
+        for path in paths:
+            if pending_sep:
+                yield ''
+                pending_sep = False
+            for entry in self._entries(path, long):
+                yield self._format_entry(entry, long)
+            pending_sep = len(paths) > 1 and path.is_dir()
 
-        if len(lines) > 0 and lines[-1] == '':
-            lines.pop()
+    def _paths(self, args: list[str], ctx: CommandContext) -> list[Path]:
+        paths = [normalize(x, ctx) for x in args or ['.']]
+        self._check(paths)
+        return paths
 
-        return '\n'.join(lines)
+    def stream(
+        self,
+        args: list[str],
+        flags: list[str],
+        ctx: CommandContext,
+        stdin: Iterator[str] | None = None,
+    ) -> Iterator[str]:
+        return self._iter_entries(self._paths(args, ctx), '-l' in flags)
+
+    def records(
+        self,
+        args: list[str],
+        flags: list[str],
+        ctx: CommandContext,
+        stdin: Iterator[str] | None = None,
+    ) -> Iterator[LsEntry]:
+        # записям всегда нужны размер, права и время изменения
+        paths = self._paths(args, ctx)
+        return (e for path in paths for e in self._entries(path, True))
+
+    def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
+        return '\n'.join(self.stream(args, flags, ctx))
 
-    def _format_entry(self, path: Path, long: bool) -> str:
-        name = path.name
-        name += '/' if path.is_dir() else ''
+    def _format_entry(self, entry: LsEntry, long: bool) -> str:
+        name = entry.name + ('/' if entry.is_dir else '')
         if not long:
             return name
 
-        st = path.stat()
-        perm = stat.filemode(st.st_mode)
-        size = st.st_size
-        when = datetime.fromtimestamp(st.st_mtime).strftime('%Y-%m-%d %H:%M')
+        perm = stat.filemode(entry.mode)
+        when = datetime.fromtimestamp(entry.mtime).strftime('%Y-%m-%d %H:%M')
 
-        return f'{perm} {size:>10} {when} {name}'
+        return f'{perm} {entry.size:>10} {when} {name}'
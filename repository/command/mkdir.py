@@ -7,9 +7,6 @@ from repository.command.path_utils import normalize
 
 
 class Mkdir:
-    def __init__(self) -> None:
-        self._undo_records: list[UndoRecord] = []
-
     @property
     def name(self) -> str:
         return 'mkdir'
@@ -18,9 +15,6 @@ class Mkdir:
     def description(self) -> str:
         return 'Создаёт директорию: mkdir [-p] <path...>'
 
-    def undo(self) -> list[UndoRecord]:
-        return self._undo_records.copy()
-
     def _validate_args(self, args: list[str]) -> None:
         if len(args) < 1:
             raise ValidationError('mkdir требует как минимум один аргумент: mkdir -h')
@@ -41,8 +35,8 @@ class Mkdir:
 
         return list(reversed(missing))
 
-    def _record_undo(self, path: Path) -> None:
-        self._undo_records.append(
+    def _record_undo(self, undo: list[UndoRecord], path: Path) -> None:
+        undo.append(
             UndoRecord(
                 action='cp',
                 src=str(path),
@@ -53,7 +47,15 @@ class Mkdir:
         )
 
     def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
-        self._undo_records.clear()
+        return self.execute_with_undo(args, flags, ctx, [])
+
+    def execute_with_undo(
+        self,
+        args: list[str],
+        flags: list[str],
+        ctx: CommandContext,
+        undo: list[UndoRecord],
+    ) -> str:
         self._validate_args(args)
 
         allow_parents = self._has_parents_flag(flags)
@@ -82,7 +84,7 @@ class Mkdir:
             path.mkdir(parents=allow_parents, exist_ok=False)
 
             for created_path in missing:
-                self._record_undo(created_path)
+                self._record_undo(undo, created_path)
                 created_count += 1
 
         return f'mkdir: создано {created_count} директорий'
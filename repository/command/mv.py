@@ -6,11 +6,14 @@ from entity.context import CommandContext
 from entity.errors import ValidationError
 from entity.undo import UndoRecord
 from repository.command.path_utils import normalize
+from usecase.metrics import BYTES_TOTAL, FILES_TOTAL, Metrics
 
 
 class Mv:
-    def __init__(self) -> None:
-        self._undo_records: list[UndoRecord] = []
+    def __init__(self, metrics: Metrics | None = None) -> None:
+        metrics = metrics if metrics is not None else Metrics()
+        self._files = metrics.counter(FILES_TOTAL, op='move')
+        self._bytes = metrics.counter(BYTES_TOTAL, op='move')
 
     @property
     def name(self) -> str:
@@ -20,9 +23,6 @@ class Mv:
     def description(self) -> str:
         return 'Перемещает файл или директорию, mv <source...> <dest>'
 
-    def undo(self) -> list[UndoRecord]:
-        return self._undo_records.copy()
-
     def _validate_args(self, args: list[str]) -> None:
         if len(args) < 2:
             raise ValidationError('mv требует как минимум два аргумента: mv -h')
@@ -66,7 +66,10 @@ class Mv:
             overwrite = True
             backup = self._create_backup(dst, is_dir=False)
 
+        size = src.stat().st_size
         final = shutil.move(str(src), str(dst))
+        self._files.inc()
+        self._bytes.inc(size)
         return final, overwrite, backup
 
     def _move_dir(self, src: Path, dst: Path) -> tuple[str, bool, str | None]:
@@ -85,6 +88,8 @@ class Mv:
             backup = self._create_backup(dst, is_dir=True)
 
         final = shutil.move(str(src), str(dst))
+        # директория учитывается одним объектом: обходить её ради размера дорого
+        self._files.inc()
         return final, overwrite, backup
 
     def _move_single(
@@ -108,7 +113,15 @@ class Mv:
             return self._move_file(src, target)
 
     def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
-        self._undo_records.clear()
+        return self.execute_with_undo(args, flags, ctx, [])
+
+    def execute_with_undo(
+        self,
+        args: list[str],
+        flags: list[str],
+        ctx: CommandContext,
+        undo: list[UndoRecord],
+    ) -> str:
         self._validate_args(args)
 
         *srcs, dst = args
@@ -126,7 +139,7 @@ class Mv:
 
             final_dst, overwrite, backup = self._move_single(src_path, dst_path, multi)
 
-            self._undo_records.append(
+            undo.append(
                 UndoRecord(
                     action='mv',
                     src=str(src_path),
@@ -1,6 +1,7 @@
 from pathlib import Path
 
 from entity.context import CommandContext
+from entity.iostat import count_stat
 
 
 def expand_user_with_ctx(raw: str, ctx: CommandContext) -> str:
@@ -17,4 +18,24 @@ def normalize(raw: str, ctx: CommandContext) -> Path:
     p = Path(expanded)
     if not p.is_absolute():
         p = Path(ctx.pwd) / p
+    # realpath делает lstat на каждый компонент пути
+    count_stat(len(p.parts) - 1)
     return p.resolve(strict=False)
+
+
+# проверки пути в циклах обхода, каждая - отдельный stat, который виден в time -v
+
+
+def exists(p: Path) -> bool:
+    count_stat()
+    return p.exists()
+
+
+def is_dir(p: Path) -> bool:
+    count_stat()
+    return p.is_dir()
+
+
+def is_file(p: Path) -> bool:
+    count_stat()
+    return p.is_file()
@@ -0,0 +1,185 @@
+import importlib
+import threading
+from pathlib import Path
+
+from entity.command import Command
+from entity.context import CommandContext
+from usecase.interface import DirIndexRepository, HistoryRepository, UndoRepository
+from usecase.jobs import JobManager
+from usecase.metrics import Metrics
+from usecase.stats import LatencyStats
+
+
+class CommandSpec:
+    """Метаданные команды: имя и справка доступны без импорта её модуля"""
+
+    def __init__(self, name: str, description: str, target: str, *deps: object):
+        self._name = name
+        self._description = description
+        # путь вида 'package.module:Class'
+        self._target = target
+        self._deps = deps
+        self._cmd: Command | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def name(self) -> str:
+        return self._name
+
+    @property
+    def description(self) -> str:
+        return self._description
+
+    @property
+    def loaded(self) -> bool:
+        return self._cmd is not None
+
+    def load(self) -> Command:
+        if self._cmd is None:
+            with self._lock:
+                if self._cmd is None:
+                    module_name, attr = self._target.split(':')
+                    cls = getattr(importlib.import_module(module_name), attr)
+                    self._cmd = cls(*self._deps)
+        return self._cmd
+
+    def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
+        return self.load().execute(args, flags, ctx)
+
+
+def build_commands(
+    trash_dir: str | Path,
+    undo_repo: UndoRepository,
+    history: HistoryRepository,
+    *,
+    dirs: DirIndexRepository,
+    jobs: JobManager,
+    stats: LatencyStats,
+    metrics: Metrics,
+) -> dict[str, Command]:
+    """Реестр встроенных команд, модули импортируются при первом запуске"""
+    specs = [
+        CommandSpec(
+            'exit', 'Выйти из интерактивной оболочки', 'repository.command.exit:Exit'
+        ),
+        CommandSpec(
+            'pwd', 'Отображать текущую рабочую директорию', 'repository.command.pwd:Pwd'
+        ),
+        CommandSpec(
+            'whoami',
+            'Отображать действующий идентификатор пользователя',
+            'repository.command.whoami:WhoAmI',
+        ),
+        CommandSpec(
+            'ls',
+            'Показывает объекты в директории, ls [-l] <path...>',
+            'repository.command.ls:Ls',
+        ),
+        CommandSpec(
+            'cd', 'Меняет директорию, cd <path>', 'repository.command.cd:Cd', dirs
+        ),
+        CommandSpec(
+            'z',
+            'Переходит в частую и недавнюю директорию по фрагментам пути: z [-l] <fragment...>',
+            'repository.command.z:Z',
+            dirs,
+        ),
+        CommandSpec(
+            'mv',
+            'Перемещает файл или директорию, mv <source...> <dest>',
+            'repository.command.mv:Mv',
+            metrics,
+        ),
+        CommandSpec(
+            'cp',
+            'Копирует файлы и директории (директории только с -r): cp [-r] <source...> <dest>',
+            'repository.command.cp:Cp',
+            metrics,
+        ),
+        CommandSpec(
+            'mkdir',
+            'Создаёт директорию: mkdir [-p] <path...>',
+            'repository.command.mkdir:Mkdir',
+        ),
+        CommandSpec(
+            'zip',
+            'Архивирует файлы и директории (директории только с -r): zip [-r] <source...> <archive.zip>',
+            'repository.command.zip:Zip',
+            metrics,
+        ),
+        CommandSpec(
+            'unzip',
+            'Распаковывает архив: unzip <archive.zip> [dest_dir]',
+            'repository.command.unzip:Unzip',
+        ),
+        CommandSpec(
+            'tar',
+            'Архивирует в .tar.gz: tar [-r] <source...> <archive.tar.gz|.tgz>',
+            'repository.command.tar:Tar',
+            metrics,
+        ),
+        CommandSpec(
+            'untar',
+            'Распаковывает .tar.gz/.tgz: untar <archive.tar.gz|.tgz> [dest_dir]',
+            'repository.command.untar:Untar',
+        ),
+        CommandSpec(
+            'rm',
+            'Удаляет файлы и директории (директории только с -r): rm [-r] [-y] <path...>',
+            'repository.command.rm:Rm',
+            trash_dir,
+            metrics,
+        ),
+        CommandSpec(
+            'cat',
+            'Выводит файлы или вход конвейера: cat [path...]',
+            'repository.command.cat:Cat',
+        ),
+        CommandSpec(
+            'grep',
+            'Поиск строк по шаблону: grep [-r] [-i] <pattern> [path...]',
+            'repository.command.grep:Grep',
+        ),
+        CommandSpec(
+            'head',
+            'Выводит первые n строк файлов или входа конвейера: head [n] [path...]',
+            'repository.command.head:Head',
+        ),
+        CommandSpec(
+            'undo',
+            'Отменяет последнюю изменяющую команду (mv, cp, rm)',
+            'repository.command.undo:Undo',
+            undo_repo,
+        ),
+        CommandSpec(
+            'history',
+            'Выводит историю команд: history [n | from-to | -p page | -s text | -e regex]',
+            'repository.command.history:History',
+            history,
+        ),
+        CommandSpec(
+            'jobs',
+            'Показывает фоновые задания и время их выполнения',
+            'repository.command.jobs:Jobs',
+            jobs,
+        ),
+        CommandSpec(
+            'wait',
+            'Ждёт фоновые задания и выводит их результат: wait [id...]',
+            'repository.command.wait:Wait',
+            jobs,
+        ),
+        CommandSpec(
+            'fg',
+            'Ждёт фоновое задание (по умолчанию последнее) и выводит его результат: fg [id]',
+            'repository.command.fg:Fg',
+            jobs,
+        ),
+        CommandSpec(
+            'stats',
+            'Задержки команд по фазам (p50, p90, p99, max): stats [-r] [command...]',
+            'repository.command.stats:Stats',
+            stats,
+        ),
+    ]
+    return {spec.name: spec for spec in specs}
@@ -1,4 +1,5 @@
 import shutil
+import stat
 import uuid
 from pathlib import Path
 
@@ -6,12 +7,15 @@ from entity.context import CommandContext
 from entity.errors import ValidationError
 from entity.undo import UndoRecord
 from repository.command.path_utils import normalize
+from usecase.metrics import BYTES_TOTAL, FILES_TOTAL, Metrics
 
 
 class Rm:
-    def __init__(self, trash_dir: Path | str) -> None:
-        self._undo_records: list[UndoRecord] = []
+    def __init__(self, trash_dir: Path | str, metrics: Metrics | None = None) -> None:
         self._trash_dir = Path(trash_dir)
+        metrics = metrics if metrics is not None else Metrics()
+        self._files = metrics.counter(FILES_TOTAL, op='delete')
+        self._bytes = metrics.counter(BYTES_TOTAL, op='delete')
 
     @property
     def name(self) -> str:
@@ -21,9 +25,6 @@ class Rm:
     def description(self) -> str:
         return 'Удаляет файлы и директории (директории только с -r): rm [-r] [-y] <path...>'
 
-    def undo(self) -> list[UndoRecord]:
-        return self._undo_records.copy()[::-1]
-
     def _validate_args(self, args: list[str]) -> None:
         if len(args) < 1:
             raise ValidationError('rm требует как минимум один аргумент: rm -h')
@@ -54,8 +55,10 @@ class Rm:
         final = shutil.move(str(path), str(target))
         return Path(final)
 
-    def _record_undo(self, original: Path, backup: Path) -> None:
-        self._undo_records.append(
+    def _record_undo(
+        self, undo: list[UndoRecord], original: Path, backup: Path
+    ) -> None:
+        undo.append(
             UndoRecord(
                 action='rm',
                 src=str(original),
@@ -65,17 +68,49 @@ class Rm:
             )
         )
 
-    def _remove(self, path: Path) -> None:
+    def _remove(self, path: Path, size: int, undo: list[UndoRecord]) -> None:
         # перемещение в trash вместо удаления
         backup = self._move_to_trash(path)
-        self._record_undo(path, backup)
+        self._files.inc()
+        self._bytes.inc(size)
+        self._record_undo(undo, path, backup)
 
-    def _confirm(self, path: Path) -> bool:
-        ans = input(f'Удалить {path}? [y/N]: ').strip().lower()
+    def _confirm(self, path: Path, ctx: CommandContext) -> bool:
+        if not ctx.interactive:
+            raise ValidationError(
+                f'Некому подтвердить удаление {path}: используйте rm -y'
+            )
+        try:
+            ans = input(f'Удалить {path}? [y/N]: ').strip().lower()
+        except EOFError:
+            # конец ввода - отказ, а не выход из shell
+            return False
         return ans in ('y', 'yes', 'д', 'да')
 
     def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
-        self._undo_records.clear()
+        return self.execute_with_undo(args, flags, ctx, [])
+
+    def execute_with_undo(
+        self,
+        args: list[str],
+        flags: list[str],
+        ctx: CommandContext,
+        undo: list[UndoRecord],
+    ) -> str:
+        removed: list[UndoRecord] = []
+        try:
+            return self._remove_all(args, flags, ctx, removed)
+        finally:
+            # восстанавливать нужно в обратном порядке удаления
+            undo.extend(reversed(removed))
+
+    def _remove_all(
+        self,
+        args: list[str],
+        flags: list[str],
+        ctx: CommandContext,
+        undo: list[UndoRecord],
+    ) -> str:
         self._validate_args(args)
 
         recursive = self._is_recursive(flags)
@@ -86,18 +121,22 @@ class Rm:
             src = normalize(arg, ctx)
             self._check_protection(src, ctx)
 
-            if not src.exists():
+            # один stat на аргумент: существование, тип и размер для метрики
+            try:
+                st = src.stat()
+            except (OSError, ValueError):
                 raise ValidationError(f'Путь не существует: {src}')
 
             # проверка флага -r для директорий
-            if src.is_dir() and not recursive:
+            if stat.S_ISDIR(st.st_mode) and not recursive:
                 raise ValidationError('Для удаления директории нужен флаг -r')
 
             # подтверждение перед удалением
-            if not skip_confirm and not self._confirm(src):
+            if not skip_confirm and not self._confirm(src, ctx):
                 continue
 
             # удаление файла или директории целиком
-            self._remove(src)
+            size = st.st_size if stat.S_ISREG(st.st_mode) else 0
+            self._remove(src, size, undo)
 
-        return f'rm: удалено {len(self._undo_records)} объектов'
+        return f'rm: удалено {len(undo)} объектов'
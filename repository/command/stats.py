@@ -0,0 +1,55 @@
+from entity.context import CommandContext
+from usecase.stats import PHASES, Histogram, LatencyStats
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds < 1e-3:
+        return f'{seconds * 1e6:.0f}µs'
+    if seconds < 1:
+        return f'{seconds * 1e3:.1f}ms'
+    return f'{seconds:.2f}s'
+
+
+def format_row(command: str, phase: str, hist: Histogram) -> str:
+    cells = [
+        format_seconds(v)
+        for v in (
+            hist.percentile(50),
+            hist.percentile(90),
+            hist.percentile(99),
+            hist.max,
+        )
+    ]
+    return f'{command:<10} {phase:<10} {hist.count:>6} ' + ' '.join(
+        f'{c:>8}' for c in cells
+    )
+
+
+class Stats:
+    def __init__(self, stats: LatencyStats) -> None:
+        self._stats = stats
+
+    @property
+    def name(self) -> str:
+        return 'stats'
+
+    @property
+    def description(self) -> str:
+        return 'Задержки команд по фазам (p50, p90, p99, max): stats [-r] [command...]'
+
+    def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
+        if '-r' in flags:
+            self._stats.reset()
+            return ''
+        snapshot = self._stats.snapshot()
+        commands = sorted({cmd for cmd, _ in snapshot if not args or cmd in args})
+        header = f'{"команда":<10} {"фаза":<10} {"n":>6} ' + ' '.join(
+            f'{c:>8}' for c in ('p50', 'p90', 'p99', 'max')
+        )
+        rows = [
+            format_row(cmd, phase, snapshot[cmd, phase])
+            for cmd in commands
+            for phase in PHASES
+            if (cmd, phase) in snapshot
+        ]
+        return '\n'.join([header, *rows]) if rows else ''
@@ -1,12 +1,20 @@
 import tarfile
 from pathlib import Path
 
+from entity.cancel import checkpoint
 from entity.context import CommandContext
-from entity.errors import ValidationError
-from repository.command.path_utils import normalize
+from entity.errors import CommandCancelledError, ValidationError
+from entity.iostat import count_dir, count_open, count_stat
+from repository.command.path_utils import exists, is_dir, is_file, normalize
+from usecase.metrics import BYTES_TOTAL, FILES_TOTAL, Metrics
 
 
 class Tar:
+    def __init__(self, metrics: Metrics | None = None) -> None:
+        metrics = metrics if metrics is not None else Metrics()
+        self._files = metrics.counter(FILES_TOTAL, op='archive')
+        self._bytes = metrics.counter(BYTES_TOTAL, op='archive')
+
     @property
     def name(self) -> str:
         return 'tar'
@@ -28,6 +36,19 @@ class Tar:
         if not (name.endswith('.tar.gz') or name.endswith('.tgz')):
             raise ValidationError('Поддерживаются только .tar.gz или .tgz')
 
+    def _track(self, info: tarfile.TarInfo) -> tarfile.TarInfo:
+        # filter вызывается tarfile перед каждым элементом
+        checkpoint()
+        # tarfile делает lstat каждого элемента, файлы открывает, директории читает
+        count_stat()
+        if info.isdir():
+            count_dir()
+        if info.isfile():
+            count_open()
+            self._files.inc()
+            self._bytes.inc(info.size)
+        return info
+
     def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
         self._validate_args(args)
 
@@ -36,36 +57,51 @@ class Tar:
         self._check_extension(archive_path)
 
         # проверка родительской директории
-        if not archive_path.parent.exists() or not archive_path.parent.is_dir():
+        if not exists(archive_path.parent) or not is_dir(archive_path.parent):
             raise ValidationError(
                 f'Родительская директория не существует: {archive_path.parent}'
             )
 
-        if archive_path.exists() and archive_path.is_dir():
+        if exists(archive_path) and is_dir(archive_path):
             raise ValidationError(
                 f'Нельзя перезаписать директорию файлом: {archive_path}'
             )
 
         recursive = self._has_recursive(flags)
-        added_count = 0
+        try:
+            added_count = self._write_archive(archive_path, srcs, recursive, ctx)
+        except CommandCancelledError:
+            # недописанный архив не оставляем
+            archive_path.unlink(missing_ok=True)
+            raise
+
+        return f'tar: создан архив {archive_path} с {added_count} файлами'
 
+    def _write_archive(
+        self, archive_path: Path, srcs: list[str], recursive: bool, ctx: CommandContext
+    ) -> int:
+        added_count = 0
         with tarfile.open(str(archive_path), mode='w:gz') as tar:
             for src_arg in srcs:
                 src = normalize(src_arg, ctx)
 
-                if not src.exists():
+                if not exists(src):
                     raise ValidationError(f'Источник не найден: {src_arg}')
 
-                if src.is_dir() and not recursive:
+                if is_dir(src) and not recursive:
                     raise ValidationError('Для архивации директории нужен флаг -r')
 
-                tar.add(str(src), arcname=src.name, recursive=recursive)
+                tar.add(
+                    str(src),
+                    arcname=src.name,
+                    recursive=recursive,
+                    filter=self._track,
+                )
 
                 # подсчёт добавленных элементов
-                if src.is_file():
+                if is_file(src):
                     added_count += 1
                 else:
                     # для директорий считаем все файлы внутри
-                    added_count += sum(1 for _ in src.rglob('*') if _.is_file())
-
-        return f'tar: создан архив {archive_path} с {added_count} файлами'
+                    added_count += sum(1 for p in src.rglob('*') if is_file(p))
+        return added_count
@@ -0,0 +1,38 @@
+from entity.context import CommandContext
+from entity.errors import ValidationError
+from usecase.jobs import JobManager, current_jobs
+
+
+def parse_job_id(raw: str) -> int:
+    job_id = raw.removeprefix('%')
+    if not job_id.isdigit():
+        raise ValidationError('номер задания должен быть числом')
+    return int(job_id)
+
+
+class Wait:
+    def __init__(self, jobs: JobManager) -> None:
+        self._jobs = jobs
+
+    @property
+    def name(self) -> str:
+        return 'wait'
+
+    @property
+    def description(self) -> str:
+        return 'Ждёт фоновые задания и выводит их результат: wait [id...]'
+
+    def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
+        jobs = current_jobs(self._jobs)
+        targets = [jobs.get(parse_job_id(x)) for x in args] if args else jobs.all()
+        parts: list[str] = []
+        for job in targets:
+            try:
+                out = jobs.wait(job)
+            except Exception as e:
+                parts.append(f'[{job.id}] ошибка: {job.line}\n{e}')
+                continue
+            parts.append(f'[{job.id}] завершено: {job.line}')
+            if out:
+                parts.append(out)
+        return '\n'.join(parts)
@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from entity.context import CommandContext
+from entity.errors import ValidationError
+from repository.command.path_utils import is_dir
+from usecase.interface import DirIndexRepository
+
+# сколько директорий показывает z -l
+LIST_LIMIT = 20
+
+
+class Z:
+    def __init__(self, dirs: DirIndexRepository) -> None:
+        self._dirs = dirs
+
+    @property
+    def name(self) -> str:
+        return 'z'
+
+    @property
+    def description(self) -> str:
+        return 'Переходит в частую и недавнюю директорию по фрагментам пути: z [-l] <fragment...>'
+
+    def execute(self, args: list[str], flags: list[str], ctx: CommandContext) -> str:
+        matches = self._dirs.matches(args)
+        if not args or '-l' in flags:
+            return '\n'.join(matches[:LIST_LIMIT])
+        # индекс не обходит диск, проверяется только выбранный кандидат
+        for path in matches:
+            if is_dir(Path(path)):
+                ctx.pwd = path
+                self._dirs.visit(path)
+                return ''
+            self._dirs.remove(path)
+        raise ValidationError(f'Нет посещённой директории для: {" ".join(args)}')
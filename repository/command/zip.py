@@ -2,12 +2,20 @@ import os
 import zipfile
 from pathlib import Path
 
+from entity.cancel import checkpoint
 from entity.context import CommandContext
-from entity.errors import ValidationError
-from repository.command.path_utils import normalize
+from entity.errors import CommandCancelledError, ValidationError
+from entity.iostat import count_dir, count_open, count_stat
+from repository.command.path_utils import exists, is_dir, is_file, normalize
+from usecase.metrics import BYTES_TOTAL, FILES_TOTAL, Metrics
 
 
 class Zip:
+    def __init__(self, metrics: Metrics | None = None) -> None:
+        metrics = metrics if metrics is not None else Metrics()
+        self._files = metrics.counter(FILES_TOTAL, op='archive')
+        self._bytes = metrics.counter(BYTES_TOTAL, op='archive')
+
     @property
     def name(self) -> str:
         return 'zip'
@@ -30,37 +38,58 @@ class Zip:
         archive_path = normalize(archive_raw, ctx)
 
         parent = archive_path.parent
-        if not (parent.exists() and parent.is_dir()):
+        if not (exists(parent) and is_dir(parent)):
             raise ValidationError(f'Целевая директория не существует: {parent}')
-        if archive_path.exists() and archive_path.is_dir():
+        if exists(archive_path) and is_dir(archive_path):
             raise ValidationError(
                 f'Нельзя перезаписать директорию файлом: {archive_path}'
             )
 
         recursive = self._is_recursive(flags)
-        added = 0
+        try:
+            added = self._write_archive(archive_path, srcs, recursive, ctx)
+        except CommandCancelledError:
+            # недописанный архив не оставляем
+            archive_path.unlink(missing_ok=True)
+            raise
+
+        return f'zip: создан архив {archive_path} с {added} элементами'
 
+    def _add(self, zf: zipfile.ZipFile, path: Path, arcname: str) -> None:
+        zf.write(str(path), arcname=arcname)
+        # ZipInfo.from_file делает stat, затем файл открывается на чтение
+        count_stat()
+        count_open()
+        self._files.inc()
+        self._bytes.inc(zf.getinfo(arcname).file_size)
+
+    def _write_archive(
+        self, archive_path: Path, srcs: list[str], recursive: bool, ctx: CommandContext
+    ) -> int:
+        added = 0
         with zipfile.ZipFile(
             str(archive_path), mode='w', compression=zipfile.ZIP_DEFLATED
         ) as zf:
             for raw in srcs:
+                checkpoint()
                 src = normalize(raw, ctx)
-                if not src.exists():
+                if not exists(src):
                     raise ValidationError(f'Источник не найден: {raw}')
-                if src.is_file():
-                    zf.write(str(src), arcname=src.name)
+                if is_file(src):
+                    self._add(zf, src, src.name)
                     added += 1
                     continue
                 if not recursive:
                     raise ValidationError('Для архивации директории нужен флаг -r')
                 # Включаем корневую директорию src.name
                 for cur_root, _, files in os.walk(src):
+                    count_dir()
                     cur_root_path = Path(cur_root)
                     rel = os.path.relpath(cur_root_path, src)
                     base = src.name if rel == '.' else f'{src.name}/{rel}'
                     for fname in files:
+                        checkpoint()
                         full = cur_root_path / fname
-                        zf.write(str(full), arcname=f'{base}/{fname}')
+                        self._add(zf, full, f'{base}/{fname}')
                         added += 1
-
-        return f'zip: создан архив {archive_path} с {added} элементами'
+        return added
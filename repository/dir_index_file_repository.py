@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+from pathlib import Path
+
+from repository.in_memory_dir_index import InMemoryDirIndex
+
+# перезапись файла, когда строк больше COMPACT_MIN + 2 * число директорий
+COMPACT_MIN = 256
+
+
+class DirIndexFileRepository(InMemoryDirIndex):
+    """Индекс z в файле строк 'ранг<TAB>время<TAB>путь'.
+
+    Посещение дописывает строку с рангом 1, забытая директория - строку
+    с рангом 0; при чтении ранги одного пути складываются. cd только
+    дописывает строку, файл читается при первом поиске. Когда строк
+    накапливается много, файл переписывается итоговыми рангами.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        super().__init__()
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._lines = 0
+
+    def visit(self, path: str, now: float | None = None) -> None:
+        if '\n' in path:
+            return
+        now = time.time() if now is None else now
+        with self._lock:
+            self._append(1.0, now, path)
+            if self._loaded:
+                self._apply(path, 1.0, now)
+                self._maybe_compact()
+
+    def remove(self, path: str) -> None:
+        with self._lock:
+            self._load()
+            super().remove(path)
+            self._append(0.0, time.time(), path)
+
+    def matches(self, fragments: list[str], now: float | None = None) -> list[str]:
+        with self._lock:
+            self._load()
+            return super().matches(fragments, now)
+
+    def compact(self) -> None:
+        """Переписывает файл итоговыми рангами через временный файл"""
+        with self._lock:
+            self._load()
+            self._compact()
+
+    def _append(self, rank: float, last: float, path: str) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open('a', encoding='utf-8') as f:
+            f.write(f'{rank:g}\t{last:.0f}\t{path}\n')
+        self._lines += 1
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        self._lines = 0
+        if not self.path.exists():
+            return
+        with self.path.open('r', encoding='utf-8', errors='replace') as f:
+            for line in f:
+                self._lines += 1
+                try:
+                    rank, last, path = line.rstrip('\n').split('\t', 2)
+                    self._replay(float(rank), float(last), path)
+                except ValueError:
+                    # оборванная при сбое строка
+                    continue
+        self._maybe_compact()
+
+    def _replay(self, rank: float, last: float, path: str) -> None:
+        if rank <= 0:
+            super().remove(path)
+        else:
+            self._apply(path, rank, last)
+
+    def _maybe_compact(self) -> None:
+        if self._lines > COMPACT_MIN + 2 * len(self._visits):
+            self._compact()
+
+    def _compact(self) -> None:
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with tmp.open('w', encoding='utf-8') as f:
+            for v in self._visits.values():
+                f.write(f'{v.rank:g}\t{v.last:.0f}\t{v.path}\n')
+        os.replace(tmp, self.path)
+        self._lines = len(self._visits)
@@ -1,64 +1,412 @@
+import fcntl
 import os
+import struct
+import sys
+import threading
+from array import array
+from contextlib import contextmanager
 from pathlib import Path
+from typing import BinaryIO, Iterator
+
+from repository.history_search_index import HistorySearchIndex
+from repository.history_segments import HistorySegments
+
+# .history.idx: смещение начала каждой записи, 8 байт little-endian
+OFFSET = struct.Struct('<Q')
+# настройки сегментов в main: по 100 тысяч записей; удаляются они только по
+# явному --history-keep или --history-keep-days
+DEFAULT_SEGMENT_LINES = 100_000
 
 
 class HistoryFileRepository:
-    def __init__(self, path: str | Path):
+    """История в файле строк 'номер команда'.
+
+    Рядом лежит .history.idx - смещения записей по номеру, запись N
+    и диапазон читаются одним seek. Индекс проверяется по последней
+    записи при первом обращении и перестраивается, если его нет или
+    .history дописан без него. Число записей и размер файла дальше
+    хранятся в памяти, оба файла держатся открытыми на дозапись.
+
+    add откладывает команду в памяти. flush_every: дописывать отложенные
+    каждые N команд, 0 - только в flush/close и при чтении. fsync: после
+    записи ещё и fsync, чтобы история пережила сбой питания. История общая
+    для всех процессов shell (REPL, демон, -c), поэтому запись и чтение
+    идут под flock на .history: номера выдаются под блокировкой, а inode
+    и размер файла сверяются с запомненными. Дописанное другим процессом
+    дочитывается, файлы, заменённые при сжатии или очистке, открываются
+    заново.
+
+    Когда в .history набирается segment_lines записей или segment_bytes
+    байт, он сжимается в сегмент (HistorySegments) и заменяется пустым,
+    нумерация продолжается. keep и keep_days ограничивают число и возраст
+    сегментов, 0 - без ограничения.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        flush_every: int = 1,
+        fsync: bool = False,
+        *,
+        segment_lines: int = 0,
+        segment_bytes: int = 0,
+        keep: int = 0,
+        keep_days: float = 0,
+    ) -> None:
         self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + '.idx')
+        self._flush_every = flush_every
+        self._fsync = fsync
+        self._segment_lines = segment_lines
+        self._segment_bytes = segment_bytes
+        self._segments = HistorySegments(self.path, keep, keep_days)
+        self._lock = threading.Lock()
+        self._file: BinaryIO | None = None
+        self._index: BinaryIO | None = None
+        # записей в .history; None - индекс ещё не сверен с файлом
+        self._count: int | None = None
+        # номер последней записи в сегментах
+        self._base = 0
+        self._size = 0
+        # inode .history, с которым сверены счётчик и размер
+        self._ino = 0
+        # команды, ещё не записанные в файл: номер им выдаётся при записи
+        self._pending: list[str] = []
+        # строится при первом поиске, дальше дополняется в add и _sync
+        self._search: HistorySearchIndex | None = None
+        # номер первой записи истории, когда строился индекс поиска
+        self._search_from = 1
 
     def add(self, name: str, args: list[str], flags: list[str]) -> None:
         cmd = ' '.join([name, *flags, *args]).strip()
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        last_lines = self._read_last_lines(1)
-        last_no = self._parse_leading_number(last_lines[0]) if last_lines else 0
-        with self.path.open('a', encoding='utf-8') as f:
-            f.write(f'{last_no + 1} {cmd}\n')
+        with self._lock:
+            self._pending.append(cmd)
+            if self._flush_every and len(self._pending) >= self._flush_every:
+                self._write()
+
+    def flush(self) -> None:
+        """Дописывает отложенные команды на диск"""
+        with self._lock:
+            self._write()
+
+    def close(self) -> None:
+        """Дописывает команды и закрывает файлы, следующий add откроет их снова"""
+        with self._lock:
+            if self._pending:
+                self._write()
+            self._close()
+
+    def count(self) -> int:
+        """Номер последней записи: записи из удалённых сегментов тоже считаются"""
+        with self._lock, self._locked():
+            return self._total()
+
+    def get(self, n: int) -> str | None:
+        """Команда с номером n без номера, None - такой записи нет"""
+        with self._lock, self._locked():
+            lines = self._entries(n, n)
+        if not lines:
+            return None
+        _, _, cmd = lines[0].partition(' ')
+        return cmd
+
+    def entries(self, start: int, end: int) -> list[str]:
+        """Записи с номерами start..end включительно"""
+        with self._lock, self._locked():
+            return self._entries(start, end)
+
+    def search(
+        self, query: str, regex: bool = False, limit: int = 20
+    ) -> list[tuple[int, str]]:
+        """Номер и команда, новые первыми, без повторов одной команды"""
+        with self._lock, self._locked():
+            if self._search is None:
+                # один проход по .history и всем сегментам, дальше только дописывается
+                index = HistorySearchIndex()
+                index.extend(self._read_commands())
+                self._search = index
+                self._search_from = self._first_available()
+            return self._search.search(query, regex, limit)
 
     def last(self, n: int) -> list[str]:
         if n <= 0:
             return []
-        return self._read_last_lines(n)
+        with self._lock, self._locked():
+            total = self._total()
+            return self._entries(total - n + 1, total)
 
     def all(self) -> list[str]:
-        if not self.path.exists():
-            return []
-        with self.path.open('r', encoding='utf-8') as f:
-            return [line.rstrip('\r\n') for line in f]
+        with self._lock, self._locked():
+            lines = self._segments.entries(1, self._base)
+            if self.path.exists():
+                with self.path.open('r', encoding='utf-8') as f:
+                    lines.extend(line.rstrip('\r\n') for line in f)
+            return lines
 
     def clear(self) -> None:
-        self.path.parent.mkdir(parents=True, exist_ok=True)
-        with self.path.open('w', encoding='utf-8'):
+        with self._lock:
+            self._pending.clear()
+            with self._locked():
+                self._segments.clear()
+                self._replace_active()
+                self._base = 0
+                if self._search is not None:
+                    self._search = HistorySearchIndex()
+                    self._search_from = 1
+
+    def _write(self) -> None:
+        with self._locked():
             pass
 
-    def _read_last_lines(self, n: int, chunk_size: int = 8192) -> list[str]:
-        """Читает последние n строк, двигаясь с конца файла"""
-        if n <= 0 or not self.path.exists():
+    @contextmanager
+    def _locked(self) -> Iterator[None]:
+        """flock на .history: счётчик сверен с диском, отложенные команды
+        дописаны. Файлы, заменённые внутри, закрываются - это снимает flock"""
+        f, index = self._lock_handles()
+        try:
+            self._sync(f)
+            self._write_pending(f, index)
+            yield
+        finally:
+            if self._file is f:
+                f.flush()
+                index.flush()
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _lock_handles(self) -> tuple[BinaryIO, BinaryIO]:
+        while True:
+            f, index = self._handles()
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if os.stat(self.path).st_ino == os.fstat(f.fileno()).st_ino:
+                    return f, index
+            except FileNotFoundError:
+                pass
+            # другой процесс сжал или очистил историю, пока ждали блокировку
+            self._close()
+
+    def _sync(self, f: BinaryIO) -> None:
+        """Сверяет счётчик с .history: его мог дописать или заменить
+        другой процесс"""
+        st = os.fstat(f.fileno())
+        changed = st.st_ino != self._ino or st.st_size != self._size
+        if st.st_ino != self._ino or st.st_size < self._size:
+            self._segments.reload()
+        if changed:
+            self._count = None
+        self._ino = st.st_ino
+        self._active_count()
+        if changed and self._search is not None:
+            self._catch_up_search(self._search)
+
+    def _catch_up_search(self, search: HistorySearchIndex) -> None:
+        """Дописывает в индекс поиска записи других процессов. Сжатие
+        переносит записи в сегмент под теми же номерами, индекс остаётся;
+        после очистки или удаления старых сегментов он строится заново"""
+        total = self._total()
+        newest = search.newest
+        start = 1
+        if newest is not None:
+            n, cmd = newest
+            if n > total or self._entries(n, n) != [f'{n} {cmd}']:
+                self._search = None
+                return
+            start = n + 1
+        if self._first_available() != self._search_from:
+            self._search = None
+            return
+        lines = self._entries(start, total)
+        search.extend(
+            (start + i, line.partition(' ')[2]) for i, line in enumerate(lines)
+        )
+
+    def _first_available(self) -> int:
+        segments = self._segments.segments()
+        return segments[0].first if segments else self._base + 1
+
+    def _write_pending(self, f: BinaryIO, index: BinaryIO) -> None:
+        if not self._pending:
+            return
+        count = self._active_count()
+        for cmd in self._pending:
+            count += 1
+            n = self._base + count
+            data = f'{n} {cmd}\n'.encode()
+            index.write(OFFSET.pack(self._size))
+            f.write(data)
+            self._size += len(data)
+            if self._search is not None:
+                self._search.add(n, cmd)
+        self._count = count
+        self._pending.clear()
+        for handle in (f, index):
+            handle.flush()
+            if self._fsync:
+                os.fsync(handle.fileno())
+        # сегмент может выйти длиннее на команды, отложенные одной пачкой
+        if (self._segment_lines and count >= self._segment_lines) or (
+            self._segment_bytes and self._size >= self._segment_bytes
+        ):
+            self._seal()
+
+    def _total(self) -> int:
+        # _active_count при первом вызове выставляет _base по сегментам
+        count = self._active_count()
+        return self._base + count
+
+    def _entries(self, start: int, end: int) -> list[str]:
+        """Записи start..end: старые из сегментов, новые из .history"""
+        total = self._total()
+        start, end = max(start, 1), min(end, total)
+        if start > end:
             return []
-        buf = b''
+        lines = []
+        if start <= self._base:
+            lines = self._segments.entries(start, min(end, self._base))
+        if end > self._base:
+            lines.extend(
+                self._active_entries(
+                    max(start, self._base + 1) - self._base, end - self._base
+                )
+            )
+        return lines
+
+    def _active_entries(self, start: int, end: int) -> list[str]:
+        """Записи .history по номерам внутри файла"""
+        count = self._active_count()
+        with self.index_path.open('rb') as index:
+            begin = self._offset(index, start)
+            stop = self._offset(index, end + 1) if end < count else self._size
         with self.path.open('rb') as f:
-            f.seek(0, os.SEEK_END)
-            file_end = f.tell()
-            pos = file_end
-            newlines = 0
-
-            while pos > 0 and newlines <= n:
-                read_size = min(chunk_size, pos)
-                pos -= read_size
-                f.seek(pos, os.SEEK_SET)
-                chunk = f.read(read_size)
-                buf = chunk + buf
-                newlines += chunk.count(b'\n')
-
-        text = buf.decode('utf-8', errors='replace')
-        lines = text.splitlines()
-        return lines[-n:]
+            f.seek(begin)
+            data = f.read(stop - begin)
+        return data.decode('utf-8', errors='replace').splitlines()
+
+    def _read_commands(self) -> Iterator[tuple[int, str]]:
+        yield from self._segments.commands()
+        if not self.path.exists():
+            return
+        with self.path.open('r', encoding='utf-8', errors='replace') as f:
+            for n, line in enumerate(f, self._base + 1):
+                _, _, cmd = line.rstrip('\n').partition(' ')
+                yield n, cmd
 
     @staticmethod
-    def _parse_leading_number(line: str) -> int:
-        obj = line.strip().split()
-        if len(obj) == 0:
+    def _offset(index: BinaryIO, n: int) -> int:
+        index.seek((n - 1) * OFFSET.size)
+        return OFFSET.unpack(index.read(OFFSET.size))[0]
+
+    def _active_count(self) -> int:
+        if self._count is None:
+            self._base = self._segments.last_number
+            self._size = self.path.stat().st_size if self.path.exists() else 0
+            count = self._check_index()
+            self._count = count if count is not None else self._rebuild_index()
+            if self._count:
+                first = self._first_number()
+                if first <= self._base:
+                    # сбой между сжатием сегмента и очисткой .history
+                    self._truncate_active()
+                else:
+                    # сегменты могли удалить по сроку хранения
+                    self._base = first - 1
+        return self._count
+
+    def _first_number(self) -> int:
+        with self.path.open('rb') as f:
+            head = f.readline().split(b' ', 1)[0]
+        return int(head) if head.isdigit() else self._base + 1
+
+    def _seal(self) -> None:
+        """Сжимает .history в сегмент и заменяет его пустым"""
+        count = self._active_count()
+        self._segments.seal(self.path, self._base + 1, self._base + count)
+        self._replace_active()
+        self._base += count
+        # хранение удалило старые сегменты: их записи не должны находиться
+        if self._search is not None and self._first_available() != self._search_from:
+            self._search = None
+
+    def _replace_active(self) -> None:
+        """Заменяет .history и индекс пустыми файлами через os.replace.
+        .history заменяется последним: пока он прежний, другие процессы
+        ждут flock на нём, а потом видят новый inode и перечитывают историю"""
+        for path in (self.index_path, self.path):
+            tmp = path.with_name(path.name + '.tmp')
+            with tmp.open('wb') as f:
+                ino = os.fstat(f.fileno()).st_ino
+            os.replace(tmp, path)
+        self._close()
+        self._ino = ino
+        self._count = 0
+        self._size = 0
+
+    def _truncate_active(self) -> None:
+        """Очищает .history и индекс на месте, не меняя inode"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        for path in (self.path, self.index_path):
+            with path.open('wb'):
+                pass
+        self._count = 0
+        self._size = 0
+
+    def _check_index(self) -> int | None:
+        """Число записей по индексу или None, если индекс не сходится с файлом:
+        последнее смещение должно указывать на последнюю строку"""
+        try:
+            index_size = self.index_path.stat().st_size
+        except OSError:
+            return None
+        count, rest = divmod(index_size, OFFSET.size)
+        if rest or (count == 0) != (self._size == 0):
+            return None
+        if count == 0:
             return 0
-        n = obj[0]
-        if n.isdigit():
-            return int(n)
-        return 0
+        with self.index_path.open('rb') as index:
+            last = self._offset(index, count)
+        if last >= self._size:
+            return None
+        with self.path.open('rb') as f:
+            f.seek(last)
+            tail = f.read()
+        if tail.count(b'\n') != 1 or not tail.endswith(b'\n'):
+            return None
+        return count
+
+    def _rebuild_index(self) -> int:
+        """Один проход по .history, индекс пишется через временный файл"""
+        offsets = array('Q')
+        pos = 0
+        if self.path.exists():
+            with self.path.open('rb') as f:
+                for line in f:
+                    offsets.append(pos)
+                    pos += len(line)
+            if pos and not line.endswith(b'\n'):
+                # строка оборвана при сбое: следующая запись начнётся с новой
+                with self.path.open('ab') as f:
+                    f.write(b'\n')
+                pos += 1
+        self._size = pos
+        if sys.byteorder != 'little':
+            offsets.byteswap()
+        # на месте, под flock: открытые другими процессами индексы остаются
+        # тем же файлом. Оборванная перестройка не сойдётся при проверке
+        with self.index_path.open('wb') as f:
+            offsets.tofile(f)
+        return len(offsets)
+
+    def _handles(self) -> tuple[BinaryIO, BinaryIO]:
+        if self._file is None or self._index is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            # .history открывается первым: индекс заменяется раньше него
+            self._file = self.path.open('ab')
+            self._index = self.index_path.open('ab')
+        return self._file, self._index
+
+    def _close(self) -> None:
+        for f in (self._file, self._index):
+            if f is not None:
+                f.close()
+        self._file = None
+        self._index = None
@@ -0,0 +1,164 @@
+"""Поиск по истории через индекс триграмм.
+
+История повторяется: миллион записей - это обычно десятки тысяч разных
+команд. Индекс хранит каждую команду один раз, номер её последней
+записи и для каждой триграммы (три подряд символа в нижнем регистре)
+множество команд, где она встречается. Запрос пересекает множества
+своих триграмм и проверяет только оставшихся кандидатов, новые первыми.
+"""
+
+import re
+from typing import Iterable, Iterator
+
+GRAM = 3
+# кандидатов больше этой доли всех команд - обходим по свежести без сортировки
+SORT_SHARE = 8
+# сколько самых редких триграмм запроса пересекать
+MAX_GRAMS = 3
+# {m}, {m,}, {,n}, {m,n}; другая { в регулярном выражении - сама буква
+QUANTIFIER = re.compile(r'\{\d*,?\d*\}')
+# \d \w \s, границы и управляющие символы: ровно два знака шаблона
+CLASS_ESCAPES = frozenset('dDwWsSbBAZntrfva')
+
+
+def _grams(text: str) -> set[str]:
+    return {text[i : i + GRAM] for i in range(len(text) - GRAM + 1)}
+
+
+def _class_end(pattern: str, i: int) -> int:
+    """Позиция после класса [...], начатого в i.
+    ] сразу после [ или [^ - сам символ, а не конец класса"""
+    j = i + 1
+    if pattern[j : j + 1] == '^':
+        j += 1
+    if pattern[j : j + 1] == ']':
+        j += 1
+    close = pattern.find(']', j)
+    return len(pattern) if close == -1 else close + 1
+
+
+def required_literals(pattern: str) -> list[str]:
+    """Строки, которые точно есть в любой строке под регулярное выражение.
+    Группы и | не разбираются: для них фильтра нет, проверяются все команды"""
+    if '(' in pattern or '|' in pattern:
+        return []
+    runs: list[str] = []
+    cur = ''
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == '\\':
+            nxt = pattern[i + 1 : i + 2]
+            # \. \* - буквальный символ, \d \w \s - класс
+            if nxt and not nxt.isalnum():
+                cur += nxt
+            elif nxt and nxt in CLASS_ESCAPES:
+                runs.append(cur)
+                cur = ''
+            else:
+                # \x6f, \u044f, \N{...}, \101, \1: длина неизвестна, фильтра нет
+                return []
+            i += 2
+            continue
+        if ch == '{' and (quant := QUANTIFIER.match(pattern, i)):
+            # повтор {m,n} - не текст; предыдущий символ может отсутствовать
+            runs.append(cur[:-1])
+            cur = ''
+            i = quant.end()
+            continue
+        if ch in '*?':
+            # предыдущий символ может отсутствовать
+            runs.append(cur[:-1])
+            cur = ''
+        elif ch == '+':
+            runs.append(cur)
+            cur = ''
+        elif ch == '[':
+            runs.append(cur)
+            cur = ''
+            i = _class_end(pattern, i)
+            continue
+        elif ch in '.^$':
+            runs.append(cur)
+            cur = ''
+        else:
+            cur += ch
+        i += 1
+    runs.append(cur)
+    return [r for r in runs if len(r) >= GRAM]
+
+
+class HistorySearchIndex:
+    """Индекс разных команд истории, дополняется по одной записи"""
+
+    def __init__(self) -> None:
+        self._ids: dict[str, int] = {}
+        self._texts: list[str] = []
+        self._last: list[int] = []
+        # id команд от старых к новым: последняя запись переставляет команду в конец
+        self._recent: dict[int, None] = {}
+        self._postings: dict[str, set[int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    @property
+    def newest(self) -> tuple[int, str] | None:
+        """Номер и команда последней учтённой записи"""
+        if not self._recent:
+            return None
+        cid = next(reversed(self._recent))
+        return self._last[cid], self._texts[cid]
+
+    def add(self, n: int, text: str) -> None:
+        """Учитывает запись номер n"""
+        cid = self._ids.get(text)
+        if cid is None:
+            cid = len(self._texts)
+            self._ids[text] = cid
+            self._texts.append(text)
+            self._last.append(n)
+            for gram in _grams(text.lower()):
+                self._postings.setdefault(gram, set()).add(cid)
+        else:
+            self._last[cid] = n
+            del self._recent[cid]
+        self._recent[cid] = None
+
+    def search(
+        self, query: str, regex: bool = False, limit: int = 20
+    ) -> list[tuple[int, str]]:
+        """Номер последней записи и команда, новые первыми, без повторов.
+        Без учёта регистра; regex - query как регулярное выражение"""
+        if regex:
+            pattern = re.compile(query, re.IGNORECASE)
+            literals = required_literals(query)
+        else:
+            pattern = re.compile(re.escape(query), re.IGNORECASE)
+            literals = [query] if len(query) >= GRAM else []
+        found: list[tuple[int, str]] = []
+        for cid in self._candidates([s.lower() for s in literals]):
+            text = self._texts[cid]
+            if pattern.search(text):
+                found.append((self._last[cid], text))
+                if len(found) >= limit:
+                    break
+        return found
+
+    def _candidates(self, literals: list[str]) -> Iterator[int]:
+        grams = {g for s in literals for g in _grams(s)}
+        if not grams:
+            return reversed(self._recent)
+        # редкие триграммы отсекают почти всё, остальное проверит выражение
+        postings = sorted((self._postings.get(g, set()) for g in grams), key=len)
+        rarest = postings[:MAX_GRAMS]
+        if len(rarest[0]) * SORT_SHARE < len(self._recent):
+            ids = rarest[0].intersection(*rarest[1:])
+            return iter(sorted(ids, key=self._last.__getitem__, reverse=True))
+        # частый запрос: совпадения найдутся среди свежих команд
+        return (cid for cid in reversed(self._recent) if all(cid in p for p in rarest))
+
+    def extend(self, entries: Iterable[tuple[int, str]]) -> None:
+        """Добавляет записи по порядку номеров"""
+        for n, text in entries:
+            self.add(n, text)
@@ -0,0 +1,133 @@
+import os
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator
+
+DAY = 24 * 3600.0
+
+
+@dataclass(frozen=True)
+class Segment:
+    """Закрытая часть истории: записи с номерами first..last подряд"""
+
+    first: int
+    last: int
+    path: Path
+
+
+class HistorySegments:
+    """Сжатые сегменты истории рядом с .history: .history.<first>-<last>.gz.
+
+    Номера записей в имени файла, поэтому диапазон находит свои сегменты
+    без чтения остальных. keep - сколько сегментов хранить, keep_days -
+    сколько дней, 0 - без ограничения. Последний прочитанный сегмент
+    держится распакованным: листание страниц не распаковывает его заново.
+    """
+
+    def __init__(self, active: Path, keep: int = 0, keep_days: float = 0) -> None:
+        self._active = active
+        self._keep = keep
+        self._keep_days = keep_days
+        self._pattern = re.compile(rf'{re.escape(active.name)}\.(\d+)-(\d+)\.gz')
+        self._segments: list[Segment] | None = None
+        self._cached: tuple[Segment, list[str]] | None = None
+
+    @property
+    def last_number(self) -> int:
+        """Номер последней записи в сегментах, 0 - сегментов нет"""
+        segments = self._list()
+        return segments[-1].last if segments else 0
+
+    def segments(self) -> list[Segment]:
+        return list(self._list())
+
+    def entries(self, start: int, end: int) -> list[str]:
+        """Записи start..end из сегментов, читаются только пересекающиеся"""
+        out: list[str] = []
+        for seg in self._list():
+            if seg.last < start or seg.first > end:
+                continue
+            lines = self.lines(seg)
+            out.extend(lines[max(start, seg.first) - seg.first : end - seg.first + 1])
+        return out
+
+    def lines(self, seg: Segment) -> list[str]:
+        if self._cached is not None and self._cached[0] == seg:
+            return self._cached[1]
+        import gzip
+
+        try:
+            with gzip.open(seg.path, 'rt', encoding='utf-8', errors='replace') as f:
+                lines = f.read().splitlines()
+        except OSError:
+            # сегмент удалён или повреждён: его записей нет
+            lines = []
+        self._cached = (seg, lines)
+        return lines
+
+    def commands(self) -> Iterator[tuple[int, str]]:
+        """Номер и команда всех записей сегментов, от старых к новым"""
+        for seg in self._list():
+            for n, line in enumerate(self.lines(seg), seg.first):
+                yield n, line.partition(' ')[2]
+
+    def seal(self, source: Path, first: int, last: int) -> Segment:
+        """Сжимает source в сегмент first..last и применяет хранение.
+        Архив пишется во временный файл: при сбое сегмент или есть целиком,
+        или его нет. source не трогается, его очищает вызывающий"""
+        import gzip
+        import shutil
+
+        seg = Segment(
+            first,
+            last,
+            self._active.with_name(f'{self._active.name}.{first}-{last}.gz'),
+        )
+        tmp = seg.path.with_name(seg.path.name + '.tmp')
+        with source.open('rb') as src, gzip.open(tmp, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        os.replace(tmp, seg.path)
+        self._list().append(seg)
+        self._retain()
+        return seg
+
+    def reload(self) -> None:
+        """Забывает список сегментов: его мог изменить другой процесс"""
+        self._segments = None
+        self._cached = None
+
+    def clear(self) -> None:
+        for seg in self._list():
+            seg.path.unlink(missing_ok=True)
+        self._segments = []
+        self._cached = None
+
+    def _list(self) -> list[Segment]:
+        if self._segments is None:
+            found = []
+            if self._active.parent.is_dir():
+                for entry in os.scandir(self._active.parent):
+                    m = self._pattern.fullmatch(entry.name)
+                    if m is not None:
+                        found.append(Segment(int(m[1]), int(m[2]), Path(entry.path)))
+            self._segments = sorted(found, key=lambda s: s.first)
+            self._retain()
+        return self._segments
+
+    def _retain(self) -> None:
+        segments = self._segments or []
+        drop = len(segments) - self._keep if self._keep else 0
+        if self._keep_days:
+            cutoff = time.time() - self._keep_days * DAY
+            for i, seg in enumerate(segments):
+                try:
+                    if seg.path.stat().st_mtime >= cutoff:
+                        break
+                except OSError:
+                    pass
+                drop = max(drop, i + 1)
+        for seg in segments[:drop]:
+            seg.path.unlink(missing_ok=True)
+        del segments[:drop]
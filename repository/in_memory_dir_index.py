@@ -0,0 +1,62 @@
+import re
+import time
+
+from entity.frecency import AGING, MAX_TOTAL_RANK, DirVisit, frecency
+
+
+def compile_query(fragments: list[str]) -> re.Pattern:
+    """Фрагменты должны встретиться в пути по порядку, последний - в имени
+    самой директории: 'z pro src' находит /home/u/projects/app/src"""
+    *head, last = (re.escape(f) for f in fragments)
+    parts = [f'{h}.*' for h in head]
+    return re.compile(f'{"".join(parts)}{last}[^/]*$', re.IGNORECASE)
+
+
+class InMemoryDirIndex:
+    """Посещённые директории и их ранги. Поиск не трогает файловую систему:
+    один проход по индексу, размер которого ограничен старением"""
+
+    def __init__(self) -> None:
+        self._visits: dict[str, DirVisit] = {}
+        self._total = 0.0
+
+    def visit(self, path: str, now: float | None = None) -> None:
+        """Учитывает посещение директории"""
+        self._apply(path, 1.0, time.time() if now is None else now)
+
+    def remove(self, path: str) -> None:
+        """Забывает директорию, например удалённую"""
+        visit = self._visits.pop(path, None)
+        if visit is not None:
+            self._total -= visit.rank
+
+    def matches(self, fragments: list[str], now: float | None = None) -> list[str]:
+        """Подходящие директории, лучшие первыми"""
+        now = time.time() if now is None else now
+        query = compile_query(fragments) if fragments else None
+        found = [
+            v for v in self._visits.values() if query is None or query.search(v.path)
+        ]
+        found.sort(key=lambda v: frecency(v, now), reverse=True)
+        return [v.path for v in found]
+
+    def all(self) -> list[DirVisit]:
+        return list(self._visits.values())
+
+    def _apply(self, path: str, rank: float, last: float) -> None:
+        visit = self._visits.get(path)
+        if visit is None:
+            self._visits[path] = DirVisit(path, rank, last)
+        else:
+            visit.rank += rank
+            visit.last = max(visit.last, last)
+        self._total += rank
+        if self._total > MAX_TOTAL_RANK:
+            self._age()
+
+    def _age(self) -> None:
+        for path, visit in list(self._visits.items()):
+            visit.rank *= AGING
+            if visit.rank < 1:
+                del self._visits[path]
+        self._total = sum(v.rank for v in self._visits.values())
@@ -1,3 +1,6 @@
+import re
+
+
 class InMemoryHistory:
     def __init__(self) -> None:
         self._history: list[str] = []
@@ -14,6 +17,33 @@ class InMemoryHistory:
         """Возвращает последние n команд"""
         return self._history
 
+    def count(self) -> int:
+        return len(self._history)
+
+    def entries(self, start: int, end: int) -> list[str]:
+        return self._history[max(start, 1) - 1 : max(end, 0)]
+
+    def get(self, n: int) -> str | None:
+        return self._history[n - 1] if 1 <= n <= len(self._history) else None
+
+    def search(
+        self, query: str, regex: bool = False, limit: int = 20
+    ) -> list[tuple[int, str]]:
+        pattern = re.compile(query if regex else re.escape(query), re.IGNORECASE)
+        found: list[tuple[int, str]] = []
+        seen: set[str] = set()
+        for n in range(len(self._history), 0, -1):
+            text = self._history[n - 1]
+            if text not in seen and pattern.search(text):
+                seen.add(text)
+                found.append((n, text))
+                if len(found) >= limit:
+                    break
+        return found
+
     def clear(self) -> None:
         """Очищает историю команд"""
         self._history.clear()
+
+    def close(self) -> None:
+        """Хранить нечего"""
@@ -0,0 +1,84 @@
+import logging
+import os
+import queue
+from logging.handlers import (
+    QueueHandler,
+    QueueListener,
+    RotatingFileHandler,
+    TimedRotatingFileHandler,
+)
+from pathlib import Path
+
+LOG_FORMAT = '[%(asctime)s] %(levelname)s: %(message)s'
+LOG_DATEFMT = '%Y-%m-%d %H:%M:%S'
+# ротация по размеру: 10 MiB на файл, 5 сжатых архивов
+DEFAULT_MAX_BYTES = 10 << 20
+DEFAULT_BACKUPS = 5
+
+
+def _gzip_name(name: str) -> str:
+    return name + '.gz'
+
+
+def _gzip_rotate(source: str, dest: str) -> None:
+    """Сжимает закрытый лог в архив, вызывается в потоке записи логов.
+    gzip и shutil подгружаются при первой ротации, а не при старте shell"""
+    import gzip
+    import shutil
+
+    with open(source, 'rb') as src, gzip.open(dest, 'wb') as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+def _file_handler(
+    path: str | Path, max_bytes: int, backups: int, when: str | None
+) -> logging.Handler:
+    handler: RotatingFileHandler | TimedRotatingFileHandler
+    if when is not None:
+        handler = TimedRotatingFileHandler(
+            path, when=when, backupCount=backups, encoding='utf-8'
+        )
+    else:
+        handler = RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups, encoding='utf-8'
+        )
+    handler.namer = _gzip_name
+    handler.rotator = _gzip_rotate
+    handler.setFormatter(logging.Formatter(LOG_FORMAT, LOG_DATEFMT))
+    return handler
+
+
+def setup_logging(
+    path: str | Path,
+    level: int = logging.INFO,
+    max_bytes: int = DEFAULT_MAX_BYTES,
+    backups: int = DEFAULT_BACKUPS,
+    when: str | None = None,
+) -> QueueListener:
+    """Логи корневого логгера уходят в очередь, файл пишет фоновый поток.
+    Запись, ротация и сжатие не задерживают приглашение shell.
+    when ('midnight', 'H', ...) включает ротацию по времени вместо размера.
+    Возвращает запущенный QueueListener: stop() дописывает очередь и закрывает файл"""
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    listener = QueueListener(
+        records,
+        _file_handler(path, max_bytes, backups, when),
+        respect_handler_level=True,
+    )
+    root = logging.getLogger()
+    root.addHandler(QueueHandler(records))
+    root.setLevel(level)
+    listener.start()
+    return listener
+
+
+def stop_logging(listener: QueueListener) -> None:
+    """Дописывает накопленные записи и закрывает файлы логов"""
+    listener.stop()
+    for handler in listener.handlers:
+        handler.close()
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        if isinstance(handler, QueueHandler) and handler.queue is listener.queue:
+            root.removeHandler(handler)
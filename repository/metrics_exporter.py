@@ -0,0 +1,175 @@
+import json
+import os
+import threading
+import time
+from logging import getLogger
+from pathlib import Path
+
+from usecase.metrics import HELP, TRASH_BYTES, TRASH_FILES, Labels, Metrics, Sample
+from usecase.stats import PHASES, LatencyStats
+
+logger = getLogger(__name__)
+
+LATENCY = 'unix_shell_command_latency_seconds'
+QUANTILES = (0.5, 0.9, 0.99)
+DEFAULT_INTERVAL = 15.0
+
+
+def directory_size(path: str | Path) -> tuple[int, int]:
+    """Количество файлов и их суммарный размер, обход через scandir"""
+    files = size = 0
+    stack = [str(path)]
+    while stack:
+        try:
+            it = os.scandir(stack.pop())
+        except OSError:
+            continue
+        with it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    else:
+                        files += 1
+                        size += entry.stat(follow_symlinks=False).st_size
+                except OSError:
+                    continue
+    return files, size
+
+
+def register_trash_gauges(metrics: Metrics, trash_dir: str | Path) -> None:
+    """Размер и число файлов .trash. Каталог обходится один раз за сбор:
+    gauge байтов считается первым и запоминает число файлов"""
+    files = 0
+
+    def trash_bytes() -> float:
+        nonlocal files
+        files, size = directory_size(trash_dir)
+        return size
+
+    metrics.gauge(TRASH_BYTES, trash_bytes)
+    metrics.gauge(TRASH_FILES, lambda: files)
+
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+    body = ','.join(
+        '{}="{}"'.format(
+            k, v.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        )
+        for k, v in labels
+    )
+    return '{' + body + '}'
+
+
+def render_prometheus(samples: list[Sample], stats: LatencyStats) -> str:
+    """Текстовый формат Prometheus для textfile collector node exporter"""
+    lines: list[str] = []
+    seen: set[str] = set()
+    for s in samples:
+        if s.name not in seen:
+            seen.add(s.name)
+            lines.append(f'# HELP {s.name} {HELP.get(s.name, s.name)}')
+            lines.append(f'# TYPE {s.name} {s.kind}')
+        lines.append(f'{s.name}{_format_labels(s.labels)} {s.value:g}')
+
+    snapshot = stats.snapshot()
+    if snapshot:
+        lines.append(f'# HELP {LATENCY} Задержки команд по фазам выполнения')
+        lines.append(f'# TYPE {LATENCY} summary')
+    for (command, phase), hist in sorted(snapshot.items()):
+        base: Labels = (('command', command), ('phase', phase))
+        for q in QUANTILES:
+            labels = _format_labels((*base, ('quantile', f'{q:g}')))
+            lines.append(f'{LATENCY}{labels} {hist.percentile(q * 100):g}')
+        lines.append(f'{LATENCY}_sum{_format_labels(base)} {hist.total:g}')
+        lines.append(f'{LATENCY}_count{_format_labels(base)} {hist.count}')
+    return '\n'.join(lines) + '\n'
+
+
+def render_json(samples: list[Sample], stats: LatencyStats) -> dict:
+    latency: dict[str, dict[str, dict[str, float]]] = {}
+    for (command, phase), hist in stats.snapshot().items():
+        latency.setdefault(command, {})[phase] = {
+            'count': hist.count,
+            'sum': hist.total,
+            'max': hist.max,
+            **{f'p{q * 100:g}': hist.percentile(q * 100) for q in QUANTILES},
+        }
+    metrics: dict[str, list[dict]] = {}
+    for s in samples:
+        metrics.setdefault(s.name, []).append(
+            {'labels': dict(s.labels), 'value': s.value, 'type': s.kind}
+        )
+    return {
+        'timestamp': time.time(),
+        'metrics': metrics,
+        'latency': {
+            cmd: {p: latency[cmd][p] for p in PHASES if p in latency[cmd]}
+            for cmd in sorted(latency)
+        },
+    }
+
+
+def _write_atomic(path: Path, text: str) -> None:
+    # node exporter не должен увидеть недописанный файл; временное имя
+    # уникально, два процесса с одним --metrics-dir не пишут в один файл
+    import tempfile
+
+    fd, tmp = tempfile.mkstemp(prefix=f'.{path.name}.', suffix='.tmp', dir=path.parent)
+    try:
+        # mkstemp создаёт файл 0600, а коллектор читает от другого пользователя
+        os.fchmod(fd, 0o644)
+        with open(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+class MetricsExporter:
+    """Периодически сбрасывает метрики в Prometheus textfile и JSON"""
+
+    def __init__(
+        self,
+        metrics: Metrics,
+        stats: LatencyStats,
+        textfile: str | Path | None,
+        json_file: str | Path | None,
+        interval: float = DEFAULT_INTERVAL,
+    ) -> None:
+        self._metrics = metrics
+        self._stats = stats
+        self._textfile = Path(textfile) if textfile is not None else None
+        self._json_file = Path(json_file) if json_file is not None else None
+        self._interval = interval
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def flush(self) -> None:
+        samples = self._metrics.collect()
+        try:
+            if self._textfile is not None:
+                _write_atomic(self._textfile, render_prometheus(samples, self._stats))
+            if self._json_file is not None:
+                data = render_json(samples, self._stats)
+                _write_atomic(self._json_file, json.dumps(data, ensure_ascii=False))
+        except OSError as e:
+            logger.error('Не удалось записать метрики: %s', e)
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._loop, name='metrics', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Останавливает поток и делает последний сброс"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self._interval):
+            self.flush()
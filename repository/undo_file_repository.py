@@ -1,53 +1,181 @@
+import fcntl
 import json
+import os
+import threading
+from contextlib import contextmanager
 from dataclasses import asdict
 from pathlib import Path
-from typing import Sequence
+from typing import BinaryIO, Iterator, Sequence
 
 from entity.undo import UndoRecord
 
+# строки журнала: пачка отмены или отметка, что последняя живая пачка снята
+ADD_PREFIX = b'{"add"'
+POP_LINE = b'{"pop": 1}\n'
+# журнал переписывается, когда мёртвых строк больше живых на COMPACT_MIN
+COMPACT_MIN = 64
 
-class UndoJsonRepository:
-    def __init__(self, path: str | Path):
+
+class UndoJournalRepository:
+    """Стек undo в журнале JSON lines: по строке на пачку или на pop.
+
+    add дописывает одну строку с пачкой, pop - строку-отметку, поэтому
+    цена записи зависит только от размера текущей пачки. В памяти
+    хранятся смещения живых пачек: last и pop читают одну строку.
+    Журнал общий для всех процессов shell (REPL, демон, -c), поэтому
+    каждая операция берёт flock и сверяет inode и размер файла с
+    запомненными: дописанное другим процессом дочитывается с места
+    остановки, журнал, заменённый сжатием, перечитывается целиком.
+    Когда мёртвых строк накапливается много, живые пачки переписываются
+    во временный файл, который заменяет журнал через os.replace: при
+    сбое остаётся старый или новый журнал целиком. Старый .undo.json
+    (legacy) переносится в журнал один раз.
+    """
+
+    def __init__(self, path: str | Path, legacy: str | Path | None = None):
         self.path = Path(path)
-        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._legacy = Path(legacy) if legacy is not None else None
+        self._lock = threading.Lock()
+        # смещения строк живых пачек; None - журнал ещё не прочитан
+        self._stack: list[int] | None = None
+        self._lines = 0
+        self._size = 0
+        self._ino = 0
 
     def add(self, record: Sequence[UndoRecord]) -> None:
-        data = self._read_raw()
-        batch = [asdict(r) for r in record]
-        data.append(batch)
-        self._write_raw(data)
+        line = json.dumps({'add': [asdict(r) for r in record]}, ensure_ascii=False)
+        with self._open() as (f, stack):
+            stack.append(self._size)
+            self._append(f, line.encode() + b'\n')
 
     def pop(self) -> Sequence[UndoRecord] | None:
-        data = self._read_raw()
-        if not data:
-            return None
-        batch_dicts = data.pop()
-        self._write_raw(data)
-        return tuple(self._from_dict(d) for d in batch_dicts)
+        with self._open() as (f, stack):
+            if not stack:
+                return None
+            batch = self._read_batch(f, stack.pop())
+            self._append(f, POP_LINE)
+            self._maybe_compact(f)
+            return batch
 
     def last(self) -> Sequence[UndoRecord] | None:
-        data = self._read_raw()
-        if not data:
-            return None
-        batch_dicts = data[-1]
-        return tuple(self._from_dict(d) for d in batch_dicts)
+        with self._open() as (f, stack):
+            return self._read_batch(f, stack[-1]) if stack else None
 
     def clear(self) -> None:
-        self._write_raw([])
+        with self._open() as (f, _):
+            self._rewrite([])
 
     def all(self) -> list[Sequence[UndoRecord]]:
-        data = self._read_raw()
-        return [tuple(self._from_dict(d) for d in batch) for batch in data]
-
-    def _read_raw(self) -> list[list[dict]]:
-        if not self.path.exists():
-            return []
-        with self.path.open('r', encoding='utf-8') as f:
-            return json.load(f)
-
-    def _write_raw(self, obj: list[list[dict]]) -> None:
-        with self.path.open('w', encoding='utf-8') as f:
-            json.dump(obj, f, ensure_ascii=False, indent=2)
+        with self._open() as (f, stack):
+            return [self._read_batch(f, offset) for offset in stack]
+
+    def compact(self) -> None:
+        """Переписывает журнал одними живыми пачками"""
+        with self._open() as (f, stack):
+            self._rewrite([self._read_line(f, offset) for offset in stack])
+
+    @contextmanager
+    def _open(self) -> Iterator[tuple[BinaryIO, list[int]]]:
+        """Журнал под flock и стек, сверенный с файлом на диске"""
+        with self._lock:
+            f = self._lock_journal()
+            try:
+                yield f, self._sync(f)
+            finally:
+                # закрытие снимает flock
+                f.close()
+
+    def _lock_journal(self) -> BinaryIO:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        while True:
+            f = self.path.open('a+b')
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                if os.stat(self.path).st_ino == os.fstat(f.fileno()).st_ino:
+                    return f
+            except FileNotFoundError:
+                pass
+            # пока ждали блокировку, другой процесс заменил журнал сжатием
+            f.close()
+
+    def _sync(self, f: BinaryIO) -> list[int]:
+        st = os.fstat(f.fileno())
+        if self._stack is None or st.st_ino != self._ino or st.st_size < self._size:
+            self._stack, self._lines, self._size = [], 0, 0
+            self._ino = st.st_ino
+            if st.st_size == 0 and self._legacy is not None:
+                self._migrate(f, self._legacy)
+        if os.fstat(f.fileno()).st_size != self._size:
+            self._scan(f)
+        return self._stack
+
+    def _scan(self, f: BinaryIO) -> None:
+        """Дочитывает журнал с запомненного места"""
+        stack = self._stack if self._stack is not None else []
+        f.seek(self._size)
+        for line in f:
+            if not line.endswith(b'\n'):
+                # строка оборвана при сбое: её пачка не записана
+                f.truncate(self._size)
+                break
+            if line.startswith(ADD_PREFIX):
+                stack.append(self._size)
+            elif stack:
+                stack.pop()
+            self._lines += 1
+            self._size += len(line)
+
+    def _migrate(self, f: BinaryIO, legacy: Path) -> None:
+        """Переносит стек из .undo.json в пустой журнал и удаляет старый файл"""
+        if not legacy.exists():
+            return
+        with legacy.open('r', encoding='utf-8') as src:
+            data = json.load(src)
+        f.writelines(
+            json.dumps({'add': batch}, ensure_ascii=False).encode() + b'\n'
+            for batch in data
+        )
+        f.flush()
+        os.fsync(f.fileno())
+        legacy.unlink()
+
+    def _append(self, f: BinaryIO, data: bytes) -> None:
+        f.write(data)
+        f.flush()
+        self._lines += 1
+        self._size += len(data)
+
+    @staticmethod
+    def _read_line(f: BinaryIO, offset: int) -> bytes:
+        f.seek(offset)
+        return f.readline()
+
+    def _read_batch(self, f: BinaryIO, offset: int) -> tuple[UndoRecord, ...]:
+        batch = json.loads(self._read_line(f, offset))['add']
+        return tuple(self._from_dict(d) for d in batch)
+
+    def _maybe_compact(self, f: BinaryIO) -> None:
+        stack = self._stack or []
+        if self._lines - len(stack) > len(stack) + COMPACT_MIN:
+            self._rewrite([self._read_line(f, offset) for offset in stack])
+
+    def _rewrite(self, lines: list[bytes]) -> None:
+        """Заменяет журнал строками lines. Вызывается последним в операции:
+        открытый журнал после замены указывает на старый файл"""
+        tmp = self.path.with_name(self.path.name + '.tmp')
+        with tmp.open('wb') as out:
+            out.writelines(lines)
+            out.flush()
+            os.fsync(out.fileno())
+            ino = os.fstat(out.fileno()).st_ino
+        os.replace(tmp, self.path)
+        self._stack = []
+        self._lines = self._size = 0
+        self._ino = ino
+        for line in lines:
+            self._stack.append(self._size)
+            self._lines += 1
+            self._size += len(line)
 
     @staticmethod
     def _from_dict(d: dict) -> UndoRecord:
@@ -8,6 +8,7 @@ from repository.command.cat import Cat
 from repository.command.cd import Cd
 from repository.command.cp import Cp
 from repository.command.grep import Grep
+from repository.command.head import Head
 from repository.command.ls import Ls
 from repository.command.mkdir import Mkdir
 from repository.command.mv import Mv
@@ -119,6 +120,11 @@ def grep() -> Grep:
     return Grep()
 
 
+@pytest.fixture
+def head() -> Head:
+    return Head()
+
+
 @pytest.fixture
 def undo_repo() -> UndoRepository:
     return InMemoryUndoRepository()
@@ -0,0 +1,54 @@
+import json
+
+from bench.run import NO_BASELINE, check_baseline, compare
+from bench.trees import make_deep, make_tiny, make_wide, tree_digest
+
+
+def test_trees_are_reproducible(tmp_path):
+    a = make_tiny(tmp_path / 'a', 25, 10)
+    b = make_tiny(tmp_path / 'b', 25, 10)
+    assert tree_digest(a) == tree_digest(b)
+    assert len(tree_digest(a)) == 25
+    assert (a / 'd0002' / 'f000024.txt').read_text() == (
+        b / 'd0002' / 'f000024.txt'
+    ).read_text()
+
+
+def test_deep_and_wide(tmp_path):
+    deep = make_deep(tmp_path / 'deep', 5)
+    assert (deep / 'level0/level1/level2/level3/level4/note.txt').exists()
+    assert len(tree_digest(make_wide(tmp_path / 'wide', 7))) == 7
+
+
+def _results(**medians):
+    return {
+        'results': {
+            k: {'median': v} if v is not None else {'skipped': 'budget'}
+            for k, v in medians.items()
+        }
+    }
+
+
+def test_compare_reports_slowdown_over_threshold():
+    baseline = _results(cp=1.0, grep=1.0, ls=1.0)
+    current = _results(cp=1.1, grep=1.5, ls=None)
+    regressions = compare(current, baseline, 0.2)
+    assert len(regressions) == 2
+    assert regressions[0].startswith('grep:')
+    assert regressions[1].startswith('ls: budget')
+
+
+def test_compare_ignores_new_and_skipped_baseline():
+    baseline = _results(cp=None)
+    current = _results(cp=5.0, zip=1.0)
+    assert compare(current, baseline, 0.2) == []
+
+
+def test_missing_or_foreign_baseline_is_an_error(tmp_path):
+    current = {'meta': {'scale': 'small'}, **_results(cp=1.0)}
+    path = tmp_path / 'baseline.json'
+    assert check_baseline(current, path, 0.2) == NO_BASELINE
+    path.write_text(json.dumps({'meta': {'scale': 'full'}, **_results(cp=1.0)}))
+    assert check_baseline(current, path, 0.2) == NO_BASELINE
+    path.write_text(json.dumps({'meta': {'scale': 'small'}, **_results(cp=0.5)}))
+    assert check_baseline(current, path, 0.2) == 1
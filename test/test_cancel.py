@@ -0,0 +1,170 @@
+import os
+import signal
+import threading
+import time
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from adapter.cli import INTERRUPTED, CLIAdapter
+from entity.cancel import CancelToken, cancel_scope, checkpoint
+from entity.context import CommandContext
+from entity.errors import CommandCancelledError
+from entity.undo import UndoRecord
+from repository.command.cp import Cp
+from repository.command.grep import Grep
+from repository.command.pwd import Pwd
+from repository.command.tar import Tar
+from repository.command.zip import Zip
+from repository.in_memory_history_repo import InMemoryHistory
+from repository.in_memory_undo_repo import InMemoryUndoRepository
+from usecase.pipeline import run_pipeline
+from usecase.shell import Shell
+
+
+class CancelAfter(CancelToken):
+    """Токен, который срабатывает на n-й проверке"""
+
+    def __init__(self, checks: int) -> None:
+        super().__init__()
+        self._left = checks
+
+    @property
+    def cancelled(self) -> bool:
+        self._left -= 1
+        return self._left < 0
+
+
+def _tree(root: Path, files: int) -> Path:
+    src = root / 'src'
+    (src / 'sub').mkdir(parents=True)
+    for i in range(files):
+        (src / ('sub' if i % 2 else '.') / f'f{i}').write_text(str(i))
+    return src
+
+
+def test_checkpoint_without_scope_is_noop():
+    checkpoint()
+    with cancel_scope(CancelToken()):
+        checkpoint()
+
+
+def test_cp_cancel_keeps_partial_undo(tmp_path, ctx: CommandContext):
+    ctx.pwd = str(tmp_path)
+    _tree(tmp_path, 10)
+    shell = Shell(InMemoryHistory(), InMemoryUndoRepository(), ctx, {'cp': Cp()})
+    with cancel_scope(CancelAfter(5)), pytest.raises(CommandCancelledError):
+        shell.run('cp', ['src', 'dst'], ['-r'])
+
+    batches = shell._undo_repo.all()
+    assert len(batches) == 1
+    copied = [Path(r.dst) for r in batches[0]]
+    assert 0 < len(copied) < 10
+    assert all(p.is_file() for p in copied)
+    assert shell._history_repo.last(1) == []
+
+
+def test_cp_direct_cancel_records(tmp_path, ctx: CommandContext):
+    ctx.pwd = str(tmp_path)
+    _tree(tmp_path, 4)
+    undo: list[UndoRecord] = []
+    token = CancelToken()
+    token.cancel()
+    with cancel_scope(token), pytest.raises(CommandCancelledError):
+        Cp().execute_with_undo(['src', 'dst'], ['-r'], ctx, undo)
+    assert undo == []
+
+
+@pytest.mark.parametrize(
+    'cmd, archive', [(Zip(), 'out.zip'), (Tar(), 'out.tgz')], ids=['zip', 'tar']
+)
+def test_archive_cancel_removes_partial(cmd, archive, tmp_path, ctx: CommandContext):
+    ctx.pwd = str(tmp_path)
+    _tree(tmp_path, 10)
+    with cancel_scope(CancelAfter(4)), pytest.raises(CommandCancelledError):
+        cmd.execute(['src', archive], ['-r'], ctx)
+    assert not (tmp_path / archive).exists()
+
+
+def test_grep_cancel_stops_walk(tmp_path, ctx: CommandContext):
+    ctx.pwd = str(tmp_path)
+    _tree(tmp_path, 10)
+    out = Grep().stream(['.', 'src'], ['-r'], ctx)
+    with cancel_scope(CancelAfter(3)), pytest.raises(CommandCancelledError):
+        list(out)
+
+
+def test_pipeline_stages_see_token():
+    def source(stdin) -> Iterator[str]:
+        while True:
+            checkpoint()
+            yield 'x'
+
+    token = CancelToken()
+    with cancel_scope(token), pytest.raises(CommandCancelledError):
+        for i, _ in enumerate(run_pipeline([source, lambda stdin: stdin])):
+            if i == 10:
+                token.cancel()
+
+
+def test_closed_reader_cancels_silent_stage():
+    stopped = threading.Event()
+
+    def scan(stdin) -> Iterator[str]:
+        # фильтр, который долго ничего не пишет: отмену он видит только в checkpoint
+        deadline = time.monotonic() + 5
+        try:
+            while time.monotonic() < deadline:
+                checkpoint()
+                time.sleep(0.001)
+        except CommandCancelledError:
+            stopped.set()
+            raise
+        yield 'late'
+
+    def head(stdin) -> Iterator[str]:
+        yield from ()
+
+    started = time.monotonic()
+    assert list(run_pipeline([scan, head])) == []
+    assert stopped.is_set()
+    assert time.monotonic() - started < 1
+
+
+class Interrupted:
+    """Команда, получающая Ctrl-C посреди работы"""
+
+    @property
+    def name(self) -> str:
+        return 'interrupted'
+
+    @property
+    def description(self) -> str:
+        return 'interrupted'
+
+    def stream(self, args, flags, ctx, stdin=None) -> Iterator[str]:
+        yield 'started'
+        os.kill(os.getpid(), signal.SIGINT)
+        while True:
+            checkpoint()
+
+    def execute(self, args, flags, ctx) -> str:
+        raise NotImplementedError
+
+
+def test_cli_ctrl_c_cancels_only_command(ctx: CommandContext, capsys):
+    cmds = [Interrupted(), Pwd()]
+    shell = Shell(
+        InMemoryHistory(),
+        InMemoryUndoRepository(),
+        ctx,
+        {c.name: c for c in cmds},
+    )
+    cli = CLIAdapter(shell)
+    previous = signal.getsignal(signal.SIGINT)
+
+    assert cli.execute('interrupted; pwd') == INTERRUPTED
+    assert capsys.readouterr().out == 'started\nКоманда прервана\n'
+    assert signal.getsignal(signal.SIGINT) is previous
+    assert cli.execute('pwd') == 0
@@ -1,3 +1,5 @@
+import os
+
 import pytest
 
 from entity.context import CommandContext
@@ -57,3 +59,26 @@ def test_cat_raises_on_second_arg_after_first_ok(cat: Cat, fs, ctx: CommandConte
 def test_cat_properties(cat: Cat):
     assert cat.name == 'cat'
     assert 'Выводит файлы' in cat.description
+
+
+def test_cat_stream_yields_lines_lazily(cat: Cat, fs, ctx: CommandContext):
+    fs.create_dir('/etc')
+    fs.create_file('/etc/a', contents='A1\nA2\n')
+    fs.create_dir('/photos')
+    out = cat.stream(['/etc/a', '/photos'], [], ctx)
+    assert next(out) == 'A1'
+    assert next(out) == 'A2'
+    with pytest.raises(DomainError):
+        next(out)
+
+
+def test_cat_write_to_copies_raw_bytes(cat: Cat, tmp_path, ctx: CommandContext):
+    ctx.pwd = str(tmp_path)
+    (tmp_path / 'a').write_bytes(b'A1\r\nA2')
+    (tmp_path / 'b').write_bytes(b'\xff\xfeB\n')
+    fd = os.open(tmp_path / 'out', os.O_WRONLY | os.O_CREAT)
+    try:
+        cat.write_to(['a', 'b'], [], ctx, fd)
+    finally:
+        os.close(fd)
+    assert (tmp_path / 'out').read_bytes() == b'A1\r\nA2\xff\xfeB\n'
@@ -0,0 +1,125 @@
+import threading
+
+import pytest
+
+from adapter.cli import CLIAdapter
+from entity.command import Command
+from entity.context import CommandContext
+from repository.command.cat import Cat
+from repository.command.cd import Cd
+from repository.command.cp import Cp
+from repository.command.exit import Exit
+from repository.command.grep import Grep
+from repository.command.pwd import Pwd
+from repository.in_memory_history_repo import InMemoryHistory
+from repository.in_memory_undo_repo import InMemoryUndoRepository
+from usecase.jobs import JobManager
+from usecase.shell import Shell
+
+
+@pytest.fixture
+def cli(tmp_path, ctx: CommandContext) -> CLIAdapter:
+    ctx.pwd = str(tmp_path)
+    cmds: list[Command] = [Cat(), Cd(), Grep(), Pwd(), Exit(), Cp()]
+    shell = Shell(
+        history=InMemoryHistory(),
+        undo_repo=InMemoryUndoRepository(),
+        context=ctx,
+        commands={c.name: c for c in cmds},
+    )
+    return CLIAdapter(shell)
+
+
+def test_redirect_truncates_and_appends(cli: CLIAdapter, tmp_path, capsys):
+    (tmp_path / 'log').write_text('ERROR a\nINFO b\nERROR c\n')
+    (tmp_path / 'out').write_text('old\n')
+    cli.execute('grep ERROR log > out')
+    cli.execute('pwd >> out')
+    assert (tmp_path / 'out').read_text().splitlines() == [
+        f'{tmp_path}/log:1:ERROR a',
+        f'{tmp_path}/log:3:ERROR c',
+        str(tmp_path),
+    ]
+    assert capsys.readouterr().out == ''
+
+
+def test_redirect_cat_keeps_bytes(cli: CLIAdapter, tmp_path):
+    (tmp_path / 'a').write_bytes(b'one\r\n')
+    (tmp_path / 'b').write_bytes(b'two')
+    cli.execute('cat a b > out')
+    cli.execute('cat a >> out')
+    assert (tmp_path / 'out').read_bytes() == b'one\r\ntwoone\r\n'
+
+
+def test_redirect_pipeline(cli: CLIAdapter, tmp_path):
+    (tmp_path / 'log').write_text('x1\ny\nx2\n')
+    cli.execute('cat log | grep x > out')
+    assert (tmp_path / 'out').read_text() == 'x1\nx2\n'
+
+
+def test_redirect_into_directory_is_error(cli: CLIAdapter, tmp_path, capsys):
+    (tmp_path / 'dir').mkdir()
+    assert cli.execute('pwd > dir') == 1
+    assert 'Нельзя записать' in capsys.readouterr().out
+
+
+def test_execute_sequencing(cli: CLIAdapter, tmp_path, capsys):
+    assert cli.execute('cat nope && pwd; pwd || cat nope') == 0
+    out = capsys.readouterr().out.splitlines()
+    assert out[1:] == [str(tmp_path)]
+    assert cli.execute('cat nope || pwd') == 0
+    assert cli.execute('pwd && cat nope') == 1
+
+
+def test_run_script_stops_on_exit(cli: CLIAdapter, tmp_path, capsys):
+    status = cli.run_script(['# comment', '', 'pwd', 'exit', 'pwd'])
+    assert status == 0
+    assert capsys.readouterr().out.splitlines() == [str(tmp_path)]
+
+
+def test_background_jobs_push_undo_on_completion(cli: CLIAdapter, tmp_path, capsys):
+    for name in 'ab':
+        (tmp_path / name).write_text(name)
+    assert cli.execute('cp a a2 & cp b b2 &') == 0
+    assert capsys.readouterr().out == '[1] cp a a2\n[2] cp b b2\n'
+    outputs = [cli.jobs.wait(job) for job in cli.jobs.all()]
+    assert outputs == ['cp: скопировано 1 объектов'] * 2
+    batches = cli.shell._undo_repo.all()
+    assert sorted(b[0].dst for b in batches) == [
+        str(tmp_path / 'a2'),
+        str(tmp_path / 'b2'),
+    ]
+
+
+def test_finished_jobs_report_status(cli: CLIAdapter, tmp_path, capsys):
+    (tmp_path / 'a').write_text('hello\n')
+    cli.execute('cat a & cat nope &')
+    for job in cli.jobs.all():
+        job.future.exception()
+    capsys.readouterr()
+    cli._report_finished_jobs()
+    out = capsys.readouterr().out.splitlines()
+    assert out[:2] == ['[1] готово: cat a', 'hello']
+    assert out[2] == '[2] Exit 1: cat nope'
+    assert len(out) == 4
+    assert cli.jobs.all() == []
+
+
+def test_background_job_keeps_context_of_start(cli: CLIAdapter, tmp_path, capsys):
+    (tmp_path / 'a').write_text('top\n')
+    (tmp_path / 'sub').mkdir()
+    (tmp_path / 'sub' / 'a').write_text('sub\n')
+    jobs = JobManager(max_workers=1)
+    bg = CLIAdapter(cli.shell, jobs)
+    # задание ждёт в очереди, пока shell уже сменил каталог
+    release = threading.Event()
+    jobs.submit('block', lambda: str(release.wait()))
+    bg.execute('cat a &')
+    bg.execute('cd sub')
+    bg.execute('cd .. &')
+    release.set()
+    jobs.shutdown()
+    capsys.readouterr()
+    bg._report_finished_jobs()
+    assert 'top' in capsys.readouterr().out.splitlines()
+    assert cli.shell.pwd == str(tmp_path / 'sub')
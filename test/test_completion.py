@@ -0,0 +1,76 @@
+import os
+
+import pytest
+
+from adapter.completion import Completer, DirectoryIndex
+from entity.command import Command
+from entity.context import CommandContext
+from repository.command.cat import Cat
+from repository.command.cd import Cd
+from repository.command.cp import Cp
+from repository.command.pwd import Pwd
+from repository.in_memory_history_repo import InMemoryHistory
+from repository.in_memory_undo_repo import InMemoryUndoRepository
+from usecase.shell import Shell
+
+
+@pytest.fixture
+def completer(tmp_path, ctx: CommandContext) -> Completer:
+    ctx.pwd = str(tmp_path)
+    (tmp_path / 'src').mkdir()
+    (tmp_path / 'src' / 'main.py').touch()
+    (tmp_path / 'setup.py').touch()
+    (tmp_path / '.hidden').touch()
+    cmds: list[Command] = [Cat(), Cd(), Cp(), Pwd()]
+    shell = Shell(
+        history=InMemoryHistory(),
+        undo_repo=InMemoryUndoRepository(),
+        context=ctx,
+        commands={c.name: c for c in cmds},
+    )
+    return Completer(shell)
+
+
+def test_command_names(completer: Completer):
+    assert completer.candidates('', 'c') == ['cat', 'cd', 'cp']
+    assert completer.candidates('ls src | ', 'p') == ['profile', 'pwd']
+    assert completer.candidates('time -v ', 'cd') == ['cd']
+
+
+def test_paths(completer: Completer, tmp_path):
+    assert completer.candidates('cat ', 's') == ['setup.py', 'src/']
+    assert completer.candidates('cat ', 'src/') == ['src/main.py']
+    assert completer.candidates('cat ', '.h') == ['.hidden']
+    assert completer.candidates('cat ', f'{tmp_path}/se') == [f'{tmp_path}/setup.py']
+    assert completer.candidates('cat ', 'missing/') == []
+
+
+def test_listing_is_cached_until_mtime_changes(tmp_path, monkeypatch):
+    for name in ('b', 'a', 'ab', 'c'):
+        (tmp_path / name).touch()
+    index = DirectoryIndex()
+    scans = []
+    real = os.scandir
+    monkeypatch.setattr(os, 'scandir', lambda p: scans.append(p) or real(p))
+
+    assert index.complete(str(tmp_path), 'a') == [('a', False), ('ab', False)]
+    assert index.complete(str(tmp_path), 'b') == [('b', False)]
+    assert len(scans) == 1
+
+    (tmp_path / 'ac').mkdir()
+    st = os.stat(tmp_path)
+    os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns + 1_000_000_000))
+    assert index.complete(str(tmp_path), 'a') == [
+        ('a', False),
+        ('ab', False),
+        ('ac', True),
+    ]
+    assert len(scans) == 2
+
+
+def test_cache_is_bounded(tmp_path):
+    index = DirectoryIndex(max_dirs=2)
+    for name in ('x', 'y', 'z'):
+        (tmp_path / name).mkdir()
+        index.complete(str(tmp_path / name), '')
+    assert list(index._cache) == [str(tmp_path / 'y'), str(tmp_path / 'z')]
@@ -5,6 +5,7 @@ import pytest
 from entity.command import Command
 from entity.context import CommandContext
 from entity.errors import ValidationError
+from entity.undo import UndoRecord
 
 
 def test_cp_r_dir_to_new_path_creates_root(cp: Command, fs, ctx: CommandContext):
@@ -68,12 +69,12 @@ def test_cp_r_overwrite_with_undo_records(cp: Command, fs, ctx: CommandContext):
     fs.create_dir('/backup/photos')
     fs.create_file('/backup/photos/photo1.png', contents='OLD1')
 
-    cp.execute(['/photos', '/backup'], ['-r'], ctx)
+    undo: list[UndoRecord] = []
+    cp.execute_with_undo(['/photos', '/backup'], ['-r'], ctx, undo)
 
     assert Path('/backup/photos/photo1.png').read_text() == 'SRC1'
     assert Path('/backup/photos/my.png').read_text() == 'SRC2'
 
-    undo = getattr(cp, 'undo')()
     copied_targets = {u.dst for u in undo}
     assert '/backup/photos/photo1.png' in copied_targets
     assert '/backup/photos/my.png' in copied_targets
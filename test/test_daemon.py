@@ -0,0 +1,216 @@
+import gc
+import io
+import json
+import os
+import socket
+import threading
+import time
+from typing import Iterator
+
+import pytest
+
+from adapter.client import parse_argv, request
+from adapter.daemon import ShellServer, _FrameWriter
+from entity.command import Command
+from entity.context import CommandContext
+from repository.command.cat import Cat
+from repository.command.cd import Cd
+from repository.command.exit import Exit
+from repository.command.jobs import Jobs
+from repository.command.pwd import Pwd
+from repository.command.rm import Rm
+from repository.command.wait import Wait
+from repository.in_memory_history_repo import InMemoryHistory
+from repository.in_memory_undo_repo import InMemoryUndoRepository
+from usecase.jobs import JobManager
+from usecase.shell import Shell
+
+
+class Slow:
+    """Команда, которая выводит строку и ждёт, пока её отпустят"""
+
+    def __init__(self) -> None:
+        self.release = threading.Event()
+
+    @property
+    def name(self) -> str:
+        return 'slow'
+
+    @property
+    def description(self) -> str:
+        return 'slow'
+
+    def stream(self, args, flags, ctx, stdin=None) -> Iterator[str]:
+        yield 'first'
+        self.release.wait(5)
+        yield 'second'
+
+    def execute(self, args, flags, ctx) -> str:
+        return '\n'.join(self.stream(args, flags, ctx))
+
+
+@pytest.fixture
+def slow() -> Slow:
+    return Slow()
+
+
+@pytest.fixture
+def server(tmp_path, ctx: CommandContext, slow: Slow):
+    ctx.pwd = str(tmp_path)
+    # общий менеджер команд - только запасной: у каждого соединения свои задания
+    jobs = JobManager()
+    cmds: list[Command] = [
+        Cat(),
+        Cd(),
+        Pwd(),
+        Exit(),
+        Rm(tmp_path / '.trash'),
+        Jobs(jobs),
+        Wait(jobs),
+        slow,
+    ]
+    shell = Shell(
+        history=InMemoryHistory(),
+        undo_repo=InMemoryUndoRepository(),
+        context=ctx,
+        commands={c.name: c for c in cmds},
+    )
+    srv = ShellServer(str(tmp_path / 'shell.sock'), shell)
+    thread = threading.Thread(target=srv.serve_forever)
+    thread.start()
+    yield srv
+    srv.shutdown()
+    srv.server_close()
+    thread.join()
+    jobs.shutdown()
+
+
+def _call(srv: ShellServer, line: str, cwd: str) -> tuple[int, str]:
+    out = io.StringIO()
+    status = request(srv.server_address, line, out, cwd)
+    return status, out.getvalue()
+
+
+def test_each_connection_has_own_context(server: ShellServer, tmp_path):
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'b').mkdir()
+    assert _call(server, 'pwd', str(tmp_path / 'a')) == (0, f'{tmp_path / "a"}\n')
+    assert _call(server, 'cd ..; pwd', str(tmp_path / 'b')) == (0, f'{tmp_path}\n')
+    # cd клиента не меняет контекст демона
+    assert server.shell.pwd == str(tmp_path)
+
+
+def test_status_and_errors_are_forwarded(server: ShellServer, tmp_path):
+    (tmp_path / 'f').write_text('x\ny\n')
+    assert _call(server, 'cat f', str(tmp_path)) == (0, 'x\ny\n')
+    status, out = _call(server, 'cat missing', str(tmp_path))
+    assert status == 1 and out
+    assert _call(server, 'nope', str(tmp_path))[0] == 1
+
+
+def test_confirmation_without_terminal_fails(server: ShellServer, tmp_path):
+    target = tmp_path / 'f'
+    target.write_text('x')
+    status, out = _call(server, 'rm f && pwd', str(tmp_path))
+    assert status == 1
+    assert 'rm -y' in out
+    assert target.exists()
+    status, out = _call(server, 'rm -y f && pwd', str(tmp_path))
+    assert status == 0 and out.endswith(f'{tmp_path}\n')
+    assert not target.exists()
+
+
+def test_socket_is_private_and_removed(server: ShellServer):
+    path = server.server_address
+    assert os.stat(path).st_mode & 0o077 == 0
+    server.server_close()
+    assert not os.path.exists(path)
+
+
+def test_live_daemon_is_not_replaced(server: ShellServer):
+    with pytest.raises(OSError):
+        ShellServer(server.server_address, server.shell)
+
+
+def test_parse_argv_quotes_words():
+    assert parse_argv(['-s', '/s', 'grep', 'a b', 'f']) == ('/s', "grep 'a b' f")
+    assert parse_argv(['-s', '/s', '-c', 'ls; pwd']) == ('/s', 'ls; pwd')
+
+
+def test_json_output_over_socket(server: ShellServer, tmp_path):
+    out = io.StringIO()
+    status = request(server.server_address, 'pwd', out, str(tmp_path), json_output=True)
+    assert status == 0
+    assert json.loads(out.getvalue()) == {'type': 'text', 'text': str(tmp_path)}
+
+
+def test_client_disconnect_mid_stream(server: ShellServer, tmp_path, monkeypatch):
+    errors = []
+    closed = threading.Event()
+    shutdown_request = server.shutdown_request
+
+    def on_close(request) -> None:
+        shutdown_request(request)
+        closed.set()
+
+    monkeypatch.setattr(server, 'handle_error', lambda *a: errors.append(a))
+    monkeypatch.setattr(server, 'shutdown_request', on_close)
+    (tmp_path / 'big').write_text('line\n' * 200_000)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(server.server_address)
+        sock.sendall(json.dumps({'line': 'cat big', 'cwd': str(tmp_path)}).encode())
+        sock.sendall(b'\n')
+        sock.recv(1)
+    assert closed.wait(5)
+    assert errors == []
+    # демон жив и принимает следующих клиентов
+    assert _call(server, 'pwd', str(tmp_path)) == (0, f'{tmp_path}\n')
+
+
+@pytest.mark.filterwarnings('error::pytest.PytestUnraisableExceptionWarning')
+def test_frame_writer_collected_after_close():
+    wfile = io.BufferedWriter(io.BytesIO())
+    out = _FrameWriter(wfile)
+    out.write('x')
+    wfile.close()
+    del out
+    gc.collect()
+
+
+def test_output_streams_before_command_ends(server: ShellServer, slow: Slow, tmp_path):
+    out = io.StringIO()
+    client = threading.Thread(
+        target=request, args=(server.server_address, 'slow', out, str(tmp_path))
+    )
+    client.start()
+    deadline = time.monotonic() + 5
+    while not out.getvalue() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert out.getvalue() == 'first\n'
+    slow.release.set()
+    client.join(5)
+    assert out.getvalue() == 'first\nsecond\n'
+
+
+def test_frame_writer_batches_fast_output():
+    raw = io.BytesIO()
+    out = _FrameWriter(io.BufferedWriter(raw))
+    out.write('a\n')
+    for _ in range(1000):
+        out.write('b\n')
+    # первая строка ушла сразу, остальные ждут таймера одним кадром
+    assert len(raw.getvalue().splitlines()) == 1
+    time.sleep(0.2)
+    frames = [json.loads(f) for f in raw.getvalue().splitlines()]
+    assert frames == [{'out': 'a\n'}, {'out': 'b\n' * 1000}]
+
+
+def test_each_connection_has_own_jobs(server: ShellServer, slow: Slow, tmp_path):
+    status, out = _call(server, 'slow &\njobs', str(tmp_path))
+    assert status == 0
+    assert out.splitlines()[0] == '[1] slow'
+    assert out.splitlines()[1].startswith('[1] выполняется ')
+    # другой клиент не видит и не забирает чужие задания
+    assert _call(server, 'jobs', str(tmp_path)) == (0, '')
+    assert _call(server, 'wait', str(tmp_path)) == (0, '')
+    slow.release.set()
@@ -0,0 +1,107 @@
+import io
+import os
+
+import pytest
+
+from adapter import globbing
+from adapter.cli import CLIAdapter
+from adapter.globbing import expand_args, iglob
+from adapter.parser import GlobWord, parse_pipeline, tokenize
+from entity.command import Command
+from entity.context import CommandContext
+from repository.command.cat import Cat
+from repository.command.cd import Cd
+from repository.command.ls import Ls
+from repository.in_memory_history_repo import InMemoryHistory
+from repository.in_memory_undo_repo import InMemoryUndoRepository
+from usecase.shell import Shell
+
+
+@pytest.fixture
+def tree(tmp_path, ctx: CommandContext) -> CommandContext:
+    ctx.pwd = str(tmp_path)
+    for path in (
+        'a.txt',
+        'b.txt',
+        'c.log',
+        '.hidden.txt',
+        'src/main.py',
+        'src/util.py',
+        'src/pkg/deep.py',
+        'src/.cache/x.py',
+        'docs/index.md',
+    ):
+        (tmp_path / path).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / path).write_text(path)
+    return ctx
+
+
+def _glob(pattern: str, ctx: CommandContext) -> list[str]:
+    return list(iglob(pattern, ctx))
+
+
+def test_tokenize_marks_only_unquoted_patterns():
+    words = parse_pipeline(tokenize('ls *.txt "*.log" a\\*b plain')).stages[0].args
+    assert [isinstance(w, GlobWord) for w in words] == [True, False, False, False]
+    assert words[0].pattern == '*.txt'
+    # кавычки и экранирование снимают шаблон только со своих символов
+    word = parse_pipeline(tokenize('ls "a b"*')).stages[0].args[0]
+    assert isinstance(word, GlobWord)
+    assert word == 'a b*'
+
+
+def test_wildcards(tree: CommandContext):
+    assert _glob('*.txt', tree) == ['a.txt', 'b.txt']
+    assert _glob('?.log', tree) == ['c.log']
+    assert _glob('[ab].*', tree) == ['a.txt', 'b.txt']
+    assert _glob('src/*.py', tree) == ['src/main.py', 'src/util.py']
+    assert _glob('*/', tree) == ['docs/', 'src/']
+    assert _glob('.*.txt', tree) == ['.hidden.txt']
+
+
+def test_globstar(tree: CommandContext):
+    assert _glob('**/*.py', tree) == [
+        'src/main.py',
+        'src/pkg/deep.py',
+        'src/util.py',
+    ]
+    assert _glob('src/**/deep.py', tree) == ['src/pkg/deep.py']
+    assert _glob('**/**/index.md', tree) == ['docs/index.md']
+
+
+def test_absolute_and_home(tree: CommandContext, tmp_path):
+    assert _glob(f'{tmp_path}/*.log', tree) == [f'{tmp_path}/c.log']
+    tree.home = str(tmp_path / 'src')
+    assert _glob('~/*.py', tree) == [
+        f'{tmp_path}/src/main.py',
+        f'{tmp_path}/src/util.py',
+    ]
+
+
+def test_no_match_keeps_literal(tree: CommandContext):
+    args = parse_pipeline(tokenize('ls *.none *.log')).stages[0].args
+    assert expand_args(args, tree) == ['*.none', 'c.log']
+
+
+def test_prunes_non_matching_directories(tree: CommandContext, tmp_path, monkeypatch):
+    scanned = []
+    real = os.scandir
+    monkeypatch.setattr(globbing.os, 'scandir', lambda p: scanned.append(p) or real(p))
+    assert _glob('s*/pkg/*.py', tree) == ['src/pkg/deep.py']
+    # docs не подходит под s*, а pkg читается без scandir src
+    assert scanned == [str(tmp_path), str(tmp_path / 'src' / 'pkg')]
+
+
+def test_cli_expands_after_cd(tree: CommandContext):
+    cmds: list[Command] = [Cat(), Cd(), Ls()]
+    shell = Shell(
+        history=InMemoryHistory(),
+        undo_repo=InMemoryUndoRepository(),
+        context=tree,
+        commands={c.name: c for c in cmds},
+    )
+    out = io.StringIO()
+    CLIAdapter(shell, out=out).execute('cd src; cat *.py')
+    assert out.getvalue().splitlines() == ['src/main.py', 'src/util.py']
+    # в историю попадает шаблон, а не список найденных файлов
+    assert shell.history_command(1).rstrip() == 'cd src; cat *.py'
@@ -3,6 +3,7 @@ import pytest
 from entity.command import Command
 from entity.context import CommandContext
 from entity.errors import ValidationError
+from repository.command.grep import Grep
 from test.conftest import setup_tree
 
 
@@ -87,3 +88,13 @@ def test_grep_invalid_args(invalid_args, grep: Command, fs, ctx: CommandContext)
     setup_tree(fs, ctx)
     with pytest.raises(ValidationError):
         grep.execute(invalid_args, [], ctx)
+
+
+def test_grep_stream_yields_first_match_before_scan_ends(
+    grep: Grep, fs, ctx: CommandContext
+):
+    _setup_fs_for_grep(fs, ctx)
+    out = grep.stream(['hello', '/vfs/home/test/file1.txt', '/nonexistent'], [], ctx)
+    assert next(out) == '/vfs/home/test/file1.txt:2:hello again'
+    with pytest.raises(ValidationError):
+        next(out)
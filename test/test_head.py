@@ -0,0 +1,35 @@
+import pytest
+
+from entity.command import Command
+from entity.context import CommandContext
+from entity.errors import DomainError, ValidationError
+from test.conftest import setup_tree
+
+
+def test_head_default_ten_lines(head: Command, fs, ctx: CommandContext):
+    setup_tree(fs, ctx)
+    fs.create_file('/vfs/log', contents='\n'.join(str(i) for i in range(20)))
+    assert head.execute(['/vfs/log'], [], ctx) == '\n'.join(str(i) for i in range(10))
+
+
+def test_head_n_lines(head: Command, fs, ctx: CommandContext):
+    setup_tree(fs, ctx)
+    fs.create_file('/vfs/log', contents='a\nb\nc\n')
+    assert head.execute(['2', '/vfs/log'], [], ctx) == 'a\nb'
+
+
+def test_head_reads_stdin_without_draining_it(head, ctx: CommandContext):
+    source = iter(['1', '2', '3', '4'])
+    assert list(head.stream(['2'], [], ctx, source)) == ['1', '2']
+    assert next(source) == '3'
+
+
+def test_head_requires_input(head: Command, ctx: CommandContext):
+    with pytest.raises(ValidationError):
+        head.execute(['5'], [], ctx)
+
+
+def test_head_missing_file(head: Command, fs, ctx: CommandContext):
+    setup_tree(fs, ctx)
+    with pytest.raises(DomainError):
+        head.execute(['/vfs/nope'], [], ctx)
@@ -0,0 +1,333 @@
+import io
+import os
+from typing import Iterator
+
+import pytest
+
+import main
+from adapter.cli import CLIAdapter
+from entity.command import Command
+from entity.context import CommandContext
+from entity.errors import ValidationError
+from repository.command import history as history_mod
+from repository.command.cat import Cat
+from repository.command.grep import Grep
+from repository.command.history import History
+from repository.command.pwd import Pwd
+from repository.command.whoami import WhoAmI
+from repository.history_file_repository import HistoryFileRepository
+from repository.in_memory_undo_repo import InMemoryUndoRepository
+from usecase.shell import Shell
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / 'state' / '.history'
+
+
+def test_numbers_continue_after_reopen(path):
+    repo = HistoryFileRepository(path)
+    repo.add('ls', ['src'], ['-l'])
+    repo.add('pwd', [], [])
+    repo.close()
+
+    repo = HistoryFileRepository(path)
+    repo.add('cd', ['..'], [])
+    assert repo.all() == ['1 ls -l src', '2 pwd', '3 cd ..']
+    assert repo.last(2) == ['2 pwd', '3 cd ..']
+    repo.clear()
+    repo.add('whoami', [], [])
+    assert repo.all() == ['1 whoami']
+    repo.close()
+
+
+def test_index_checked_once(path, monkeypatch):
+    first = HistoryFileRepository(path)
+    first.add('pwd', [], [])
+    first.close()
+    repo = HistoryFileRepository(path)
+    checks = []
+    real = repo._check_index
+    monkeypatch.setattr(repo, '_check_index', lambda: checks.append(1) or real())
+    for i in range(5):
+        repo.add('cat', [str(i)], [])
+    assert repo.last(1) == ['6 cat 4']
+    assert checks == [1]
+    repo.close()
+
+
+def test_two_writers_share_numbering(path):
+    a = HistoryFileRepository(path)
+    b = HistoryFileRepository(path)
+    a.add('ls', [], [])
+    b.add('pwd', [], [])
+    a.add('cat', [], [])
+    b.add('cd', [], [])
+    assert a.all() == ['1 ls', '2 pwd', '3 cat', '4 cd']
+    assert a.last(2) == ['3 cat', '4 cd']
+    assert b.get(3) == 'cat'
+    assert a.search('c') == [(4, 'cd'), (3, 'cat')]
+    b.add('cp', [], [])
+    assert a.search('c') == [(5, 'cp'), (4, 'cd'), (3, 'cat')]
+    a.close()
+    b.close()
+
+
+def test_writer_sees_seal_by_other(path):
+    a = HistoryFileRepository(path, segment_lines=3)
+    b = HistoryFileRepository(path, segment_lines=3)
+    a.add('echo', ['1'], [])
+    assert b.count() == 1
+    for i in range(2, 5):
+        a.add('echo', [str(i)], [])
+    b.add('echo', ['5'], [])
+    assert b.all() == [f'{i} echo {i}' for i in range(1, 6)]
+    assert a.last(2) == ['4 echo 4', '5 echo 5']
+    a.close()
+    b.close()
+
+
+def test_entries_and_get(path):
+    repo = HistoryFileRepository(path, flush_every=0)
+    for i in range(1, 11):
+        repo.add('echo', [f'{i}'], [])
+    assert repo.count() == 10
+    assert repo.entries(3, 5) == ['3 echo 3', '4 echo 4', '5 echo 5']
+    assert repo.entries(9, 20) == ['9 echo 9', '10 echo 10']
+    assert repo.entries(11, 12) == []
+    assert repo.get(7) == 'echo 7'
+    assert repo.get(0) is None
+    assert repo.get(11) is None
+    repo.close()
+
+
+def test_index_rebuilt_when_missing_or_stale(path):
+    repo = HistoryFileRepository(path)
+    for name in ('ls', 'pwd'):
+        repo.add(name, [], [])
+    repo.close()
+    repo.index_path.unlink()
+    repo = HistoryFileRepository(path)
+    assert repo.entries(2, 2) == ['2 pwd']
+    repo.close()
+
+    # .history дописан без индекса: последнее смещение уже не на последней строке
+    with path.open('a', encoding='utf-8') as f:
+        f.write('3 cd ..\n')
+    repo = HistoryFileRepository(path)
+    assert repo.get(3) == 'cd ..'
+    repo.add('whoami', [], [])
+    assert repo.last(2) == ['3 cd ..', '4 whoami']
+
+    # оборванная при сбое строка
+    repo.close()
+    with path.open('a', encoding='utf-8') as f:
+        f.write('5 cat')
+    repo = HistoryFileRepository(path)
+    repo.add('head', [], [])
+    assert repo.last(2) == ['5 cat', '6 head']
+    repo.close()
+
+
+def test_flush_every_n(path):
+    repo = HistoryFileRepository(path, flush_every=3)
+    repo.add('a', [], [])
+    repo.add('b', [], [])
+    # отложенные команды ещё в памяти: файл не создан
+    assert not path.exists()
+    repo.add('c', [], [])
+    assert path.read_text().splitlines() == ['1 a', '2 b', '3 c']
+    repo.close()
+
+
+def test_flush_on_exit_only(path):
+    repo = HistoryFileRepository(path, flush_every=0)
+    for name in ('a', 'b'):
+        repo.add(name, [], [])
+    # отложенные команды ещё в памяти: файл не создан
+    assert not path.exists()
+    # чтение через репозиторий видит отложенные записи
+    assert repo.last(1) == ['2 b']
+    repo.close()
+    assert path.read_text().splitlines() == ['1 a', '2 b']
+
+
+def test_fsync_after_flush(path, monkeypatch):
+    synced = []
+    monkeypatch.setattr(os, 'fsync', synced.append)
+    repo = HistoryFileRepository(path, flush_every=2, fsync=True)
+    repo.add('a', [], [])
+    assert synced == []
+    repo.add('b', [], [])
+    # .history и .history.idx
+    assert len(synced) == 2
+    repo.add('c', [], [])
+    repo.close()
+    assert len(synced) == 4
+
+
+@pytest.fixture
+def history_shell(path, ctx: CommandContext) -> Iterator[Shell]:
+    repo = HistoryFileRepository(path)
+    cmds: list[Command] = [History(repo), Pwd(), WhoAmI(), Cat(), Grep()]
+    yield Shell(
+        history=repo,
+        undo_repo=InMemoryUndoRepository(),
+        context=ctx,
+        commands={c.name: c for c in cmds},
+    )
+    repo.close()
+
+
+def test_history_ranges_and_pages(history_shell: Shell, monkeypatch):
+    monkeypatch.setattr(history_mod, 'PAGE_SIZE', 3)
+    for _ in range(7):
+        history_shell.run('pwd', [], [])
+    assert history_shell.run('history', ['2-3'], []) == '2 pwd\n3 pwd'
+    assert history_shell.run('history', ['2'], []).splitlines() == [
+        '7 pwd',
+        '8 history 2-3',
+    ]
+    # страница 1 - самые новые записи
+    page = history_shell.run('history', ['1'], ['-p']).splitlines()
+    assert [line.split()[0] for line in page] == ['7', '8', '9']
+    page = history_shell.run('history', ['3'], ['-p']).splitlines()
+    assert [line.split()[0] for line in page] == ['2', '3', '4']
+    assert len(history_shell.run('history', [], []).splitlines()) == 11
+    with pytest.raises(ValidationError):
+        history_shell.run('history', ['a-b'], [])
+
+
+def test_bang_reruns_entry(history_shell: Shell, ctx: CommandContext):
+    out = io.StringIO()
+    cli = CLIAdapter(history_shell, out=out)
+    cli.execute('whoami')
+    cli.execute('pwd')
+    assert cli.execute('!1') == 0
+    assert out.getvalue().splitlines()[-2:] == ['whoami', ctx.user]
+    assert cli.execute('!99') == 1
+    assert history_shell.history_command(3) == 'whoami'
+
+
+def test_bang_replays_line_as_typed(history_shell: Shell, tmp_path):
+    src = tmp_path / 'a b.txt'
+    src.write_text('hello\nworld\n')
+    res = tmp_path / 'res.txt'
+    out = io.StringIO()
+    cli = CLIAdapter(history_shell, out=out)
+    cli.execute(f'cat "{src}"')
+    cli.execute(f'cat "{src}" | grep wor > {res}')
+    assert history_shell.history_command(2) == f'cat "{src}" | grep wor > {res}'
+
+    res.unlink()
+    out.truncate(0)
+    assert cli.execute('!1') == 0
+    assert 'hello' in out.getvalue()
+    assert cli.execute('!2') == 0
+    assert res.read_text() == 'world\n'
+    assert history_shell.history_command(4) == f'cat "{src}" | grep wor > {res}'
+
+
+def _segment_names(path) -> list[str]:
+    return sorted(p.name for p in path.parent.glob('.history.*.gz'))
+
+
+def test_segments_rotate_and_read_across(path):
+    repo = HistoryFileRepository(path, segment_lines=3)
+    for i in range(1, 9):
+        repo.add('echo', [str(i)], [])
+    assert _segment_names(path) == ['.history.1-3.gz', '.history.4-6.gz']
+    assert path.read_text().splitlines() == ['7 echo 7', '8 echo 8']
+    assert repo.count() == 8
+    assert repo.entries(3, 7) == [f'{i} echo {i}' for i in range(3, 8)]
+    assert repo.get(2) == 'echo 2'
+    assert repo.all() == [f'{i} echo {i}' for i in range(1, 9)]
+    assert repo.search('echo 5') == [(5, 'echo 5')]
+
+    # новая сессия: нумерация продолжается после сегментов
+    repo.close()
+    repo = HistoryFileRepository(path, segment_lines=3)
+    repo.add('pwd', [], [])
+    assert repo.last(2) == ['8 echo 8', '9 pwd']
+    assert _segment_names(path)[-1] == '.history.7-9.gz'
+    repo.close()
+
+
+def test_reopen_after_seal_reads_first(path):
+    repo = HistoryFileRepository(path, segment_lines=3)
+    for i in range(1, 12):
+        repo.add('echo', [str(i)], [])
+    repo.close()
+
+    repo = HistoryFileRepository(path, segment_lines=3)
+    assert repo.last(3) == ['9 echo 9', '10 echo 10', '11 echo 11']
+    repo.close()
+    repo = HistoryFileRepository(path, segment_lines=3)
+    assert repo.count() == 11
+    assert repo.get(10) == 'echo 10'
+    repo.close()
+
+
+def test_last_reads_only_needed_segments(path, monkeypatch):
+    repo = HistoryFileRepository(path, segment_lines=2)
+    for i in range(1, 8):
+        repo.add('echo', [str(i)], [])
+    read = []
+    real = repo._segments.lines
+    monkeypatch.setattr(
+        repo._segments, 'lines', lambda seg: read.append(seg.first) or real(seg)
+    )
+    assert repo.last(2) == ['6 echo 6', '7 echo 7']
+    assert read == [5]
+    repo.close()
+
+
+def test_retention(path):
+    repo = HistoryFileRepository(path, segment_lines=2, keep=2)
+    for i in range(1, 10):
+        repo.add('echo', [str(i)], [])
+    assert _segment_names(path) == ['.history.5-6.gz', '.history.7-8.gz']
+    assert repo.count() == 9
+    assert repo.entries(1, 6) == ['5 echo 5', '6 echo 6']
+
+    # сегменты старше keep_days удаляются при следующем открытии
+    old = path.with_name('.history.5-6.gz')
+    os.utime(old, (0, 0))
+    repo.close()
+    repo = HistoryFileRepository(path, segment_lines=2, keep_days=1)
+    assert repo.all() == ['7 echo 7', '8 echo 8', '9 echo 9']
+    assert not old.exists()
+    repo.close()
+
+
+def test_segments_kept_by_default(path):
+    # удаление истории только по явной настройке
+    assert main.parse_args([]).history_keep == 0
+    assert main.parse_args([]).history_keep_days == 0
+    repo = HistoryFileRepository(path, segment_lines=2)
+    for i in range(1, 30):
+        repo.add('echo', [str(i)], [])
+    assert len(_segment_names(path)) == 14
+    assert repo.entries(1, 1) == ['1 echo 1']
+    repo.close()
+
+
+def test_segment_bytes_and_recovery(path):
+    repo = HistoryFileRepository(path, segment_bytes=20)
+    repo.add('cat', ['a.txt'], [])
+    repo.add('cat', ['b.txt'], [])
+    assert _segment_names(path) == ['.history.1-2.gz']
+    repo.close()
+
+    # сбой после сжатия, до очистки .history: его записи уже в сегменте
+    path.write_text('1 cat a.txt\n2 cat b.txt\n')
+    repo = HistoryFileRepository(path, segment_bytes=20)
+    assert repo.all() == ['1 cat a.txt', '2 cat b.txt']
+    repo.add('pwd', [], [])
+    assert repo.last(1) == ['3 pwd']
+
+    repo.clear()
+    assert _segment_names(path) == []
+    repo.add('ls', [], [])
+    assert repo.all() == ['1 ls']
+    repo.close()
@@ -0,0 +1,170 @@
+import pytest
+
+from adapter.reverse_search import MARKER, ReverseSearch, replace_marker_line
+from entity.errors import ValidationError
+from repository.command.history import History
+from repository.history_file_repository import HistoryFileRepository
+from repository.history_search_index import HistorySearchIndex, required_literals
+from repository.in_memory_history_repo import InMemoryHistory
+
+
+@pytest.fixture
+def index() -> HistorySearchIndex:
+    index = HistorySearchIndex()
+    index.extend(
+        enumerate(
+            [
+                'cp -r src dst',
+                'grep -r ERROR logs',
+                'ls -l',
+                'cp -r src dst',
+                'grep -i error app.log',
+                'cd /var/log',
+            ],
+            1,
+        )
+    )
+    return index
+
+
+def test_substring_newest_first_without_duplicates(index: HistorySearchIndex):
+    assert index.search('error') == [
+        (5, 'grep -i error app.log'),
+        (2, 'grep -r ERROR logs'),
+    ]
+    assert index.search('cp -r') == [(4, 'cp -r src dst')]
+    assert index.search('lo', limit=2) == [
+        (6, 'cd /var/log'),
+        (5, 'grep -i error app.log'),
+    ]
+    assert index.search('nothing') == []
+    assert len(index) == 5
+
+
+def test_regex(index: HistorySearchIndex):
+    assert index.search(r'^grep .*\.log$', regex=True) == [(5, 'grep -i error app.log')]
+    assert index.search(r'ls|cd', regex=True) == [(6, 'cd /var/log'), (3, 'ls -l')]
+    assert index.search(r'app\.lo{1,2}g', regex=True) == [(5, 'grep -i error app.log')]
+    assert index.search(r'gre\x70 -i', regex=True) == [(5, 'grep -i error app.log')]
+
+
+@pytest.mark.parametrize(
+    ('pattern', 'literals'),
+    (
+        (r'grep .*\.log$', ['grep ', '.log']),
+        (r'errors?', ['error']),
+        (r'ab[xyz]cde', ['cde']),
+        (r'\d+ items', [' items']),
+        (r'(cp|mv) src', []),
+        (r'a{3}bcd', ['bcd']),
+        (r'app-\d{4}\.log', ['app-', '.log']),
+        (r'files{0,2} list', ['file', ' list']),
+        (r'x{a}yz', ['x{a}yz']),
+        (r'ech\x6f hello', []),
+        (r'\u0065cho', []),
+        (r'\N{LATIN SMALL LETTER E}cho', []),
+        (r'\145cho', []),
+        (r'echo\tdone', ['echo', 'done']),
+    ),
+)
+def test_required_literals(pattern: str, literals: list[str]):
+    assert required_literals(pattern) == literals
+
+
+def test_file_index_is_incremental(tmp_path, monkeypatch):
+    repo = HistoryFileRepository(tmp_path / '.history')
+    repo.add('ls', [], [])
+    assert repo.search('ls') == [(1, 'ls')]
+    reads = []
+    monkeypatch.setattr(repo, '_read_commands', lambda: reads.append(1) or iter(()))
+    repo.add('ls', ['src'], [])
+    repo.add('ls', [], [])
+    assert repo.search('ls') == [(3, 'ls'), (2, 'ls src')]
+    assert reads == []
+
+    repo.clear()
+    repo.add('pwd', [], [])
+    assert repo.search('ls') == []
+    assert repo.search('pw') == [(1, 'pwd')]
+    repo.close()
+
+
+def test_file_index_survives_seal_by_other(tmp_path, monkeypatch):
+    path = tmp_path / '.history'
+    a = HistoryFileRepository(path, segment_lines=3)
+    b = HistoryFileRepository(path, segment_lines=3)
+    a.add('ls', [], [])
+    assert a.search('ls') == [(1, 'ls')]
+    reads = []
+    monkeypatch.setattr(a, '_read_commands', lambda: reads.append(1) or iter(()))
+    # b сжимает .history в сегмент: записи те же, индекс a только дочитывает
+    for name in ('pwd', 'cat', 'cd'):
+        b.add(name, [], [])
+    assert a.search('c') == [(4, 'cd'), (3, 'cat')]
+    assert reads == []
+
+    # очистка другим процессом: индекс строится заново
+    monkeypatch.undo()
+    b.clear()
+    b.add('grep', [], [])
+    assert a.search('ls') == []
+    assert a.search('gre') == [(1, 'grep')]
+    a.close()
+    b.close()
+
+
+def test_file_index_forgets_dropped_segments(tmp_path):
+    repo = HistoryFileRepository(tmp_path / '.history', segment_lines=2, keep=1)
+    repo.add('first', [], [])
+    assert repo.search('first') == [(1, 'first')]
+    for i in range(5):
+        repo.add('echo', [str(i)], [])
+    # сегмент 1-2 удалён хранением: его записи больше не находятся
+    assert repo.search('first') == []
+    assert repo.search('echo 4') == [(6, 'echo 4')]
+    repo.close()
+
+
+def test_history_command_search(ctx):
+    repo = InMemoryHistory()
+    for name, args in (('grep', ['ERROR', 'log']), ('pwd', []), ('cat', ['log'])):
+        repo.add(name, args, [])
+    history = History(repo)
+    assert history.execute(['log'], ['-s'], ctx).splitlines() == [
+        '3 cat log',
+        '1 grep ERROR log',
+    ]
+    assert history.execute(['^p'], ['-e'], ctx).rstrip() == '2 pwd'
+    with pytest.raises(ValidationError):
+        history.execute(['('], ['-e'], ctx)
+
+
+def test_reverse_search_steps_to_older_matches(index: HistorySearchIndex):
+    state = ReverseSearch(lambda q, n: index.search(q, limit=n), 'gr')
+    assert state.match == 'grep -i error app.log'
+    state.older()
+    assert state.match == 'grep -r ERROR logs'
+    # старше нет - совпадение остаётся
+    state.older()
+    assert state.match == 'grep -r ERROR logs'
+    state.type('ep -r')
+    assert state.match == 'grep -r ERROR logs'
+    state.type('x')
+    assert state.match is None
+    assert state.prompt().startswith('(failed reverse-i-search)')
+    state.backspace()
+    assert state.match == 'grep -r ERROR logs'
+
+
+def test_marker_line_replaced_in_readline_history():
+    readline = pytest.importorskip('readline')
+    readline.clear_history()
+    readline.add_history('ls')
+    readline.add_history(f'{MARKER}gre')
+    replace_marker_line('grep -i error app.log')
+    items = [readline.get_history_item(i) for i in range(1, 3)]
+    assert items == ['ls', 'grep -i error app.log']
+    readline.add_history(f'{MARKER}pw')
+    replace_marker_line('')
+    assert readline.get_current_history_length() == 2
+    readline.clear_history()
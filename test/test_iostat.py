@@ -0,0 +1,110 @@
+import pytest
+
+from adapter.cli import CLIAdapter
+from adapter.parser import parse_pipeline, tokenize
+from entity.command import Command
+from entity.context import CommandContext
+from entity.iostat import IOCounters, count_stat, io_scope, read_proc_io
+from repository.command.cp import Cp
+from repository.command.grep import Grep
+from repository.command.tar import Tar
+from repository.in_memory_history_repo import InMemoryHistory
+from repository.in_memory_undo_repo import InMemoryUndoRepository
+from usecase.metrics import IO_OPERATIONS_TOTAL
+from usecase.shell import Shell
+
+
+@pytest.fixture
+def shell(tmp_path, ctx: CommandContext) -> Shell:
+    ctx.pwd = str(tmp_path)
+    src = tmp_path / 'src' / 'sub'
+    src.mkdir(parents=True)
+    for i in range(3):
+        (src / f'f{i}.txt').write_text(f'line {i}\n')
+    cmds: list[Command] = [Cp(), Grep(), Tar()]
+    return Shell(
+        history=InMemoryHistory(),
+        undo_repo=InMemoryUndoRepository(),
+        context=ctx,
+        commands={c.name: c for c in cmds},
+    )
+
+
+def test_nested_scopes_count_into_each():
+    outer, inner = IOCounters(), IOCounters()
+    with io_scope(outer):
+        count_stat()
+        with io_scope(inner):
+            count_stat(2)
+    count_stat()
+    assert outer.stat_calls == 3
+    assert inner.stat_calls == 2
+
+
+def test_proc_io_delta_counts_reads(tmp_path):
+    if read_proc_io() is None:
+        pytest.skip('нет /proc/self/io')
+    (tmp_path / 'f').write_bytes(b'x' * 10_000)
+    io = IOCounters()
+    before = read_proc_io()
+    (tmp_path / 'f').read_bytes()
+    io.add_proc(before)
+    assert io.read_bytes >= 10_000
+    assert io.read_calls >= 1
+
+
+def test_parse_time_verbose():
+    pipeline = parse_pipeline(tokenize('time -v grep -r x .'))
+    assert pipeline.timed and pipeline.verbose
+    assert pipeline.stages[0].name == 'grep'
+    assert str(pipeline) == 'time -v grep -r x .'
+
+
+def test_time_verbose_reports_walk(shell: Shell, capsys):
+    assert CLIAdapter(shell).execute('time -v cp -r src dst') == 0
+    lines = capsys.readouterr().out.splitlines()
+    report = dict(line.split(None, 1) for line in lines[1:])
+    assert list(report) == [
+        'real',
+        'user',
+        'sys',
+        'read',
+        'write',
+        'open',
+        'dirs',
+        'stat',
+    ]
+    # src и src/sub, по два open на файл
+    assert report['dirs'] == '2'
+    assert report['open'] == '6'
+    assert int(report['stat']) > 3
+
+
+def test_pipeline_stages_count_into_line(shell: Shell, capsys):
+    assert CLIAdapter(shell).execute('time -v grep -r line src | grep 1') == 0
+    out = capsys.readouterr().out
+    assert 'open  3' in out
+
+
+def test_io_metrics_per_command(shell: Shell):
+    list(shell.stream('grep', ['line', 'src'], ['-r']))
+    ops = {
+        dict(s.labels)['op']: s.value
+        for s in shell.metrics.collect()
+        if s.name == IO_OPERATIONS_TOTAL and dict(s.labels)['command'] == 'grep'
+    }
+    assert ops['open'] == 3
+    assert ops['readdir'] == 2
+    assert ops['stat'] > 0
+
+
+def test_tar_recount_restats_tree(shell: Shell):
+    list(shell.stream('tar', ['src', 'out.tgz'], ['-r']))
+    stats = next(
+        s.value
+        for s in shell.metrics.collect()
+        if s.name == IO_OPERATIONS_TOTAL
+        and dict(s.labels) == {'command': 'tar', 'op': 'stat'}
+    )
+    # lstat каждого элемента в tarfile и ещё stat при пересчёте через rglob
+    assert stats >= 2 * 5
@@ -0,0 +1,78 @@
+import threading
+
+import pytest
+
+from entity.context import CommandContext
+from entity.errors import DomainError, ValidationError
+from repository.command.fg import Fg
+from repository.command.jobs import Jobs
+from repository.command.wait import Wait
+from usecase.jobs import JobManager
+
+
+@pytest.fixture
+def jobs() -> JobManager:
+    manager = JobManager()
+    yield manager
+    manager.shutdown()
+
+
+def _fail() -> str:
+    raise DomainError('сломалось')
+
+
+def test_jobs_lists_running_and_finished(jobs: JobManager, ctx: CommandContext):
+    release = threading.Event()
+    jobs.submit('sleepy', lambda: str(release.wait()))
+    done = jobs.submit('quick', lambda: 'ok')
+    done.future.result()
+
+    out = Jobs(jobs).execute([], [], ctx).splitlines()
+    assert out[0].startswith('[1] выполняется ') and out[0].endswith(' sleepy')
+    assert out[1].startswith('[2] завершено ') and out[1].endswith(' quick')
+    release.set()
+
+
+def test_wait_collects_all_outputs(jobs: JobManager, ctx: CommandContext):
+    jobs.submit('a', lambda: 'out a')
+    jobs.submit('b', _fail)
+    out = Wait(jobs).execute([], [], ctx)
+    assert out == '[1] завершено: a\nout a\n[2] ошибка: b\nсломалось'
+    assert jobs.all() == []
+
+
+def test_take_finished_prunes_reported(jobs: JobManager):
+    release = threading.Event()
+    running = jobs.submit('sleepy', lambda: str(release.wait()))
+    done = jobs.submit('quick', lambda: 'ok')
+    done.future.result()
+    assert jobs.take_finished() == [done]
+    assert jobs.all() == [running]
+    assert jobs.take_finished() == []
+    release.set()
+    running.future.result()
+    assert jobs.take_finished() == [running]
+    assert jobs.all() == []
+
+
+def test_fg_returns_last_job_output(jobs: JobManager, ctx: CommandContext):
+    jobs.submit('a', lambda: 'out a')
+    jobs.submit('b', lambda: 'out b')
+    assert Fg(jobs).execute([], [], ctx) == 'out b'
+    assert Fg(jobs).execute(['%1'], [], ctx) == 'out a'
+    with pytest.raises(DomainError):
+        Fg(jobs).execute([], [], ctx)
+
+
+def test_fg_reraises_job_error(jobs: JobManager, ctx: CommandContext):
+    jobs.submit('b', _fail)
+    with pytest.raises(DomainError):
+        Fg(jobs).execute([], [], ctx)
+
+
+def test_fg_invalid_id(jobs: JobManager, ctx: CommandContext):
+    jobs.submit('a', lambda: 'out a')
+    with pytest.raises(ValidationError):
+        Fg(jobs).execute(['x'], [], ctx)
+    with pytest.raises(DomainError):
+        Fg(jobs).execute(['7'], [], ctx)
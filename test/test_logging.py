@@ -0,0 +1,51 @@
+import gzip
+import logging
+
+import pytest
+
+from repository.log_setup import setup_logging, stop_logging
+
+
+@pytest.fixture(autouse=True)
+def root_level():
+    root = logging.getLogger()
+    level = root.level
+    yield
+    root.setLevel(level)
+
+
+def test_records_are_flushed_on_stop(tmp_path):
+    path = tmp_path / 'shell.log'
+    listener = setup_logging(path)
+    logging.getLogger('test').info('ls -l')
+    stop_logging(listener)
+    assert path.read_text(encoding='utf-8').endswith('INFO: ls -l\n')
+    assert not any(
+        getattr(h, 'queue', None) is listener.queue
+        for h in logging.getLogger().handlers
+    )
+
+
+def test_rotated_logs_are_compressed(tmp_path):
+    path = tmp_path / 'shell.log'
+    listener = setup_logging(path, max_bytes=200, backups=2)
+    log = logging.getLogger('test')
+    for i in range(30):
+        log.info('command %d', i)
+    stop_logging(listener)
+
+    archives = sorted(p.name for p in tmp_path.iterdir() if p.suffix == '.gz')
+    assert archives == ['shell.log.1.gz', 'shell.log.2.gz']
+    newest = gzip.decompress((tmp_path / 'shell.log.1.gz').read_bytes()).decode()
+    assert 'command' in newest
+    assert path.read_text(encoding='utf-8').endswith('INFO: command 29\n')
+
+
+def test_level_filters_before_queue(tmp_path):
+    path = tmp_path / 'shell.log'
+    listener = setup_logging(path, level=logging.WARNING)
+    logging.getLogger('test').info('hidden')
+    logging.getLogger('test').warning('shown')
+    stop_logging(listener)
+    assert 'hidden' not in path.read_text(encoding='utf-8')
+    assert 'shown' in path.read_text(encoding='utf-8')
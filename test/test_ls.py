@@ -3,6 +3,7 @@ import pytest
 from entity.command import Command
 from entity.context import CommandContext
 from entity.errors import DomainError
+from repository.command.ls import Ls
 from test.conftest import setup_tree
 
 
@@ -62,3 +63,10 @@ def test_execute(
 ):
     setup_tree(fs, ctx)
     assert ls.execute(args, [], ctx) == expected
+
+
+def test_stream_separates_groups(ls: Ls, fs, ctx: CommandContext):
+    setup_tree(fs, ctx)
+    fs.create_file('/vfs/home/test/etc/conf')
+    out = list(ls.stream(['etc', '/vfs/photos/my.png', '/vfs/home/test2'], [], ctx))
+    assert out == ['conf', '', 'my.png']
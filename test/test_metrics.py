@@ -0,0 +1,130 @@
+import json
+
+import pytest
+
+import main
+from entity.command import Command
+from entity.context import CommandContext
+from repository.command.cat import Cat
+from repository.command.cp import Cp
+from repository.command.mv import Mv
+from repository.command.rm import Rm
+from repository.command.tar import Tar
+from repository.command.zip import Zip
+from repository.in_memory_history_repo import InMemoryHistory
+from repository.in_memory_undo_repo import InMemoryUndoRepository
+from repository.metrics_exporter import (
+    MetricsExporter,
+    register_trash_gauges,
+    render_prometheus,
+)
+from usecase.metrics import (
+    BYTES_TOTAL,
+    COMMANDS_TOTAL,
+    ERRORS_TOTAL,
+    FILES_TOTAL,
+    TRASH_BYTES,
+    TRASH_FILES,
+    Metrics,
+)
+from usecase.shell import Shell
+from usecase.stats import LatencyStats
+
+
+@pytest.fixture
+def shell(tmp_path, ctx: CommandContext) -> Shell:
+    ctx.pwd = str(tmp_path)
+    metrics = Metrics()
+    register_trash_gauges(metrics, tmp_path / '.trash')
+    cmds: list[Command] = [
+        Cat(),
+        Cp(metrics),
+        Mv(metrics),
+        Rm(tmp_path / '.trash', metrics),
+        Zip(metrics),
+        Tar(metrics),
+    ]
+    return Shell(
+        history=InMemoryHistory(),
+        undo_repo=InMemoryUndoRepository(),
+        context=ctx,
+        commands={c.name: c for c in cmds},
+        metrics=metrics,
+    )
+
+
+def _values(metrics: Metrics) -> dict[tuple, float]:
+    return {(s.name, s.labels): s.value for s in metrics.collect()}
+
+
+def test_file_counters(shell: Shell, tmp_path):
+    (tmp_path / 'src' / 'sub').mkdir(parents=True)
+    (tmp_path / 'src' / 'a').write_text('12345')
+    (tmp_path / 'src' / 'sub' / 'b').write_text('123')
+    shell.run('cp', ['src', 'dst'], ['-r'])
+    shell.run('zip', ['src', 'a.zip'], ['-r'])
+    shell.run('tar', ['src', 'a.tgz'], ['-r'])
+    shell.run('mv', ['dst/a', 'moved'], [])
+    shell.run('rm', ['moved'], ['-y'])
+
+    v = _values(shell.metrics)
+    for op, files, size in [
+        ('copy', 2, 8),
+        ('archive', 4, 16),
+        ('move', 1, 5),
+        ('delete', 1, 5),
+    ]:
+        assert v[FILES_TOTAL, (('op', op),)] == files
+        assert v[BYTES_TOTAL, (('op', op),)] == size
+    assert v[COMMANDS_TOTAL, (('command', 'cp'),)] == 1
+    assert v[TRASH_BYTES, ()] == 5
+    assert v[TRASH_FILES, ()] == 1
+
+
+def test_errors_by_type(shell: Shell):
+    for _ in range(2):
+        with pytest.raises(Exception):
+            shell.run('cat', ['missing'], [])
+    v = _values(shell.metrics)
+    assert v[ERRORS_TOTAL, (('command', 'cat'), ('error', 'DomainError'))] == 2
+    assert v[COMMANDS_TOTAL, (('command', 'cat'),)] == 2
+
+
+def test_render_prometheus():
+    metrics = Metrics()
+    metrics.counter(ERRORS_TOTAL, command='cat', error='Domain"Error').inc()
+    stats = LatencyStats()
+    stats.record('cat', 'execution', 0.002)
+    text = render_prometheus(metrics.collect(), stats)
+    assert f'# TYPE {ERRORS_TOTAL} counter' in text
+    assert f'{ERRORS_TOTAL}{{command="cat",error="Domain\\"Error"}} 1' in text
+    assert (
+        'unix_shell_command_latency_seconds_count{command="cat",phase="execution"} 1'
+        in text
+    )
+    assert 'quantile="0.99"' in text
+
+
+def test_exporter_flushes_on_stop(tmp_path):
+    metrics = Metrics()
+    metrics.counter(COMMANDS_TOTAL, command='pwd').inc(3)
+    exporter = MetricsExporter(
+        metrics, LatencyStats(), tmp_path / 'm.prom', tmp_path / 'm.json', 3600
+    )
+    exporter.start()
+    exporter.stop()
+    assert f'{COMMANDS_TOTAL}{{command="pwd"}} 3' in (tmp_path / 'm.prom').read_text()
+    data = json.loads((tmp_path / 'm.json').read_text())
+    assert data['metrics'][COMMANDS_TOTAL] == [
+        {'labels': {'command': 'pwd'}, 'value': 3, 'type': 'counter'}
+    ]
+    assert not list(tmp_path.glob('.*.tmp'))
+
+
+def test_batch_mode_does_not_export(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, 'ROOT_DIR', str(tmp_path))
+    argv = ['-c', 'pwd', '--metrics-dir', str(tmp_path)]
+    assert main.main([*argv, '--log-file', str(tmp_path / 'shell.log')]) == 0
+    # -c живёт секунды: его счётчики с нуля не затирают файлы REPL и демона
+    assert not (tmp_path / 'unix_shell.prom').exists()
+    assert not (tmp_path / 'metrics.json').exists()
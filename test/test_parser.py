@@ -0,0 +1,87 @@
+import pytest
+
+from adapter.parser import Redirect, parse_line, parse_pipeline, tokenize
+from entity.command import Invocation
+from entity.errors import ValidationError
+
+
+def test_tokenize_splits_operators_without_spaces():
+    tokens = tokenize('cat a.log|grep ERROR')
+    assert [t.text for t in tokens] == ['cat', 'a.log', '|', 'grep', 'ERROR']
+    assert [t.operator for t in tokens] == [False, False, True, False, False]
+
+
+def test_tokenize_quoted_operator_is_word():
+    tokens = tokenize('grep "a | b" \'x\'y file\\ name')
+    assert [t.text for t in tokens] == ['grep', 'a | b', 'xy', 'file name']
+    assert not any(t.operator for t in tokens)
+
+
+def test_tokenize_unclosed_quote():
+    with pytest.raises(ValidationError):
+        tokenize('cat "a')
+
+
+def test_parse_pipeline_stages():
+    pipeline = parse_pipeline(tokenize('cat big.log | grep -i error | head 20'))
+    assert pipeline.redirect is None
+    assert pipeline.stages == [
+        Invocation('cat', ['big.log'], []),
+        Invocation('grep', ['error'], ['-i']),
+        Invocation('head', ['20'], []),
+    ]
+
+
+@pytest.mark.parametrize('line', ['| grep a', 'cat a |', 'cat a || grep b'])
+def test_parse_pipeline_empty_stage(line: str):
+    with pytest.raises(ValidationError):
+        parse_pipeline(tokenize(line))
+
+
+@pytest.mark.parametrize(
+    'line, redirect',
+    [
+        ('grep -r x . > out.txt', Redirect('out.txt', append=False)),
+        ('cat a|grep x>>out.txt', Redirect('out.txt', append=True)),
+        ('cat a > "my file"', Redirect('my file', append=False)),
+    ],
+)
+def test_parse_redirect(line: str, redirect: Redirect):
+    assert parse_pipeline(tokenize(line)).redirect == redirect
+
+
+@pytest.mark.parametrize('line', ['cat a >', 'cat a > b c', 'cat a > b | grep x'])
+def test_parse_redirect_invalid(line: str):
+    with pytest.raises(ValidationError):
+        parse_pipeline(tokenize(line))
+
+
+def test_tokenize_skips_comment():
+    assert [t.text for t in tokenize('pwd # a | b')] == ['pwd']
+    assert [t.text for t in tokenize('grep a#b x')] == ['grep', 'a#b', 'x']
+
+
+def test_parse_line_conditions():
+    steps = parse_line(tokenize('cd a; ls && pwd || whoami;'))
+    assert [(s.pipeline.stages[0].name, s.condition) for s in steps] == [
+        ('cd', ';'),
+        ('ls', ';'),
+        ('pwd', '&&'),
+        ('whoami', '||'),
+    ]
+
+
+@pytest.mark.parametrize('line', ['&& pwd', 'pwd ||', 'pwd && ; ls'])
+def test_parse_line_missing_command(line: str):
+    with pytest.raises(ValidationError):
+        parse_line(tokenize(line))
+
+
+def test_parse_line_background():
+    steps = parse_line(tokenize('tar -r a a.tgz & zip -r b b.zip&pwd'))
+    assert [(str(s.pipeline), s.background) for s in steps] == [
+        ('tar -r a a.tgz', True),
+        ('zip -r b b.zip', True),
+        ('pwd', False),
+    ]
+    assert [s.condition for s in steps] == [';', ';', ';']
@@ -0,0 +1,63 @@
+import pstats
+
+import pytest
+
+from adapter.cli import CLIAdapter
+from adapter.parser import Profile, parse_pipeline, tokenize
+from entity.command import Command
+from entity.context import CommandContext
+from entity.errors import ValidationError
+from repository.command.cat import Cat
+from repository.command.cp import Cp
+from repository.in_memory_history_repo import InMemoryHistory
+from repository.in_memory_undo_repo import InMemoryUndoRepository
+from usecase.shell import Shell
+
+
+@pytest.fixture
+def cli(tmp_path, ctx: CommandContext) -> CLIAdapter:
+    ctx.pwd = str(tmp_path)
+    cmds: list[Command] = [Cat(), Cp()]
+    shell = Shell(
+        history=InMemoryHistory(),
+        undo_repo=InMemoryUndoRepository(),
+        context=ctx,
+        commands={c.name: c for c in cmds},
+    )
+    return CLIAdapter(shell)
+
+
+def test_parse_profile_options():
+    p = parse_pipeline(tokenize('profile --mem -n 5 -o out.pstats cp -r a b'))
+    assert p.profile == Profile(mem=True, top=5, dump='out.pstats')
+    assert p.stages[0].name == 'cp' and p.stages[0].flags == ['-r']
+    assert str(p) == 'profile --mem -n 5 -o out.pstats cp -r a b'
+    assert parse_pipeline(tokenize('cp a b')).profile is None
+
+
+@pytest.mark.parametrize(
+    'line', ['profile -x cat a', 'profile -n x cat a', 'profile -o']
+)
+def test_parse_profile_errors(line: str):
+    with pytest.raises(ValidationError):
+        parse_pipeline(tokenize(line))
+
+
+def test_profile_prints_cumulative_top(cli: CLIAdapter, tmp_path, capsys):
+    (tmp_path / 'src').mkdir()
+    (tmp_path / 'src' / 'f').write_text('x')
+    assert cli.execute('profile -n 5 -o out.pstats cp -r src dst') == 0
+    out = capsys.readouterr().out
+    assert out.startswith('cp: скопировано 1 объектов\n')
+    assert 'function calls' in out and 'cumulative' in out
+    assert (tmp_path / 'dst' / 'f').exists()
+    stats = pstats.Stats(str(tmp_path / 'out.pstats'))
+    assert any(func[2] == '_copy_dir' for func in stats.stats)  # type: ignore[attr-defined]
+
+
+def test_profile_mem_prints_allocations(cli: CLIAdapter, tmp_path, capsys):
+    (tmp_path / 'f').write_text('line\n' * 1000)
+    assert cli.execute('profile --mem -n 3 cat f') == 0
+    out = capsys.readouterr().out
+    assert 'Память: пик' in out
+    assert out.count(' блоков ') == 3
@@ -0,0 +1,94 @@
+import io
+import json
+import stat
+
+import pytest
+
+from adapter.cli import CLIAdapter
+from entity.command import Command, Invocation
+from entity.context import CommandContext
+from entity.record import GrepMatch, LsEntry, Summary
+from repository.command.cat import Cat
+from repository.command.cp import Cp
+from repository.command.grep import Grep
+from repository.command.ls import Ls
+from repository.command.pwd import Pwd
+from repository.in_memory_history_repo import InMemoryHistory
+from repository.in_memory_undo_repo import InMemoryUndoRepository
+from usecase.shell import Shell
+
+
+@pytest.fixture
+def shell(tmp_path, ctx: CommandContext) -> Shell:
+    ctx.pwd = str(tmp_path)
+    (tmp_path / 'src').mkdir()
+    (tmp_path / 'src' / 'a.txt').write_text('ok\nERROR one\n')
+    (tmp_path / 'log').write_text('ERROR x\ninfo\n')
+    cmds: list[Command] = [Cat(), Cp(), Grep(), Ls(), Pwd()]
+    return Shell(
+        history=InMemoryHistory(),
+        undo_repo=InMemoryUndoRepository(),
+        context=ctx,
+        commands={c.name: c for c in cmds},
+    )
+
+
+def _inv(name: str, *args: str, flags: list[str] | None = None) -> Invocation:
+    return Invocation(name, list(args), flags or [])
+
+
+def _json_lines(shell: Shell, line: str) -> list[dict]:
+    out = io.StringIO()
+    CLIAdapter(shell, out=out, json_output=True).execute(line)
+    return [json.loads(x) for x in out.getvalue().splitlines()]
+
+
+def test_ls_records_carry_stat(shell: Shell, tmp_path):
+    records = sorted(shell.records([_inv('ls')]), key=lambda r: r.name)
+    assert [r.name for r in records] == ['log', 'src']
+    log, src = records
+    assert isinstance(log, LsEntry)
+    assert log.size == 13 and stat.S_ISREG(log.mode) and not log.is_dir
+    assert src.is_dir and log.path == str(tmp_path / 'log')
+
+
+def test_grep_records_split_fields(shell: Shell, tmp_path):
+    records = list(shell.records([_inv('grep', 'ERROR', 'src', flags=['-r'])]))
+    assert records == [GrepMatch(str(tmp_path / 'src' / 'a.txt'), 2, 'ERROR one')]
+
+
+def test_text_and_records_agree(shell: Shell, tmp_path):
+    text = list(shell.stream('grep', ['ERROR', 'log'], []))
+    assert text == [f'{tmp_path / "log"}:1:ERROR x']
+
+
+def test_undoable_command_reports_count(shell: Shell):
+    assert list(shell.records([_inv('cp', 'src', 'dst', flags=['-r'])])) == [
+        Summary('cp', 1)
+    ]
+
+
+def test_cli_json_lines(shell: Shell):
+    assert _json_lines(shell, 'cat log | grep ERROR') == [
+        {'type': 'grep', 'path': None, 'line': None, 'text': 'ERROR x'}
+    ]
+    assert _json_lines(shell, 'cat log') == [
+        {'type': 'text', 'text': 'ERROR x'},
+        {'type': 'text', 'text': 'info'},
+    ]
+
+
+def test_cli_json_errors(shell: Shell):
+    [err] = _json_lines(shell, 'cat missing')
+    assert err['type'] == 'error' and err['message']
+
+
+def test_cli_json_redirect(shell: Shell, tmp_path):
+    CLIAdapter(shell, json_output=True).execute('grep ERROR log > out.json')
+    [rec] = [json.loads(x) for x in (tmp_path / 'out.json').read_text().splitlines()]
+    assert rec == {
+        'type': 'grep',
+        'path': str(tmp_path / 'log'),
+        'line': 1,
+        'text': 'ERROR x',
+    }
@@ -6,19 +6,20 @@ import pytest
 from entity.command import Command
 from entity.context import CommandContext
 from entity.errors import ValidationError
+from entity.undo import UndoRecord
 from test.conftest import setup_tree
 
 
 def test_rm_file_deletes_and_moves_to_trash(rm: Command, fs, ctx: CommandContext):
     setup_tree(fs, ctx)
     assert Path('/vfs/photos/photo1.png').is_file()
-    rm.execute(['/vfs/photos/photo1.png'], ['-y'], ctx)
+    undo: list[UndoRecord] = []
+    rm.execute_with_undo(['/vfs/photos/photo1.png'], ['-y'], ctx, undo)
     assert not Path('/vfs/photos/photo1.png').exists()
     trash = Path('/.trash')
     assert trash.is_dir()
     trashed = [p.name for p in trash.iterdir()]
     assert any(name.startswith('photo1.png.') for name in trashed)
-    undo = getattr(rm, 'undo')()
     assert len(undo) == 1
     assert undo[0].action == 'rm'
     assert undo[0].src == '/vfs/photos/photo1.png'
@@ -49,9 +50,9 @@ def test_rm_r_dir_deletes_recursively(rm: Command, fs, ctx: CommandContext):
     assert Path('/vfs/photos/album').is_dir()
     assert Path('/vfs/photos/album/p1.jpg').is_file()
 
-    rm.execute(['/vfs/photos'], ['-r', '-y'], ctx)
+    undo: list[UndoRecord] = []
+    rm.execute_with_undo(['/vfs/photos'], ['-r', '-y'], ctx, undo)
     assert not Path('/vfs/photos').exists()
-    undo = getattr(rm, 'undo')()
     assert all(u.action == 'rm' and u.dst.startswith('/.trash/') for u in undo)
 
 
@@ -59,10 +60,12 @@ def test_rm_multiple_files(rm: Command, fs, ctx: CommandContext):
     setup_tree(fs, ctx)
     assert Path('/vfs/photos/photo1.png').is_file()
     assert Path('/vfs/photos/my.png').is_file()
-    rm.execute(['/vfs/photos/photo1.png', '/vfs/photos/my.png'], ['-y'], ctx)
+    undo: list[UndoRecord] = []
+    rm.execute_with_undo(
+        ['/vfs/photos/photo1.png', '/vfs/photos/my.png'], ['-y'], ctx, undo
+    )
     assert not Path('/vfs/photos/photo1.png').exists()
     assert not Path('/vfs/photos/my.png').exists()
-    undo = getattr(rm, 'undo')()
     dsts = {u.dst for u in undo}
     assert any(d.startswith('/.trash/photo1.png.') for d in dsts)
     assert any(d.startswith('/.trash/my.png.') for d in dsts)
@@ -88,10 +91,12 @@ def test_rm_r_mixed_file_and_dir(rm: Command, fs, ctx: CommandContext, monkeypat
     with pytest.raises(ValidationError):
         rm.execute(['/vfs/etc/conf', '/vfs/photos/my.png'], [], ctx)
 
-    rm.execute(['/vfs/etc/conf', '/vfs/photos/my.png'], ['-r', '-y'], ctx)
+    undo: list[UndoRecord] = []
+    rm.execute_with_undo(
+        ['/vfs/etc/conf', '/vfs/photos/my.png'], ['-r', '-y'], ctx, undo
+    )
     assert not Path('/vfs/etc/conf').exists()
     assert not Path('/vfs/photos/my.png').exists()
-    undo = getattr(rm, 'undo')()
     assert len(undo) >= 2
     assert all(u.action == 'rm' for u in undo)
 
@@ -121,8 +126,37 @@ def test_rm_prompts_and_respects_answer(
     assert Path('/vfs/etc/hosts').is_file()
 
     monkeypatch.setattr(builtins, 'input', lambda *_: 'да')
-    msg = rm.execute(['/vfs/etc/hosts'], [], ctx)
+    undo: list[UndoRecord] = []
+    msg = rm.execute_with_undo(['/vfs/etc/hosts'], [], ctx, undo)
     assert msg.endswith('1 объектов')
     assert not Path('/vfs/etc/hosts').exists()
-    undo = getattr(rm, 'undo')()
     assert len(undo) == 1
+
+
+def test_rm_without_terminal_requires_y(
+    rm: Command, fs, ctx: CommandContext, monkeypatch
+):
+    setup_tree(fs, ctx)
+    fs.create_file('/vfs/etc/hosts', contents='H')
+
+    def fail_input(*a, **k):
+        raise AssertionError('input() must not be called without a terminal')
+
+    monkeypatch.setattr(builtins, 'input', fail_input)
+    ctx.interactive = False
+    with pytest.raises(ValidationError):
+        rm.execute(['/vfs/etc/hosts'], [], ctx)
+    assert Path('/vfs/etc/hosts').is_file()
+    assert rm.execute(['/vfs/etc/hosts'], ['-y'], ctx).endswith('1 объектов')
+
+
+def test_rm_eof_at_prompt_is_no(rm: Command, fs, ctx: CommandContext, monkeypatch):
+    setup_tree(fs, ctx)
+    fs.create_file('/vfs/etc/hosts', contents='H')
+
+    def eof(*a, **k):
+        raise EOFError
+
+    monkeypatch.setattr(builtins, 'input', eof)
+    assert rm.execute(['/vfs/etc/hosts'], [], ctx).endswith('0 объектов')
+    assert Path('/vfs/etc/hosts').is_file()
@@ -0,0 +1,313 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Iterator
+
+import pytest
+
+from entity.command import Command, Invocation
+from entity.context import CommandContext
+from entity.errors import CommandNotFoundError, DomainError
+from repository.command.cat import Cat
+from repository.command.cp import Cp
+from repository.command.grep import Grep
+from repository.command.head import Head
+from repository.command.mkdir import Mkdir
+from repository.command.mv import Mv
+from repository.command.pwd import Pwd
+from repository.command.rm import Rm
+from repository.in_memory_history_repo import InMemoryHistory
+from repository.in_memory_undo_repo import InMemoryUndoRepository
+from test.conftest import setup_tree
+from usecase.shell import Shell
+
+
+class Yes:
+    """Бесконечный источник строк, завершается только по остановке конвейера"""
+
+    def __init__(self) -> None:
+        self.stopped = threading.Event()
+
+    @property
+    def name(self) -> str:
+        return 'yes'
+
+    @property
+    def description(self) -> str:
+        return 'yes'
+
+    def stream(self, args, flags, ctx, stdin=None) -> Iterator[str]:
+        i = 0
+        try:
+            while True:
+                i += 1
+                yield f'y{i}'
+        finally:
+            self.stopped.set()
+
+    def execute(self, args, flags, ctx) -> str:
+        raise NotImplementedError
+
+
+@pytest.fixture
+def shell(ctx: CommandContext) -> Shell:
+    cmds: list[Command] = [Cat(), Cp(), Pwd(), Grep(), Head(), Yes()]
+    return Shell(
+        history=InMemoryHistory(),
+        undo_repo=InMemoryUndoRepository(),
+        context=ctx,
+        commands={c.name: c for c in cmds},
+    )
+
+
+def test_stream_passes_chunks_through(shell: Shell, fs, ctx: CommandContext):
+    setup_tree(fs, ctx)
+    fs.create_file('/vfs/log', contents='a\nb\nc\n')
+    out = shell.stream('cat', ['/vfs/log'], [])
+    assert next(out) == 'a'
+    assert list(out) == ['b', 'c']
+
+
+def test_string_commands_work_through_stream(shell: Shell, fs, ctx: CommandContext):
+    setup_tree(fs, ctx)
+    assert list(shell.stream('pwd', [], [])) == ['/vfs/home/test']
+    assert shell.run('pwd', [], []) == '/vfs/home/test'
+
+
+def test_undo_recorded_after_stream_exhausted(shell: Shell, fs, ctx: CommandContext):
+    setup_tree(fs, ctx)
+    list(shell.stream('cp', ['/vfs/photos/my.png', '/vfs/home/test'], []))
+    assert shell._undo_repo.last()
+    assert shell._history_repo.last(1)
+
+
+def test_unknown_command(shell: Shell):
+    with pytest.raises(CommandNotFoundError):
+        shell.stream('nope', [], [])
+
+
+def test_pipeline_cat_grep_head(shell: Shell, fs, ctx: CommandContext):
+    setup_tree(fs, ctx)
+    lines = [f'{"ERROR" if i % 3 == 0 else "INFO"} {i}' for i in range(5000)]
+    fs.create_file('/vfs/big.log', contents='\n'.join(lines))
+    out = shell.pipeline(
+        [
+            Invocation('cat', ['/vfs/big.log'], []),
+            Invocation('grep', ['ERROR'], []),
+            Invocation('head', ['3'], []),
+        ]
+    )
+    assert list(out) == ['ERROR 0', 'ERROR 3', 'ERROR 6']
+
+
+def test_pipeline_early_exit_stops_upstream(shell: Shell):
+    yes = shell._commands['yes']
+    out = shell.pipeline([Invocation('yes', [], []), Invocation('head', ['2'], [])])
+    assert list(out) == ['y1', 'y2']
+    assert yes.stopped.is_set()
+
+
+def test_pipeline_upstream_error_propagates(shell: Shell, fs, ctx: CommandContext):
+    setup_tree(fs, ctx)
+    out = shell.pipeline(
+        [Invocation('cat', ['/vfs/photos'], []), Invocation('grep', ['x'], [])]
+    )
+    with pytest.raises(DomainError):
+        list(out)
+
+
+def test_pipeline_unknown_stage_starts_nothing(shell: Shell):
+    with pytest.raises(CommandNotFoundError):
+        shell.pipeline([Invocation('yes', [], []), Invocation('nope', [], [])])
+
+
+def test_undoable_commands_are_shared_between_threads(tmp_path, ctx: CommandContext):
+    ctx.pwd = str(tmp_path)
+    undo_repo = InMemoryUndoRepository()
+    cmds: list[Command] = [Cp(), Mv(), Mkdir(), Rm(tmp_path / '.trash')]
+    shell = Shell(
+        history=InMemoryHistory(),
+        undo_repo=undo_repo,
+        context=ctx,
+        commands={c.name: c for c in cmds},
+    )
+    workers, rounds = 8, 25
+    barrier = threading.Barrier(workers)
+    errors: list[BaseException] = []
+
+    def work(w: int) -> None:
+        try:
+            barrier.wait()
+            for i in range(rounds):
+                d = f'w{w}_{i}'
+                shell.run('mkdir', [d], [])
+                (tmp_path / d / 'f').write_text(d)
+                shell.run('cp', [f'{d}/f', f'{d}/g'], [])
+                shell.run('mv', [f'{d}/g', f'{d}/h'], [])
+                shell.run('rm', [f'{d}/f'], ['-y'])
+        except BaseException as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(w,)) for w in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert errors == []
+    batches = undo_repo.all()
+    assert len(batches) == workers * rounds * 4
+    # каждая пачка содержит ровно запись своего вызова, без чужих
+    seen: dict[str, list[str]] = {}
+    for batch in batches:
+        assert len(batch) == 1
+        rec = batch[0]
+        d = os.path.relpath(rec.src, tmp_path).split(os.sep)[0]
+        seen.setdefault(d, []).append(f'{rec.action}:{os.path.basename(rec.src)}')
+    assert len(seen) == workers * rounds
+    for d, actions in seen.items():
+        assert sorted(actions) == sorted([f'cp:{d}', 'cp:f', 'mv:g', 'rm:f'])
+
+
+class Slow:
+    """Блокирующая команда: спит перед каждой строкой"""
+
+    def __init__(self) -> None:
+        self.closed = threading.Event()
+
+    @property
+    def name(self) -> str:
+        return 'slow'
+
+    @property
+    def description(self) -> str:
+        return 'slow'
+
+    def stream(self, args, flags, ctx, stdin=None) -> Iterator[str]:
+        try:
+            for i in range(int(args[0])):
+                time.sleep(0.05)
+                yield f's{i}'
+        finally:
+            self.closed.set()
+
+    def execute(self, args, flags, ctx) -> str:
+        raise NotImplementedError
+
+
+async def _collect(it) -> list[str]:
+    return [chunk async for chunk in it]
+
+
+def test_arun_streams_without_blocking_loop(shell: Shell):
+    shell._commands['slow'] = Slow()
+
+    async def main() -> tuple[list[str], int]:
+        ticks = 0
+
+        async def ticker() -> None:
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0.01)
+
+        tick = asyncio.create_task(ticker())
+        out = await _collect(shell.arun('slow', ['4'], []))
+        tick.cancel()
+        return out, ticks
+
+    out, ticks = asyncio.run(main())
+    assert out == ['s0', 's1', 's2', 's3']
+    assert ticks >= 10
+    assert shell._history_repo.last(1)
+
+
+def test_arun_cancel_closes_command(shell: Shell):
+    slow = Slow()
+    shell._commands['slow'] = slow
+
+    async def main() -> list[str]:
+        seen: list[str] = []
+
+        async def consume() -> None:
+            async for chunk in shell.arun('slow', ['1000'], []):
+                seen.append(chunk)
+
+        task = asyncio.create_task(consume())
+        while not seen:
+            await asyncio.sleep(0.01)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        return seen
+
+    seen = asyncio.run(main())
+    assert slow.closed.wait(1)
+    assert len(seen) < 1000
+
+
+class Burst:
+    """Отдаёт строку и надолго замолкает"""
+
+    def __init__(self) -> None:
+        self.release = threading.Event()
+
+    @property
+    def name(self) -> str:
+        return 'burst'
+
+    @property
+    def description(self) -> str:
+        return 'burst'
+
+    def stream(self, args, flags, ctx, stdin=None) -> Iterator[str]:
+        yield 'first'
+        self.release.wait(5)
+        yield 'second'
+
+    def execute(self, args, flags, ctx) -> str:
+        raise NotImplementedError
+
+
+def test_arun_delivers_first_line_without_waiting_for_next(shell: Shell):
+    burst = Burst()
+    shell._commands['burst'] = burst
+
+    async def main() -> tuple[float, float]:
+        started = time.monotonic()
+        it = shell.arun('burst', [], [])
+        assert await anext(it) == 'first'
+        first = time.monotonic() - started
+
+        # отмена, пока генератор ждёт следующую строку, не ждёт её
+        task = asyncio.create_task(anext(it))
+        await asyncio.sleep(0.05)
+        started = time.monotonic()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        cancelled = time.monotonic() - started
+        burst.release.set()
+        return first, cancelled
+
+    first, cancelled = asyncio.run(main())
+    assert first < 0.5
+    assert cancelled < 0.5
+
+
+def test_arun_errors_and_sessions(shell: Shell, fs, ctx: CommandContext):
+    setup_tree(fs, ctx)
+    other = shell.session(CommandContext(pwd='/vfs/etc', home=ctx.home, user='u'))
+
+    async def main() -> list[list[str]]:
+        return await asyncio.gather(
+            _collect(shell.arun('pwd', [], [])),
+            _collect(other.arun('pwd', [], [])),
+        )
+
+    assert asyncio.run(main()) == [['/vfs/home/test'], ['/vfs/etc']]
+    with pytest.raises(DomainError):
+        asyncio.run(_collect(shell.arun('cat', ['/vfs/nope'], [])))
+    with pytest.raises(CommandNotFoundError):
+        shell.arun('nope', [], [])
@@ -0,0 +1,76 @@
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from repository.command.registry import CommandSpec, build_commands
+from repository.in_memory_dir_index import InMemoryDirIndex
+from repository.in_memory_history_repo import InMemoryHistory
+from repository.in_memory_undo_repo import InMemoryUndoRepository
+from usecase.jobs import JobManager
+from usecase.metrics import Metrics
+from usecase.stats import LatencyStats
+
+ROOT = Path(__file__).resolve().parent.parent
+
+# модули, которые нужны только отдельным командам
+HEAVY_MODULES = ['zipfile', 'tarfile', 'shutil', 'uuid', 'tempfile']
+# бюджет на импорт main и сборку Shell, с запасом на медленные машины
+STARTUP_BUDGET = 0.5
+
+_PROBE = """
+import json, sys, time
+t = time.perf_counter()
+import main
+main.build_shell(sys.argv[1], main.JobManager())
+elapsed = time.perf_counter() - t
+print(json.dumps({'elapsed': elapsed, 'modules': sorted(sys.modules)}))
+"""
+
+
+@pytest.fixture
+def specs() -> dict[str, CommandSpec]:
+    commands = build_commands(
+        '/.trash',
+        InMemoryUndoRepository(),
+        InMemoryHistory(),
+        dirs=InMemoryDirIndex(),
+        jobs=JobManager(),
+        stats=LatencyStats(),
+        metrics=Metrics(),
+    )
+    assert all(isinstance(c, CommandSpec) for c in commands.values())
+    return commands  # type: ignore[return-value]
+
+
+def test_startup_imports_no_command_modules(tmp_path, specs: dict[str, CommandSpec]):
+    res = subprocess.run(
+        [sys.executable, '-c', _PROBE, str(tmp_path)],
+        cwd=tmp_path,
+        env={'PYTHONPATH': str(ROOT)},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    probe = json.loads(res.stdout)
+    modules = set(probe['modules'])
+    assert [m for m in HEAVY_MODULES if m in modules] == []
+    loaded = [name for name in specs if f'repository.command.{name}' in modules]
+    assert loaded == []
+    assert probe['elapsed'] < STARTUP_BUDGET
+
+
+def test_registry_metadata_matches_commands(specs: dict[str, CommandSpec]):
+    for name, spec in specs.items():
+        cmd = spec.load()
+        assert cmd.name == name
+        assert cmd.description == spec.description
+
+
+def test_registry_loads_once(specs: dict[str, CommandSpec]):
+    spec = specs['pwd']
+    assert not spec.loaded
+    assert spec.load() is spec.load()
+    assert spec.loaded
@@ -0,0 +1,95 @@
+import pytest
+
+from adapter.cli import CLIAdapter
+from adapter.parser import parse_pipeline, tokenize
+from entity.command import Command
+from entity.context import CommandContext
+from repository.command.cp import Cp
+from repository.command.pwd import Pwd
+from repository.command.stats import Stats, format_seconds
+from repository.in_memory_history_repo import InMemoryHistory
+from repository.in_memory_undo_repo import InMemoryUndoRepository
+from usecase.shell import Shell
+from usecase.stats import Histogram, LatencyStats
+
+
+@pytest.fixture
+def shell(tmp_path, ctx: CommandContext) -> Shell:
+    ctx.pwd = str(tmp_path)
+    stats = LatencyStats()
+    cmds: list[Command] = [Cp(), Pwd(), Stats(stats)]
+    return Shell(
+        history=InMemoryHistory(),
+        undo_repo=InMemoryUndoRepository(),
+        context=ctx,
+        commands={c.name: c for c in cmds},
+        stats=stats,
+    )
+
+
+def test_histogram_percentiles():
+    hist = Histogram()
+    for _ in range(90):
+        hist.add(0.001)
+    for _ in range(10):
+        hist.add(0.5)
+    assert hist.count == 100
+    assert 0.001 <= hist.percentile(50) < 0.002
+    assert 0.001 <= hist.percentile(90) < 0.002
+    assert hist.percentile(99) == 0.5
+    assert hist.max == 0.5
+    assert Histogram().percentile(50) == 0.0
+
+
+def test_shell_records_phases(shell: Shell, tmp_path):
+    (tmp_path / 'a').write_text('a')
+    shell.run('cp', ['a', 'b'], [])
+    shell.run('pwd', [], [])
+    shell.run('pwd', [], [])
+    snapshot = shell.stats.snapshot()
+    assert {phase for cmd, phase in snapshot if cmd == 'cp'} == {
+        'load',
+        'execution',
+        'undo',
+        'history',
+    }
+    assert {phase for cmd, phase in snapshot if cmd == 'pwd'} == {
+        'load',
+        'execution',
+        'history',
+    }
+    assert snapshot['pwd', 'execution'].count == 2
+
+
+def test_stats_command_filters_and_resets(shell: Shell):
+    shell.run('pwd', [], [])
+    out = shell.run('stats', ['pwd'], []).splitlines()
+    assert out[0].split() == ['команда', 'фаза', 'n', 'p50', 'p90', 'p99', 'max']
+    assert [line.split()[:3] for line in out[1:]] == [
+        ['pwd', 'load', '1'],
+        ['pwd', 'execution', '1'],
+        ['pwd', 'history', '1'],
+    ]
+    shell.run('stats', [], ['-r'])
+    # после сброса остаются только замеры самого stats -r
+    assert {cmd for cmd, _ in shell.stats.snapshot()} == {'stats'}
+
+
+def test_format_seconds():
+    assert format_seconds(0.000012) == '12µs'
+    assert format_seconds(0.0123) == '12.3ms'
+    assert format_seconds(2) == '2.00s'
+
+
+def test_parse_time_prefix():
+    pipeline = parse_pipeline(tokenize('time grep -r x . | head 2'))
+    assert pipeline.timed
+    assert [s.name for s in pipeline.stages] == ['grep', 'head']
+    assert str(pipeline) == 'time grep -r x . | head 2'
+
+
+def test_cli_time_prints_wall_and_cpu(shell: Shell, tmp_path, capsys):
+    assert CLIAdapter(shell).execute('time pwd') == 0
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == str(tmp_path)
+    assert [line.split()[0] for line in lines[1:]] == ['real', 'user', 'sys']
@@ -5,6 +5,7 @@ import pytest
 
 from entity.context import CommandContext
 from entity.errors import DomainError
+from entity.undo import UndoRecord
 from repository.command.cp import Cp
 from repository.command.mv import Mv
 from repository.command.rm import Rm
@@ -17,8 +18,11 @@ def test_undo_cp_new_file(
     fs, cp: Cp, undo_repo: UndoRepository, undo: Undo, ctx: CommandContext
 ) -> None:
     setup_tree(fs, ctx)
-    cp.execute(['/vfs/photos/photo1.png', '/vfs/home/test/newfile.png'], [], ctx)
-    undo_repo.add(cp.undo())
+    records: list[UndoRecord] = []
+    cp.execute_with_undo(
+        ['/vfs/photos/photo1.png', '/vfs/home/test/newfile.png'], [], ctx, records
+    )
+    undo_repo.add(records)
     assert Path('/vfs/home/test/newfile.png').is_file()
     undo.execute([], [], ctx)
     assert not Path('/vfs/home/test/newfile.png').exists()
@@ -30,8 +34,11 @@ def test_undo_cp_overwrite(
     setup_tree(fs, ctx)
     Path('/vfs/home/test').mkdir(parents=True, exist_ok=True)
     Path('/vfs/home/test/exist.png').write_text('OLDVAL')
-    cp.execute(['/vfs/photos/photo1.png', '/vfs/home/test/exist.png'], [], ctx)
-    undo_repo.add(cp.undo())
+    records: list[UndoRecord] = []
+    cp.execute_with_undo(
+        ['/vfs/photos/photo1.png', '/vfs/home/test/exist.png'], [], ctx, records
+    )
+    undo_repo.add(records)
     assert Path('/vfs/home/test/exist.png').read_text() == 'IMG1'
     undo.execute([], [], ctx)
     assert Path('/vfs/home/test/exist.png').read_text() == 'OLDVAL'
@@ -50,8 +57,11 @@ def test_undo_cp_overwrite_dir(
     fs.create_file('/vfs/1', contents='photos 1')
     fs.create_file('/vfs/2', contents='photos 2')
 
-    cp.execute(['/vfs/photos', '/vfs/1', '/vfs/2', '/vfs/backup'], ['-r'], ctx)
-    undo_repo.add(cp.undo())
+    records: list[UndoRecord] = []
+    cp.execute_with_undo(
+        ['/vfs/photos', '/vfs/1', '/vfs/2', '/vfs/backup'], ['-r'], ctx, records
+    )
+    undo_repo.add(records)
     assert Path('/vfs/backup/1').read_text() == 'photos 1'
     assert Path('/vfs/backup/2').read_text() == 'photos 2'
     assert os.listdir('/vfs/backup/photos') == os.listdir('/vfs/photos')
@@ -67,8 +77,11 @@ def test_undo_mv(
     fs, mv: Mv, undo_repo: UndoRepository, undo: Undo, ctx: CommandContext
 ) -> None:
     setup_tree(fs, ctx)
-    mv.execute(['/vfs/photos/photo1.png', '/vfs/home/test/restored.png'], [], ctx)
-    undo_repo.add(mv.undo())
+    records: list[UndoRecord] = []
+    mv.execute_with_undo(
+        ['/vfs/photos/photo1.png', '/vfs/home/test/restored.png'], [], ctx, records
+    )
+    undo_repo.add(records)
     assert Path('/vfs/home/test/restored.png').is_file()
     assert not Path('/vfs/photos/photo1.png').exists()
     undo.execute([], [], ctx)
@@ -81,8 +94,11 @@ def test_undo_mv_overwrite(
 ) -> None:
     setup_tree(fs, ctx)
     Path('/vfs/home/test/exist.png').write_text('ORIGINAL')
-    mv.execute(['/vfs/photos/my.png', '/vfs/home/test/exist.png'], [], ctx)
-    undo_repo.add(mv.undo())
+    records: list[UndoRecord] = []
+    mv.execute_with_undo(
+        ['/vfs/photos/my.png', '/vfs/home/test/exist.png'], [], ctx, records
+    )
+    undo_repo.add(records)
     assert Path('/vfs/home/test/exist.png').read_text() == 'IMG2'
     undo.execute([], [], ctx)
     assert Path('/vfs/home/test/exist.png').read_text() == 'ORIGINAL'
@@ -101,8 +117,11 @@ def test_undo_mv_overwrite_dir(
     fs.create_file('/vfs/1', contents='photos 1')
     fs.create_file('/vfs/2', contents='photos 2')
     photos = os.listdir('/vfs/photos')
-    mv.execute(['/vfs/photos', '/vfs/1', '/vfs/2', '/vfs/backup'], ['-r'], ctx)
-    undo_repo.add(mv.undo())
+    records: list[UndoRecord] = []
+    mv.execute_with_undo(
+        ['/vfs/photos', '/vfs/1', '/vfs/2', '/vfs/backup'], ['-r'], ctx, records
+    )
+    undo_repo.add(records)
     assert Path('/vfs/backup/1').read_text() == 'photos 1'
     assert Path('/vfs/backup/2').read_text() == 'photos 2'
     assert Path('/vfs/photos').exists() is False
@@ -124,10 +143,14 @@ def test_undo_cp_batch(
     fs, cp: Cp, undo_repo: UndoRepository, undo: Undo, ctx: CommandContext
 ) -> None:
     setup_tree(fs, ctx)
-    cp.execute(
-        ['/vfs/photos/photo1.png', '/vfs/photos/my.png', '/vfs/home/test'], [], ctx
+    records: list[UndoRecord] = []
+    cp.execute_with_undo(
+        ['/vfs/photos/photo1.png', '/vfs/photos/my.png', '/vfs/home/test'],
+        [],
+        ctx,
+        records,
     )
-    undo_repo.add(cp.undo())
+    undo_repo.add(records)
     assert Path('/vfs/home/test/photo1.png').is_file()
     assert Path('/vfs/home/test/my.png').is_file()
     undo.execute([], [], ctx)
@@ -145,8 +168,9 @@ def test_undo_rm_file_restore(
 ) -> None:
     setup_tree(fs, ctx)
     assert Path('/vfs/photos/my.png').is_file()
-    rm.execute(['/vfs/photos/my.png'], ['-y'], ctx)
-    undo_repo.add(rm.undo())
+    records: list[UndoRecord] = []
+    rm.execute_with_undo(['/vfs/photos/my.png'], ['-y'], ctx, records)
+    undo_repo.add(records)
     assert not Path('/vfs/photos/my.png').exists()
     undo.execute([], [], ctx)
     assert Path('/vfs/photos/my.png').is_file()
@@ -160,8 +184,9 @@ def test_undo_rm_r_dir_restore_tree(
     Path('/vfs/photos/album/p1.jpg').write_text('X')
     Path('/vfs/photos/album/p2.jpg').write_text('Y')
     assert Path('/vfs/photos').is_dir()
-    rm.execute(['/vfs/photos'], ['-r', '-y'], ctx)
-    undo_repo.add(rm.undo())
+    records: list[UndoRecord] = []
+    rm.execute_with_undo(['/vfs/photos'], ['-r', '-y'], ctx, records)
+    undo_repo.add(records)
     assert not Path('/vfs/photos').exists()
     undo.execute([], [], ctx)
     assert Path('/vfs/photos').is_dir()
@@ -178,8 +203,11 @@ def test_undo_rm_multiple_files_restore(
     setup_tree(fs, ctx)
     assert Path('/vfs/photos/photo1.png').is_file()
     assert Path('/vfs/photos/Azamat.jpg').is_file()
-    rm.execute(['/vfs/photos/photo1.png', '/vfs/photos/Azamat.jpg'], ['-y'], ctx)
-    undo_repo.add(rm.undo())
+    records: list[UndoRecord] = []
+    rm.execute_with_undo(
+        ['/vfs/photos/photo1.png', '/vfs/photos/Azamat.jpg'], ['-y'], ctx, records
+    )
+    undo_repo.add(records)
     assert not Path('/vfs/photos/photo1.png').exists()
     assert not Path('/vfs/photos/Azamat.jpg').exists()
     undo.execute([], [], ctx)
@@ -194,8 +222,8 @@ def test_rm_r_undo_returns_apply_ready_order(fs, rm: Rm, ctx: CommandContext):
     Path('/vfs/tmpdata/a/f2').write_text('2')
     Path('/vfs/tmpdata/a/b/f3').write_text('3')
 
-    rm.execute(['/vfs/tmpdata'], ['-r', '-y'], ctx)
-    records = rm.undo()
+    records: list[UndoRecord] = []
+    rm.execute_with_undo(['/vfs/tmpdata'], ['-r', '-y'], ctx, records)
 
     dirs = [r for r in records if Path(r.dst).is_dir()]
     files = [r for r in records if not Path(r.dst).is_dir()]
@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from entity.undo import UndoRecord
+from repository import undo_file_repository
+from repository.undo_file_repository import UndoJournalRepository
+
+
+def _batch(i: int) -> tuple[UndoRecord, ...]:
+    return (UndoRecord('cp', f'/src/{i}', f'/dst/{i}'),)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / '.undo.jsonl'
+
+
+def test_stack_survives_reopen(path):
+    repo = UndoJournalRepository(path)
+    for i in range(3):
+        repo.add(_batch(i))
+    assert repo.pop() == _batch(2)
+    assert repo.last() == _batch(1)
+
+    repo = UndoJournalRepository(path)
+    assert repo.all() == [_batch(0), _batch(1)]
+    assert repo.pop() == _batch(1)
+    assert repo.pop() == _batch(0)
+    assert repo.pop() is None
+    assert repo.last() is None
+
+
+def test_add_and_pop_only_append(path):
+    repo = UndoJournalRepository(path)
+    repo.add(_batch(0))
+    repo.add(_batch(1))
+    repo.pop()
+    lines = path.read_text().splitlines()
+    assert [next(iter(json.loads(line))) for line in lines] == ['add', 'add', 'pop']
+
+
+def test_compaction(path, monkeypatch):
+    monkeypatch.setattr(undo_file_repository, 'COMPACT_MIN', 2)
+    repo = UndoJournalRepository(path)
+    repo.add(_batch(0))
+    for i in range(1, 4):
+        repo.add(_batch(i))
+        repo.pop()
+    # живая пачка одна, мёртвых строк было бы 6
+    assert len(path.read_text().splitlines()) <= 4
+    assert not path.with_name('.undo.jsonl.tmp').exists()
+    assert UndoJournalRepository(path).all() == [_batch(0)]
+
+
+def test_torn_line_is_dropped(path):
+    repo = UndoJournalRepository(path)
+    repo.add(_batch(0))
+    with path.open('a', encoding='utf-8') as f:
+        f.write('{"add": [{"action": "cp", "sr')
+    repo = UndoJournalRepository(path)
+    assert repo.all() == [_batch(0)]
+    repo.add(_batch(1))
+    assert UndoJournalRepository(path).all() == [_batch(0), _batch(1)]
+
+
+def test_migrates_legacy_json(path, tmp_path):
+    legacy = tmp_path / '.undo.json'
+    legacy.write_text(
+        json.dumps([[{'action': 'rm', 'src': '/a', 'dst': '/trash/a'}], []]),
+        encoding='utf-8',
+    )
+    repo = UndoJournalRepository(path, legacy)
+    assert repo.all() == [(UndoRecord('rm', '/a', '/trash/a'),), ()]
+    assert not legacy.exists()
+    repo.clear()
+    assert UndoJournalRepository(path, legacy).all() == []
+
+
+def test_two_instances_share_journal(path):
+    a = UndoJournalRepository(path)
+    b = UndoJournalRepository(path)
+    a.add(_batch(0))
+    assert b.last() == _batch(0)
+    a.add(_batch(1))
+    b.add(_batch(2))
+    assert a.pop() == _batch(2)
+    assert b.pop() == _batch(1)
+    assert a.pop() == _batch(0)
+    assert b.pop() is None
+
+
+def test_compaction_by_other_instance(path, monkeypatch):
+    monkeypatch.setattr(undo_file_repository, 'COMPACT_MIN', 2)
+    a = UndoJournalRepository(path)
+    b = UndoJournalRepository(path)
+    a.add(_batch(0))
+    assert b.all() == [_batch(0)]
+    for i in range(1, 5):
+        a.add(_batch(i))
+        a.pop()
+    b.add(_batch(5))
+    assert a.all() == [_batch(0), _batch(5)]
+    assert b.pop() == _batch(5)
+    assert a.last() == _batch(0)
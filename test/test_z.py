@@ -0,0 +1,116 @@
+import os
+
+import pytest
+
+from entity.context import CommandContext
+from entity.errors import ValidationError
+from entity.frecency import DAY, HOUR, MAX_TOTAL_RANK
+from repository import dir_index_file_repository
+from repository.command.cd import Cd
+from repository.command.z import Z
+from repository.dir_index_file_repository import DirIndexFileRepository
+from repository.in_memory_dir_index import InMemoryDirIndex
+
+NOW = 1_700_000_000.0
+
+
+@pytest.fixture
+def dirs(tmp_path, ctx: CommandContext) -> list[str]:
+    ctx.pwd = str(tmp_path)
+    paths = [
+        tmp_path / 'projects' / 'app' / 'src',
+        tmp_path / 'projects' / 'lib' / 'src',
+        tmp_path / 'docs',
+    ]
+    for p in paths:
+        p.mkdir(parents=True)
+    return [str(p) for p in paths]
+
+
+def test_fragments_match_in_order_and_last_in_name():
+    index = InMemoryDirIndex()
+    index.visit('/home/u/projects/app/src', NOW)
+    index.visit('/home/u/src/projects', NOW)
+    assert index.matches(['pro', 'src'], NOW) == ['/home/u/projects/app/src']
+    assert index.matches(['PROJ'], NOW) == ['/home/u/src/projects']
+    assert index.matches(['nothing'], NOW) == []
+
+
+def test_frequency_and_recency():
+    index = InMemoryDirIndex()
+    for _ in range(3):
+        index.visit('/old/src', NOW - 2 * DAY)
+    index.visit('/new/src', NOW - HOUR / 2)
+    # 3 / 2 против 1 * 4: недавнее посещение перевешивает частое старое
+    assert index.matches(['src'], NOW) == ['/new/src', '/old/src']
+    index.visit('/old/src', NOW)
+    assert index.matches(['src'], NOW)[0] == '/old/src'
+
+
+def test_aging_forgets_rare_directories():
+    index = InMemoryDirIndex()
+    index.visit('/rare', NOW)
+    for _ in range(int(MAX_TOTAL_RANK)):
+        index.visit('/often', NOW)
+    assert [v.path for v in index.all()] == ['/often']
+
+
+def test_cd_records_and_z_jumps(dirs: list[str], ctx: CommandContext, tmp_path):
+    index = InMemoryDirIndex()
+    cd, z = Cd(index), Z(index)
+    for _ in range(2):
+        cd.execute([dirs[0]], [], ctx)
+    cd.execute([dirs[1]], [], ctx)
+    cd.execute([str(tmp_path)], [], ctx)
+
+    z.execute(['src'], [], ctx)
+    assert ctx.pwd == dirs[0]
+    z.execute(['lib', 'src'], [], ctx)
+    assert ctx.pwd == dirs[1]
+    # app: два cd и один z, lib: cd и z
+    assert z.execute([], ['-l'], ctx).splitlines()[:2] == [dirs[0], dirs[1]]
+    with pytest.raises(ValidationError):
+        z.execute(['docs'], [], ctx)
+
+
+def test_z_forgets_removed_directory(dirs: list[str], ctx: CommandContext):
+    index = InMemoryDirIndex()
+    index.visit(dirs[0], NOW)
+    index.visit(dirs[1], NOW - DAY * 30)
+    os.rmdir(dirs[0])
+    Z(index).execute(['src'], [], ctx)
+    assert ctx.pwd == dirs[1]
+    assert dirs[0] not in index.matches(['src'])
+
+
+def test_file_index_is_lazy_and_persistent(tmp_path):
+    path = tmp_path / '.z'
+    repo = DirIndexFileRepository(path)
+    repo.visit('/a/src', NOW)
+    repo.visit('/a/src', NOW)
+    repo.visit('/b/src', NOW)
+    # cd только дописывает строки, файл не читается
+    assert not repo._loaded
+    assert len(path.read_text().splitlines()) == 3
+
+    repo = DirIndexFileRepository(path)
+    assert repo.matches(['src'], NOW) == ['/a/src', '/b/src']
+    repo.remove('/a/src')
+    assert DirIndexFileRepository(path).matches(['src'], NOW) == ['/b/src']
+
+
+def test_file_index_compacts(tmp_path, monkeypatch):
+    monkeypatch.setattr(dir_index_file_repository, 'COMPACT_MIN', 4)
+    path = tmp_path / '.z'
+    repo = DirIndexFileRepository(path)
+    repo.matches([])
+    for _ in range(10):
+        repo.visit('/a', NOW)
+    repo.visit('/b', NOW)
+    # сжатие переписывает файл итоговыми рангами, строк не больше 4 + 2 * 2
+    assert len(path.read_text().splitlines()) <= 8
+    fresh = DirIndexFileRepository(path)
+    assert {v.path: v.rank for v in (fresh.matches([]) and fresh.all())} == {
+        '/a': 10,
+        '/b': 1,
+    }
@@ -16,10 +16,46 @@ class HistoryRepository(Protocol):
         """Возвращает все последние команды"""
         raise NotImplementedError
 
+    def count(self) -> int:
+        """Число команд в истории"""
+        raise NotImplementedError
+
+    def entries(self, start: int, end: int) -> list[str]:
+        """Записи с номерами start..end включительно, нумерация с 1"""
+        raise NotImplementedError
+
+    def get(self, n: int) -> str | None:
+        """Команда с номером n для повтора через !n"""
+        raise NotImplementedError
+
+    def search(
+        self, query: str, regex: bool = False, limit: int = 20
+    ) -> list[tuple[int, str]]:
+        """Номер последней записи и команда, новые первыми, без повторов"""
+        raise NotImplementedError
+
     def clear(self) -> None:
         """Очищает историю команд"""
         raise NotImplementedError
 
+    def close(self) -> None:
+        """Сохраняет отложенные записи при выходе"""
+        raise NotImplementedError
+
+
+class DirIndexRepository(Protocol):
+    def visit(self, path: str, now: float | None = None) -> None:
+        """Учитывает посещение директории"""
+        raise NotImplementedError
+
+    def remove(self, path: str) -> None:
+        """Забывает директорию"""
+        raise NotImplementedError
+
+    def matches(self, fragments: list[str], now: float | None = None) -> list[str]:
+        """Директории с фрагментами в пути, по убыванию частоты и свежести"""
+        raise NotImplementedError
+
 
 class UndoRepository(Protocol):
     def add(self, record: Sequence[UndoRecord]) -> None:
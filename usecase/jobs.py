@@ -0,0 +1,108 @@
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Iterator
+
+from entity.errors import DomainError
+
+DEFAULT_WORKERS = 4
+
+
+@dataclass
+class Job:
+    id: int
+    line: str
+    future: Future[str]
+    started: float = field(default_factory=time.monotonic)
+    finished: float | None = None
+
+    @property
+    def done(self) -> bool:
+        return self.future.done()
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished if self.finished is not None else time.monotonic()
+        return end - self.started
+
+
+class JobManager:
+    """Фоновые задания shell, выполняются в общем пуле потоков"""
+
+    def __init__(self, max_workers: int = DEFAULT_WORKERS) -> None:
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix='job')
+        self._jobs: dict[int, Job] = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def submit(self, line: str, fn: Callable[[], str]) -> Job:
+        with self._lock:
+            job_id = self._next_id
+            self._next_id += 1
+            job = Job(job_id, line, self._pool.submit(fn))
+            self._jobs[job_id] = job
+        job.future.add_done_callback(lambda _: self._mark_finished(job))
+        return job
+
+    def _mark_finished(self, job: Job) -> None:
+        job.finished = time.monotonic()
+
+    def all(self) -> list[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def get(self, job_id: int | None = None) -> Job:
+        """Задание по номеру, без номера - последнее запущенное"""
+        with self._lock:
+            if not self._jobs:
+                raise DomainError('Нет фоновых заданий')
+            if job_id is None:
+                job_id = max(self._jobs)
+            job = self._jobs.get(job_id)
+        if job is None:
+            raise DomainError(f'Задание [{job_id}] не найдено')
+        return job
+
+    def wait(self, job: Job) -> str:
+        """Ждёт завершения задания и убирает его из списка.
+        Ошибка задания пробрасывается вызывающему"""
+        try:
+            return job.future.result()
+        finally:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+
+    def take_finished(self) -> list[Job]:
+        """Завершённые задания. Как в bash, после отчёта задание убирается
+        из списка: jobs, wait и fg его больше не видят"""
+        with self._lock:
+            done = [j for j in self._jobs.values() if j.done]
+            for job in done:
+                del self._jobs[job.id]
+        return done
+
+    def shutdown(self) -> None:
+        """Дожидается запущенных заданий"""
+        self._pool.shutdown(wait=True)
+
+
+_current: ContextVar[JobManager | None] = ContextVar('jobs', default=None)
+
+
+@contextmanager
+def jobs_scope(jobs: JobManager) -> Iterator[JobManager]:
+    """Задания клиента демона: jobs, wait и fg внутри блока видят только их"""
+    reset = _current.set(jobs)
+    try:
+        yield jobs
+    finally:
+        _current.reset(reset)
+
+
+def current_jobs(default: JobManager) -> JobManager:
+    """Задания текущего клиента, вне jobs_scope - общие задания shell"""
+    jobs = _current.get()
+    return jobs if jobs is not None else default
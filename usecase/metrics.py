@@ -0,0 +1,86 @@
+import threading
+from dataclasses import dataclass
+from typing import Callable
+
+COMMANDS_TOTAL = 'unix_shell_commands_total'
+ERRORS_TOTAL = 'unix_shell_command_errors_total'
+FILES_TOTAL = 'unix_shell_files_total'
+BYTES_TOTAL = 'unix_shell_bytes_total'
+TRASH_BYTES = 'unix_shell_trash_bytes'
+TRASH_FILES = 'unix_shell_trash_files'
+IO_BYTES_TOTAL = 'unix_shell_io_bytes_total'
+IO_OPERATIONS_TOTAL = 'unix_shell_io_operations_total'
+
+HELP = {
+    COMMANDS_TOTAL: 'Выполненные команды',
+    ERRORS_TOTAL: 'Команды, завершившиеся ошибкой, по типу ошибки',
+    FILES_TOTAL: 'Файлы и директории, обработанные командами (op: copy, move, archive, delete)',
+    BYTES_TOTAL: 'Байты файлов, обработанных командами (op: copy, move, archive, delete)',
+    TRASH_BYTES: 'Размер .trash в байтах',
+    TRASH_FILES: 'Количество файлов в .trash',
+    IO_BYTES_TOTAL: 'Байты read/write за время команд по /proc/self/io (direction: read, write)',
+    IO_OPERATIONS_TOTAL: 'Операции ввода-вывода команд (op: read, write, open, readdir, stat)',
+}
+
+Labels = tuple[tuple[str, str], ...]
+
+
+@dataclass(frozen=True)
+class Sample:
+    name: str
+    labels: Labels
+    value: float
+    kind: str  # counter или gauge
+
+
+class Counter:
+    """Монотонный счётчик. Получается один раз через Metrics.counter,
+    inc стоит одного захвата блокировки - можно вызывать в циклах по файлам"""
+
+    __slots__ = ('_lock', '_value')
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._value = 0.0
+
+    def inc(self, amount: float = 1) -> None:
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+
+class Metrics:
+    """Реестр метрик процесса: счётчики и вычисляемые при сборе gauge"""
+
+    def __init__(self) -> None:
+        self._counters: dict[tuple[str, Labels], Counter] = {}
+        self._gauges: dict[tuple[str, Labels], Callable[[], float]] = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name: str, **labels: str) -> Counter:
+        key = (name, tuple(sorted(labels.items())))
+        counter = self._counters.get(key)
+        if counter is None:
+            with self._lock:
+                counter = self._counters.setdefault(key, Counter())
+        return counter
+
+    def gauge(self, name: str, fn: Callable[[], float], **labels: str) -> None:
+        """fn вызывается при каждом сборе, например размер .trash"""
+        with self._lock:
+            self._gauges[name, tuple(sorted(labels.items()))] = fn
+
+    def collect(self) -> list[Sample]:
+        with self._lock:
+            counters = list(self._counters.items())
+            gauges = list(self._gauges.items())
+        samples = [
+            Sample(name, labels, c.value, 'counter') for (name, labels), c in counters
+        ]
+        samples += [
+            Sample(name, labels, fn(), 'gauge') for (name, labels), fn in gauges
+        ]
+        return sorted(samples, key=lambda s: (s.name, s.labels))
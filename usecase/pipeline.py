@@ -0,0 +1,120 @@
+import contextvars
+import queue
+import threading
+from typing import Any, Callable, Generator, Iterator, Sequence
+
+from entity.cancel import CancelToken, cancel_scope, current_token
+
+Stage = Callable[[Iterator[str] | None], Generator[Any, None, None]]
+
+# строк в буфере между соседними стадиями
+DEFAULT_BUFFER = 1024
+# как часто заблокированный писатель проверяет, не закрыт ли канал
+_POLL_INTERVAL = 0.05
+
+_END = object()
+
+
+class _Failure:
+    def __init__(self, error: Exception) -> None:
+        self.error = error
+
+
+class Channel:
+    """Ограниченный буфер между соседними стадиями конвейера.
+    token - отмена стадии-писателя: close() прерывает её в ближайшем
+    checkpoint, даже если она долго ничего не пишет (grep -r | head)"""
+
+    def __init__(self, maxsize: int = DEFAULT_BUFFER) -> None:
+        self._queue: queue.Queue[object] = queue.Queue(maxsize)
+        self._closed = threading.Event()
+        self.token = CancelToken(current_token())
+
+    @property
+    def closed(self) -> bool:
+        return self._closed.is_set()
+
+    def put(self, item: object) -> bool:
+        """Кладёт элемент, ждёт место в буфере. False если читатель ушёл"""
+        while not self._closed.is_set():
+            try:
+                self._queue.put(item, timeout=_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def close(self) -> None:
+        """Читатель больше не ждёт данных, писатель должен остановиться"""
+        self._closed.set()
+        self.token.cancel()
+
+    def __iter__(self) -> Iterator[str]:
+        while True:
+            try:
+                item = self._queue.get(timeout=_POLL_INTERVAL)
+            except queue.Empty:
+                # конвейер сворачивается, читать больше нечего
+                if self._closed.is_set():
+                    return
+                continue
+            if item is _END:
+                return
+            if isinstance(item, _Failure):
+                raise item.error
+            yield item  # type: ignore[misc]
+
+
+def _pump(stage: Stage, stdin: Channel | None, out: Channel) -> None:
+    try:
+        with cancel_scope(out.token):
+            lines = stage(iter(stdin) if stdin is not None else None)
+            try:
+                for line in lines:
+                    if not out.put(line):
+                        break
+            finally:
+                # досрочная остановка закрывает генератор и его ресурсы
+                lines.close()
+    except Exception as e:
+        # ошибка уходит читателю; если он ушёл, put вернёт False
+        out.put(_Failure(e))
+    finally:
+        if stdin is not None:
+            stdin.close()
+        out.put(_END)
+
+
+def run_pipeline(
+    stages: Sequence[Stage], buffer: int = DEFAULT_BUFFER
+) -> Generator[Any, None, None]:
+    """Запускает стадии параллельно, соединяя их ограниченными буферами.
+    Последняя стадия выполняется в вызывающем потоке, её вывод отдаётся
+    как есть: строки или записи (Shell.records)"""
+    channels: list[Channel] = []
+    threads: list[threading.Thread] = []
+    stdin: Channel | None = None
+
+    for stage in stages[:-1]:
+        out = Channel(buffer)
+        # стадии видят контекст вызывающего; токен канала дочерний к его токену
+        t = threading.Thread(
+            target=contextvars.copy_context().run,
+            args=(_pump, stage, stdin, out),
+            daemon=True,
+        )
+        channels.append(out)
+        threads.append(t)
+        stdin = out
+
+    for t in threads:
+        t.start()
+
+    try:
+        yield from stages[-1](iter(stdin) if stdin is not None else None)
+    finally:
+        # остановка всех стадий выше по конвейеру
+        for ch in channels:
+            ch.close()
+        for t in threads:
+            t.join()
@@ -1,8 +1,182 @@
-from entity.command import Command
+import asyncio
+import copy
+import threading
+import time
+from concurrent.futures import Executor
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import partial
+from typing import Any, AsyncIterator, Generator, Iterator
+
+from entity.cancel import CancelToken, cancel_scope
+from entity.command import (
+    Command,
+    Invocation,
+    LazyCommand,
+    RawOutputCommand,
+    RecordCommand,
+    StreamCommand,
+)
 from entity.context import CommandContext
-from entity.errors import CommandNotFoundError, DomainError
-from entity.undo import UndoCommand
+from entity.errors import CommandNotFoundError
+from entity.iostat import IOCounters, io_scope, read_proc_io
+from entity.record import Record, Summary, Text
+from entity.undo import UndoCommand, UndoRecord
 from usecase.interface import HistoryRepository, UndoRepository
+from usecase.metrics import (
+    COMMANDS_TOTAL,
+    ERRORS_TOTAL,
+    IO_BYTES_TOTAL,
+    IO_OPERATIONS_TOTAL,
+    Metrics,
+)
+from usecase.pipeline import run_pipeline
+from usecase.stats import LatencyStats
+
+
+def _output(
+    cmd: Command,
+    args: list[str],
+    flags: list[str],
+    ctx: CommandContext,
+    stdin: Iterator[str] | None,
+) -> Iterator[str]:
+    """Приводит любую команду к потоковому виду"""
+    if isinstance(cmd, StreamCommand):
+        yield from cmd.stream(args, flags, ctx, stdin)
+        return
+    # команды со строковым результатом отдают его одним куском, stdin не читают
+    res = cmd.execute(args, flags, ctx)
+    if res != '':
+        yield res
+
+
+def _records(
+    cmd: Command,
+    args: list[str],
+    flags: list[str],
+    ctx: CommandContext,
+    stdin: Iterator[str] | None,
+) -> Iterator[Record]:
+    """Структурированный вывод: записи команды или Text на каждую строку текста"""
+    if isinstance(cmd, RecordCommand):
+        yield from cmd.records(args, flags, ctx, stdin)
+        return
+    for chunk in _output(cmd, args, flags, ctx, stdin):
+        for line in chunk.split('\n'):
+            yield Text(line)
+
+
+# arun: сколько строк вывода копится, пока event loop их не забрал
+ARUN_BATCH = 256
+
+
+class _Feed:
+    """Вывод генератора, который продвигает поток executor. Строки копятся
+    в буфере (не больше ARUN_BATCH, дальше поток ждёт), event loop
+    будится первой строкой и забирает всё накопленное разом"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._loop = loop
+        self._cond = threading.Condition()
+        self._ready = asyncio.Event()
+        self._buf: list[str] = []
+        self._done = False
+        self._error: Exception | None = None
+        self._stopped = False
+
+    def put(self, chunk: str) -> bool:
+        """Из потока executor; False - читатель ушёл, команду пора закрыть"""
+        with self._cond:
+            while len(self._buf) >= ARUN_BATCH and not self._stopped:
+                self._cond.wait()
+            if self._stopped:
+                return False
+            self._buf.append(chunk)
+            wake = len(self._buf) == 1
+        if wake:
+            self._wake()
+        return True
+
+    def finish(self, error: Exception | None) -> None:
+        with self._cond:
+            self._done = True
+            self._error = error
+        self._wake()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    async def take(self) -> list[str]:
+        """Всё накопленное; [] - вывод кончился"""
+        while True:
+            with self._cond:
+                batch, self._buf = self._buf, []
+                self._cond.notify_all()
+                if not batch and not self._done:
+                    self._ready.clear()
+                done, error = self._done, self._error
+            if batch:
+                return batch
+            if error is not None:
+                raise error
+            if done:
+                return []
+            await self._ready.wait()
+
+    def _wake(self) -> None:
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # event loop закрыт: читать вывод некому
+            pass
+
+
+async def _aiter(
+    gen: Generator[str, None, None], executor: Executor | None
+) -> AsyncIterator[str]:
+    """Отдаёт вывод генератора в event loop, блокирующий ввод-вывод идёт в executor"""
+    loop = asyncio.get_running_loop()
+    feed = _Feed(loop)
+    token = CancelToken()
+
+    def produce() -> None:
+        error = None
+        try:
+            with cancel_scope(token):
+                try:
+                    for chunk in gen:
+                        if not feed.put(chunk):
+                            break
+                finally:
+                    # закрывает тот же поток: генератор сохраняет undo и историю
+                    gen.close()
+        except Exception as e:
+            error = e
+        feed.finish(error)
+
+    producer = loop.run_in_executor(executor, produce)
+    try:
+        while batch := await feed.take():
+            for chunk in batch:
+                yield chunk
+        await producer
+    finally:
+        # при отмене задачи не ждём поток: команда остановится в ближайшем
+        # checkpoint или на следующей строке, генератор закроется и сохранит undo
+        token.cancel()
+        feed.stop()
+
+
+# строку целиком в историю пишет адаптер, команды внутри неё не пишут
+_line_history: ContextVar[bool] = ContextVar('line_history', default=False)
+
+
+def _load(cmd: Command) -> Command:
+    """Подгружает команду из реестра перед первым выполнением"""
+    return cmd.load() if isinstance(cmd, LazyCommand) else cmd
 
 
 class Shell:
@@ -12,11 +186,19 @@ class Shell:
         undo_repo: UndoRepository,
         context: CommandContext,
         commands: dict[str, Command],
+        *,
+        stats: LatencyStats | None = None,
+        metrics: Metrics | None = None,
     ):
         self._history_repo = history
         self._undo_repo = undo_repo
         self._context = context
         self._commands = commands
+        self._command_names = sorted(commands)
+        self._stats = stats if stats is not None else LatencyStats()
+        self._metrics = metrics if metrics is not None else Metrics()
+        # стадии конвейера и фоновые задания завершаются в разных потоках
+        self._persist_lock = threading.Lock()
 
     @property
     def user(self) -> str:
@@ -26,21 +208,288 @@ class Shell:
     def pwd(self) -> str:
         return self._context.pwd
 
+    @property
+    def context(self) -> CommandContext:
+        return self._context
+
+    @property
+    def command_names(self) -> list[str]:
+        """Отсортированные имена команд, для автодополнения"""
+        return self._command_names
+
+    @property
+    def stats(self) -> LatencyStats:
+        return self._stats
+
+    @property
+    def metrics(self) -> Metrics:
+        return self._metrics
+
+    def history_command(self, n: int) -> str | None:
+        """Команда из истории по номеру, для !n"""
+        return self._history_repo.get(n)
+
+    @contextmanager
+    def line_history(self) -> Iterator[None]:
+        """Команды внутри блока не пишут историю по отдельности:
+        строку целиком записывает add_history_line"""
+        reset = _line_history.set(True)
+        try:
+            yield
+        finally:
+            _line_history.reset(reset)
+
+    def add_history_line(self, line: str, name: str) -> None:
+        """Записывает в историю строку как её набрали: с кавычками,
+        конвейером, перенаправлением и шаблонами. name - команда для stats"""
+        started = time.perf_counter()
+        with self._persist_lock:
+            self._history_repo.add(line, [], [])
+        self._stats.record(name, 'history', time.perf_counter() - started)
+
+    def search_history(
+        self, query: str, regex: bool = False, limit: int = 20
+    ) -> list[tuple[int, str]]:
+        """Поиск по истории для Ctrl-R, новые команды первыми"""
+        return self._history_repo.search(query, regex, limit)
+
+    def close(self) -> None:
+        """Дописывает отложенную историю, вызывается при выходе из shell"""
+        self._history_repo.close()
+
+    def session(self, context: CommandContext) -> 'Shell':
+        """Shell со своим контекстом (pwd, user) поверх общих команд,
+        репозиториев и блокировок - для отдельного клиента демона"""
+        session = copy.copy(self)
+        session._context = context
+        return session
+
     def run(self, name: str, args: list[str], flags: list[str]) -> str:
+        return '\n'.join(self.stream(name, args, flags))
+
+    def stream(
+        self,
+        name: str,
+        args: list[str],
+        flags: list[str],
+        stdin: Iterator[str] | None = None,
+    ) -> Generator[str, None, None]:
+        """Выполняет команду, отдавая строки вывода по мере их появления"""
+        cmd = self._get_command(name)
+        return self._stream(cmd, name, args, flags, stdin)
+
+    def pipeline(self, stages: list[Invocation]) -> Generator[str, None, None]:
+        """Выполняет конвейер 'a | b | c', вывод каждой стадии идёт на вход следующей"""
+        if len(stages) == 1:
+            s = stages[0]
+            return self.stream(s.name, s.args, s.flags)
+        # неизвестная команда не должна запускать остальные стадии
+        for s in stages:
+            self._get_command(s.name)
+        return run_pipeline(
+            [partial(self.stream, s.name, s.args, s.flags) for s in stages]
+        )
+
+    def records(self, stages: list[Invocation]) -> Generator[Record, None, None]:
+        """Конвейер, последняя стадия которого отдаёт записи вместо текста
+        (режим --json): ls и grep - свои записи, cp/mv/rm - Summary с числом
+        затронутых объектов, остальные - Text на каждую строку"""
+        for s in stages:
+            self._get_command(s.name)
+        last = stages[-1]
+        tail = partial(
+            self._stream,
+            self._get_command(last.name),
+            last.name,
+            last.args,
+            last.flags,
+            structured=True,
+        )
+        if len(stages) == 1:
+            return tail(None)
+        return run_pipeline(
+            [
+                *(partial(self.stream, s.name, s.args, s.flags) for s in stages[:-1]),
+                tail,
+            ]
+        )
+
+    def arun(
+        self,
+        name: str,
+        args: list[str],
+        flags: list[str],
+        executor: Executor | None = None,
+    ) -> AsyncIterator[str]:
+        """Асинхронный stream: команда выполняется в executor (по умолчанию
+        в executor event loop), строки вывода приходят async-итератором.
+        Отмена задачи прерывает команду в ближайшей безопасной точке.
+        Для параллельных клиентов с разными pwd - arun у Shell.session(ctx)"""
+        return _aiter(self.stream(name, args, flags), executor)
+
+    def apipeline(
+        self, stages: list[Invocation], executor: Executor | None = None
+    ) -> AsyncIterator[str]:
+        """Асинхронный pipeline, аналог arun для 'a | b | c'"""
+        return _aiter(self.pipeline(stages), executor)
+
+    def write_to(self, name: str, args: list[str], flags: list[str], fd: int) -> bool:
+        """Пишет вывод команды прямо в дескриптор, если команда это умеет.
+        False - команда выводит только текстом, нужен обычный stream"""
+        if '-h' in flags:
+            return False
+        started = time.perf_counter()
+        cmd = _load(self._get_command(name))
+        if not isinstance(cmd, RawOutputCommand):
+            return False
+        self._stats.record(name, 'load', time.perf_counter() - started)
+        io = IOCounters()
+        proc = read_proc_io()
+        started = time.perf_counter()
+        try:
+            with io_scope(io):
+                cmd.write_to(args, flags, self._context, fd)
+        except Exception as e:
+            self._count_error(name, e)
+            raise
+        finally:
+            self._stats.record(name, 'execution', time.perf_counter() - started)
+            io.add_proc(proc)
+            self._count_io(name, io)
+            self._metrics.counter(COMMANDS_TOTAL, command=name).inc()
+        self._add_history(name, args, flags)
+        return True
+
+    def _count_error(self, name: str, e: Exception) -> None:
+        self._metrics.counter(ERRORS_TOTAL, command=name, error=type(e).__name__).inc()
+
+    def _count_io(self, name: str, io: IOCounters) -> None:
+        counter = self._metrics.counter
+        counter(IO_BYTES_TOTAL, command=name, direction='read').inc(io.read_bytes)
+        counter(IO_BYTES_TOTAL, command=name, direction='write').inc(io.write_bytes)
+        for op, value in (
+            ('read', io.read_calls),
+            ('write', io.write_calls),
+            ('open', io.files_opened),
+            ('readdir', io.dirs_walked),
+            ('stat', io.stat_calls),
+        ):
+            counter(IO_OPERATIONS_TOTAL, command=name, op=op).inc(value)
+
+    def _run_undoable(
+        self,
+        cmd: UndoCommand,
+        name: str,
+        args: list[str],
+        flags: list[str],
+        *,
+        structured: bool,
+    ) -> Iterator[Any]:
+        # записи отмены у каждого вызова свои, команда общая для всех потоков
+        undo: list[UndoRecord] = []
+        io = IOCounters()
+        proc = read_proc_io()
+        started = time.perf_counter()
+        try:
+            with io_scope(io):
+                res = cmd.execute_with_undo(args, flags, self._context, undo)
+        finally:
+            self._stats.record(name, 'execution', time.perf_counter() - started)
+            io.add_proc(proc)
+            self._count_io(name, io)
+            # undo сохраняется и при ошибке
+            if undo:
+                started = time.perf_counter()
+                with self._persist_lock:
+                    self._undo_repo.add(undo)
+                self._stats.record(name, 'undo', time.perf_counter() - started)
+        if structured:
+            yield Summary(name, len(undo))
+        elif res != '':
+            yield res
+
+    def _timed(self, name: str, chunks: Iterator[Any]) -> Generator[Any, None, None]:
+        """Считает время и ввод-вывод внутри команды, без времени потребителя
+        вывода. /proc/self/io меряется от начала до конца команды целиком"""
+        spent = 0.0
+        io = IOCounters()
+        proc = read_proc_io()
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    # генератор может продвигаться из разных потоков (arun),
+                    # поэтому счётчики подключаются на каждый next
+                    with io_scope(io):
+                        chunk = next(chunks)
+                except StopIteration:
+                    return
+                finally:
+                    spent += time.perf_counter() - started
+                yield chunk
+        finally:
+            if isinstance(chunks, Generator):
+                chunks.close()
+            self._stats.record(name, 'execution', spent)
+            io.add_proc(proc)
+            self._count_io(name, io)
+
+    def _add_history(self, name: str, args: list[str], flags: list[str]) -> None:
+        if _line_history.get():
+            return
+        started = time.perf_counter()
+        with self._persist_lock:
+            self._history_repo.add(name, args, flags)
+        self._stats.record(name, 'history', time.perf_counter() - started)
+
+    def _get_command(self, name: str) -> Command:
         cmd = self._commands.get(name)
         if not cmd:
             raise CommandNotFoundError(f'Команда {name} не найдена')
+        return cmd
+
+    def _execute(
+        self,
+        cmd: Command,
+        name: str,
+        args: list[str],
+        flags: list[str],
+        stdin: Iterator[str] | None,
+        *,
+        structured: bool,
+    ) -> Generator[Any, None, None]:
+        # фаза load: загрузка модуля команды из реестра; проверка аргументов
+        # идёт внутри execute и попадает в execution
+        started = time.perf_counter()
+        cmd = _load(cmd)
+        self._stats.record(name, 'load', time.perf_counter() - started)
+        if isinstance(cmd, UndoCommand):
+            yield from self._run_undoable(cmd, name, args, flags, structured=structured)
+        else:
+            render = _records if structured else _output
+            yield from self._timed(name, render(cmd, args, flags, self._context, stdin))
+
+    def _stream(
+        self,
+        cmd: Command,
+        name: str,
+        args: list[str],
+        flags: list[str],
+        stdin: Iterator[str] | None,
+        *,
+        structured: bool = False,
+    ) -> Generator[Any, None, None]:
+        """Вывод команды: строки, а при structured - записи Record"""
         if '-h' in flags:
-            res = cmd.description
+            yield Text(cmd.description) if structured else cmd.description
         else:
-            error = None
             try:
-                res = cmd.execute(args, flags, self._context)
-            except DomainError as e:
-                error = e
-            if isinstance(cmd, UndoCommand) and (u := cmd.undo()):
-                self._undo_repo.add(u)
-            if error is not None:
-                raise error
-        self._history_repo.add(name, args, flags)
-        return res
+                yield from self._execute(
+                    cmd, name, args, flags, stdin, structured=structured
+                )
+            except Exception as e:
+                self._count_error(name, e)
+                raise
+            finally:
+                self._metrics.counter(COMMANDS_TOTAL, command=name).inc()
+        self._add_history(name, args, flags)
@@ -0,0 +1,70 @@
+import threading
+from dataclasses import dataclass, field
+
+# фазы выполнения команды в Shell
+PHASES = ('load', 'execution', 'undo', 'history')
+
+# границы корзин гистограммы: 1 мкс * 2^k, последняя ~67 с
+_BOUNDS = [1e-6 * 2**k for k in range(27)]
+
+
+@dataclass
+class Histogram:
+    """Гистограмма задержек с логарифмическими корзинами, память не растёт"""
+
+    buckets: list[int] = field(default_factory=lambda: [0] * (len(_BOUNDS) + 1))
+    count: int = 0
+    total: float = 0.0
+    max: float = 0.0
+
+    def add(self, seconds: float) -> None:
+        i = 0
+        while i < len(_BOUNDS) and seconds > _BOUNDS[i]:
+            i += 1
+        self.buckets[i] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def percentile(self, q: float) -> float:
+        """Верхняя граница корзины, в которую попадает q-й процентиль"""
+        if not self.count:
+            return 0.0
+        rank = q / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                return min(_BOUNDS[i] if i < len(_BOUNDS) else self.max, self.max)
+        return self.max
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+
+class LatencyStats:
+    """Гистограммы задержек по командам и фазам, общие для всех потоков"""
+
+    def __init__(self) -> None:
+        self._hists: dict[tuple[str, str], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def record(self, command: str, phase: str, seconds: float) -> None:
+        with self._lock:
+            hist = self._hists.get((command, phase))
+            if hist is None:
+                hist = self._hists[command, phase] = Histogram()
+            hist.add(seconds)
+
+    def snapshot(self) -> dict[tuple[str, str], Histogram]:
+        """Копия гистограмм, (команда, фаза) -> Histogram"""
+        with self._lock:
+            return {
+                key: Histogram(h.buckets.copy(), h.count, h.total, h.max)
+                for key, h in self._hists.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hists.clear()